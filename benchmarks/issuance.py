@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of the issuance hot path.
+
+Generates synthetic v3 credentials, issues them on the mockchain with a MockTransactionHandler and reports the time
+spent in each stage. Results are written as json so that runs can be compared across commits:
+
+    python benchmarks/issuance.py --scales 10 1000 --output benchmark.json
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+
+PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PATH)
+
+import configargparse
+from cert_core import Chain
+
+from cert_issuer import config, helpers
+from cert_issuer.certificate_handlers import CertificateV3Handler
+from cert_issuer.merkle_tree_generator import MerkleTreeGenerator
+from cert_issuer.models import MockTransactionHandler
+from cert_issuer.normalization_handler import JSONLDHandler
+
+DEFAULT_SCALES = [10, 1000, 10000, 100000]
+
+
+def generate_credential(index):
+    return {
+        '@context': [
+            'https://www.w3.org/2018/credentials/v1',
+            'https://w3id.org/blockcerts/v3'
+        ],
+        'id': 'urn:uuid:' + str(uuid.UUID(int=index)),
+        'type': [
+            'VerifiableCredential',
+            'BlockcertsCredential'
+        ],
+        'issuer': 'https://www.blockcerts.org/samples/3.0/issuer-blockcerts.json',
+        'issuanceDate': '2022-08-18T14:04:24Z',
+        'credentialSubject': {
+            'id': 'did:example:ebfeb1f712ebc6f1c276e12ec21',
+            'name': 'Recipient {}'.format(index),
+            'email': 'recipient-{}@example.com'.format(index)
+        },
+        'display': {
+            'contentMediaType': 'text/html',
+            'content': '<div>Credential {}</div>'.format(index)
+        }
+    }
+
+
+def generate_credentials(unsigned_certs_dir, count):
+    os.makedirs(unsigned_certs_dir, exist_ok=True)
+    for index in range(count):
+        with open(os.path.join(unsigned_certs_dir, '{:08d}.json'.format(index)), 'w') as credential_file:
+            json.dump(generate_credential(index), credential_file)
+
+
+def get_app_config(base_dir, args):
+    parser = configargparse.ArgParser()
+    config.add_arguments(parser)
+    app_config, _ = parser.parse_known_args([
+        '--chain', 'mockchain',
+        '--no_safe_mode',
+        '--usb_name', base_dir,
+        '--key_file', 'pk',
+        '--verification_method', 'did:example:benchmark',
+        '--unsigned_certificates_dir', os.path.join(base_dir, 'unsigned_certificates'),
+        '--signed_certificates_dir', os.path.join(base_dir, 'signed_certificates'),
+        '--blockchain_certificates_dir', os.path.join(base_dir, 'blockchain_certificates'),
+        '--work_dir', os.path.join(base_dir, 'work'),
+        '--normalization_workers', str(args.normalization_workers),
+        '--writer_threads', str(args.writer_threads),
+        '--no_normalization_cache'
+    ])
+    app_config.chain = Chain.parse_from_chain(app_config.chain)
+    # normalization reads the context settings from the global config
+    config.CONFIG = app_config
+    return app_config
+
+
+class StageTimer(object):
+    def __init__(self):
+        self.timings = OrderedDict()
+
+    def time(self, stage, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        self.timings[stage] = time.perf_counter() - start
+        return result
+
+
+def run_scale(count, args):
+    base_dir = tempfile.mkdtemp(prefix='cert-issuer-benchmark-')
+    try:
+        app_config = get_app_config(base_dir, args)
+        generate_credentials(app_config.unsigned_certificates_dir, count)
+
+        timer = StageTimer()
+        certificate_handler = CertificateV3Handler(app_config)
+        merkle_tree = MerkleTreeGenerator()
+
+        certificates_metadata = timer.time('file_prep', helpers.prepare_issuance_batch,
+                                           app_config.unsigned_certificates_dir,
+                                           app_config.signed_certificates_dir,
+                                           app_config.blockchain_certificates_dir,
+                                           app_config.work_dir)
+        certificates_metadata = list(certificates_metadata.values())
+        certificate_handler.start_batch()
+
+        certificates_json = timer.time('read', lambda: [
+            certificate_handler._get_certificate_to_issue(metadata) for metadata in certificates_metadata])
+        timer.time('validation', lambda: [
+            certificate_handler.validate_certificate(certificate_json) for certificate_json in certificates_json])
+        normalized = timer.time('normalization', lambda: list(
+            JSONLDHandler.normalize_batch_to_utf8(certificates_json, args.normalization_workers)))
+        digests = timer.time('hashing', lambda: [hashlib.sha256(data).digest() for data in normalized])
+
+        def build_tree():
+            merkle_tree.populate_digests(digests)
+            return merkle_tree.get_blockchain_data()
+        blockchain_data = timer.time('tree_build', build_tree)
+        tx_id = MockTransactionHandler().issue_transaction(blockchain_data)
+        proof_values = timer.time('proof_encode', lambda: list(
+            merkle_tree.get_proof_generator(tx_id, app_config.chain)))
+
+        def write_outputs():
+            for metadata, proof_value in zip(certificates_metadata, proof_values):
+                certificate_handler.add_proof(metadata, proof_value)
+            certificate_handler.flush()
+            helpers.copy_output(OrderedDict((metadata.uid, metadata) for metadata in certificates_metadata))
+        timer.time('output_writes', write_outputs)
+
+        total = sum(timer.timings.values())
+        return OrderedDict([
+            ('certificates', count),
+            ('stages', timer.timings),
+            ('total', total),
+            ('certificates_per_second', count / total if total else None)
+        ])
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=PATH,
+                                       stderr=subprocess.DEVNULL).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the cert-issuer issuance hot path on the mockchain.')
+    parser.add_argument('--scales', nargs='+', type=int, default=DEFAULT_SCALES,
+                        help='Batch sizes to benchmark.')
+    parser.add_argument('--normalization_workers', type=int, default=1,
+                        help='Number of worker processes used for normalization.')
+    parser.add_argument('--writer_threads', type=int, default=1,
+                        help='Number of threads writing the blockchain certificates.')
+    parser.add_argument('--output', default=None,
+                        help='Path of the json results file. Results are printed to stdout if not set.')
+    args = parser.parse_args()
+
+    config.configure_logger()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = OrderedDict([
+        ('commit', get_commit()),
+        ('python', platform.python_version()),
+        ('normalization_workers', args.normalization_workers),
+        ('writer_threads', args.writer_threads),
+        ('runs', [])
+    ])
+    for count in args.scales:
+        run = run_scale(count, args)
+        results['runs'].append(run)
+        print('{:>8} certificates: {:.3f}s ({})'.format(
+            count, run['total'],
+            ', '.join('{} {:.3f}s'.format(stage, duration) for stage, duration in run['stages'].items())),
+            file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -11,10 +11,17 @@ if __package__ is None and not hasattr(sys, 'frozen'):
 
 
 def cert_issuer_main(args=None):
-    from cert_issuer import config
-    parsed_config = config.get_config()
-    from cert_issuer import issue_certificates
-    issue_certificates.main(parsed_config)
+    from cert_issuer.import_profiler import profile_import_requested, start_import_profiler
+    profiler = start_import_profiler() if profile_import_requested(sys.argv[1:]) else None
+    try:
+        from cert_issuer import config
+        parsed_config = config.get_config()
+        from cert_issuer import issue_certificates
+        issue_certificates.main(parsed_config)
+    finally:
+        if profiler is not None:
+            profiler.uninstall()
+            sys.stderr.write(profiler.format_report() + '\n')
 
 
 if __name__ == '__main__':
@@ -3,12 +3,10 @@ import os
 
 from cert_core import UnknownChainError
 
-from cert_issuer.blockchain_handlers.bitcoin.connectors import BitcoinServiceProviderConnector, MockServiceProviderConnector
-from cert_issuer.blockchain_handlers.bitcoin.signer import BitcoinSigner
-from cert_issuer.blockchain_handlers.bitcoin.transaction_handlers import BitcoinTransactionHandler
 from cert_issuer.certificate_handlers import CertificateBatchHandler, CertificateV3Handler, CertificateBatchWebHandler, CertificateWebV3Handler
 from cert_issuer.merkle_tree_generator import MerkleTreeGenerator
-from cert_issuer.models import MockTransactionHandler
+from cert_issuer.models import MockServiceProviderConnector, MockTransactionHandler
+from cert_issuer.connectivity import create_connectivity_gate
 from cert_issuer.signer import FileSecretManager
 
 COIN = 100000000  # satoshis in 1 btc
@@ -30,16 +28,23 @@ class BitcoinTransactionCostConstants(object):
 
 
 def initialize_signer(app_config):
+    if getattr(app_config, 'remote_signer_url', None):
+        from cert_issuer.remote_signer import create_remote_secret_manager
+        return create_remote_secret_manager(app_config)
+
     path_to_secret = os.path.join(app_config.usb_name, app_config.key_file)
 
     if app_config.chain.is_bitcoin_type():
+        # python-bitcoinlib and pycoin are only imported when issuing on bitcoin
+        from cert_issuer.blockchain_handlers.bitcoin.signer import BitcoinSigner
         signer = BitcoinSigner(bitcoin_chain=app_config.chain)
     elif app_config.chain.is_mock_type():
         signer = None
     else:
         raise UnknownChainError(app_config.chain)
     secret_manager = FileSecretManager(signer=signer, path_to_secret=path_to_secret,
-                                       safe_mode=app_config.safe_mode, issuing_address=app_config.issuing_address)
+                                       safe_mode=app_config.safe_mode, issuing_address=app_config.issuing_address,
+                                       connectivity_gate=create_connectivity_gate(app_config))
     return secret_manager
 
 def instantiate_blockchain_handlers(app_config, file_mode=True):
@@ -61,6 +66,8 @@ def instantiate_blockchain_handlers(app_config, file_mode=True):
         transaction_handler = MockTransactionHandler()
         connector = MockServiceProviderConnector()
     else:
+        from cert_issuer.blockchain_handlers.bitcoin.connectors import BitcoinServiceProviderConnector
+        from cert_issuer.blockchain_handlers.bitcoin.transaction_handlers import BitcoinTransactionHandler
         cost_constants = BitcoinTransactionCostConstants(app_config.tx_fee, app_config.dust_threshold,
                                                          app_config.satoshi_per_byte)
         connector = BitcoinServiceProviderConnector(chain, app_config.bitcoind)
@@ -1,25 +1,27 @@
 """
 Connectors wrap the details of communicating with different Bitcoin clients and implementations.
 """
+import functools
 import io
 import logging
+import random
+import threading
 import time
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 
 import bitcoin.rpc
-import requests
 from bitcoin.core import CTransaction
 from cert_core import Chain
 from pycoin.encoding.hexbytes import b2h, b2h_rev, h2b, h2b_rev
-from pycoin.services import providers
-from pycoin.services.chain_so import ChainSoProvider
-from pycoin.services.insight import InsightProvider
-from pycoin.services.providers import service_provider_methods
 from pycoin.coins.bitcoin.Spendable import Spendable
 
 import cert_issuer.config
 from cert_issuer import helpers
+from cert_issuer.blockchain_handlers.provider_registry import provider_registry
+from cert_issuer.blockchain_handlers.sessions import get_session
 from cert_issuer.errors import BroadcastError
+from cert_issuer.models import MockServiceProviderConnector  # noqa: F401
 
 try:
     from urllib2 import urlopen, HTTPError
@@ -29,6 +31,7 @@ except ImportError:
     from urllib.parse import urlencode
 
 BROADCAST_RETRY_INTERVAL = 30
+BROADCAST_BACKOFF_BASE = 2
 MAX_BROADCAST_ATTEMPTS = 3
 
 
@@ -52,7 +55,7 @@ class BlockcypherProvider(object):
         broadcast_url = self.base_url + '/txs/push'
         if self.api_token:
             broadcast_url += '?token=' + self.api_token
-        response = requests.post(broadcast_url, json={'tx': hextx})
+        response = get_session().post(broadcast_url, json={'tx': hextx})
         if int(response.status_code) == 201:
             tx_id = response.json().get('tx', None)
             tx_hash = tx_id.get('hash', None)
@@ -71,7 +74,7 @@ class BlockcypherProvider(object):
         if self.api_token:
             url_append += '&token=' + self.api_token
         url = self.base_url + '/addrs/' + address + url_append
-        response = requests.get(url)
+        response = get_session().get(url)
         if int(response.status_code) == 200:
             for txn in response.json().get('txrefs', []):
                 coin_value = txn.get('value')
@@ -88,7 +91,7 @@ class BlockstreamBroadcaster(object):
     def broadcast_tx(self, tx):
         hextx = to_hex(tx)
         broadcast_url = self.base_url + '/tx'
-        response = requests.post(broadcast_url, data=hextx)
+        response = get_session().post(broadcast_url, data=hextx)
         if int(response.status_code) == 200:
             tx_id = response.text
             return tx_id
@@ -135,29 +138,17 @@ class ServiceProviderConnector(object):
         pass
 
 
-class MockServiceProviderConnector(ServiceProviderConnector):
-    def get_balance(self, address):
-        pass
-
-    def broadcast_tx(self, tx):
-        pass
-
-
 class BitcoinServiceProviderConnector(ServiceProviderConnector):
     def __init__(self, bitcoin_chain, bitcoind=False):
         self.bitcoin_chain = bitcoin_chain
         self.bitcoind = bitcoind
 
     def spendables_for_address(self, bitcoin_address):
-        for m in service_provider_methods('spendables_for_address',
-                                          get_providers_for_chain(self.bitcoin_chain, self.bitcoind)):
-            try:
-                logging.debug('m=%s', m)
-                spendables = m(bitcoin_address)
-                return spendables
-            except Exception as e:
-                logging.warning(e)
-                pass
+        try:
+            return provider_registry.call(get_providers_for_chain(self.bitcoin_chain, self.bitcoind),
+                                          'spendables_for_address', bitcoin_address)
+        except Exception as e:
+            logging.warning(e)
         return []
 
     def get_unspent_outputs(self, address):
@@ -200,74 +191,163 @@ class BitcoinServiceProviderConnector(ServiceProviderConnector):
         """
         Broadcast the transaction through the configured set of providers
 
+        All providers are called concurrently and the first tx_id returned is used, while the remaining providers finish
+        in the background. Failed rounds are retried after a jittered exponential backoff.
+
         :param tx:
         :param bitcoin_chain:
         :return:
         """
         last_exception = None
-        final_tx_id = None
 
-        # Unlike other providers, we want to broadcast to all available apis
         for attempt_number in range(0, MAX_BROADCAST_ATTEMPTS):
-            for method_provider in service_provider_methods('broadcast_tx',
-                                                            get_providers_for_chain(bitcoin_chain, bitcoind)):
-                try:
-                    tx_id = method_provider(tx)
-                    if tx_id:
-                        logging.info('Broadcasting succeeded with method_provider=%s, txid=%s', str(method_provider),
-                                     tx_id)
-                        if final_tx_id and final_tx_id != tx_id:
-                            logging.error(
-                                'This should never happen; fail and investigate if it does. Got conflicting tx_ids=%s and %s. Hextx=%s',
-                                final_tx_id, tx_id, tx.as_hex())
-                            raise Exception('Got conflicting tx_ids.')
-                        final_tx_id = tx_id
-                except Exception as e:
-                    logging.warning('Caught exception trying provider %s. Trying another. Exception=%s',
-                                    str(method_provider), e)
-                    last_exception = e
+            method_providers = service_provider_methods('broadcast_tx', get_providers_for_chain(bitcoin_chain, bitcoind))
+            final_tx_id, exception = broadcast_to_providers(tx, method_providers)
             # At least 1 provider succeeded, so return
             if final_tx_id:
                 return final_tx_id
-            else:
-                logging.warning('Broadcasting failed. Waiting before retrying. This is attempt number %d',
-                                attempt_number)
-                time.sleep(BROADCAST_RETRY_INTERVAL)
+            last_exception = exception or last_exception
+            if attempt_number < MAX_BROADCAST_ATTEMPTS - 1:
+                delay = get_broadcast_retry_delay(attempt_number)
+                logging.warning('Broadcasting failed. Waiting %.1f seconds before retrying. This is attempt number %d',
+                                delay, attempt_number)
+                time.sleep(delay)
         logging.error('Failed broadcasting through all providers')
         logging.error(last_exception, exc_info=True)
         raise BroadcastError(last_exception)
 
 
-# configure api tokens
-config = cert_issuer.config.CONFIG
-blockcypher_token = None if config is None else config.blockcypher_api_token
+class BroadcastRound(object):
+    """
+    Collects the results of a transaction broadcast to several providers at once
+    """
+    def __init__(self, tx, pending):
+        self.tx = tx
+        self.pending = pending
+        self.tx_id = None
+        self.last_exception = None
+        self.done = threading.Condition()
+
+    def on_result(self, method_provider, future):
+        tx_id = None
+        exception = future.exception()
+        if exception is not None:
+            logging.warning('Caught exception trying provider %s. Exception=%s', str(method_provider), exception)
+        else:
+            tx_id = future.result()
+        with self.done:
+            self.pending -= 1
+            if exception is not None:
+                self.last_exception = exception
+            if tx_id:
+                logging.info('Broadcasting succeeded with method_provider=%s, txid=%s', str(method_provider), tx_id)
+                if self.tx_id and self.tx_id != tx_id:
+                    logging.error(
+                        'This should never happen; fail and investigate if it does. Got conflicting tx_ids=%s and %s. Hextx=%s',
+                        self.tx_id, tx_id, self.tx.as_hex())
+                    self.last_exception = Exception('Got conflicting tx_ids.')
+                elif not self.tx_id:
+                    self.tx_id = tx_id
+            self.done.notify_all()
+
+    def wait(self):
+        """
+        Waits for the first tx_id, or for every provider to fail
+        :return: (tx_id, last exception)
+        """
+        with self.done:
+            while not self.tx_id and self.pending > 0:
+                self.done.wait()
+            return self.tx_id, self.last_exception
+
+
+def broadcast_to_providers(tx, method_providers):
+    """
+    Broadcasts tx through all method_providers concurrently, returning as soon as one of them returns a tx_id. Providers
+    still running keep going in the background, and a conflicting tx_id they return is logged.
+    :param tx:
+    :param method_providers:
+    :return: (tx_id or None, last exception)
+    """
+    method_providers = list(method_providers)
+    if not method_providers:
+        return None, None
+    broadcast_round = BroadcastRound(tx, len(method_providers))
+    executor = ThreadPoolExecutor(max_workers=len(method_providers), thread_name_prefix='broadcast')
+    try:
+        for method_provider in method_providers:
+            future = executor.submit(method_provider, tx)
+            future.add_done_callback(functools.partial(broadcast_round.on_result, method_provider))
+        return broadcast_round.wait()
+    finally:
+        executor.shutdown(wait=False)
+
+
+def get_broadcast_retry_delay(attempt_number):
+    """
+    Exponential backoff capped at BROADCAST_RETRY_INTERVAL, with jitter so that retries of concurrent issuers spread out
+    :param attempt_number: 0 based number of the failed attempt
+    :return: delay in seconds
+    """
+    delay = min(BROADCAST_RETRY_INTERVAL, BROADCAST_BACKOFF_BASE * 2 ** attempt_number)
+    return delay / 2 + random.uniform(0, delay / 2)
+
 
 PYCOIN_BTC_PROVIDERS = "blockchain.info chain.so"  # blockcypher.com
 PYCOIN_XTN_PROVIDERS = ""  # chain.so
 
-# initialize connectors
+# providers are built on first use for each chain, see get_providers_for_chain
 connectors = {}
+connectors_lock = threading.Lock()
 
-# configure mainnet providers
-provider_list = providers.providers_for_config_string(PYCOIN_BTC_PROVIDERS,
-                                                      helpers.to_pycoin_chain(Chain.bitcoin_mainnet))
-provider_list.append(BlockcypherProvider('https://api.blockcypher.com/v1/btc/main', blockcypher_token))
-provider_list.append(InsightProvider(netcode=helpers.to_pycoin_chain(Chain.bitcoin_mainnet)))
-provider_list.append(ChainSoProvider(netcode=helpers.to_pycoin_chain(Chain.bitcoin_mainnet)))
-provider_list.append(BlockstreamBroadcaster('https://blockstream.info/api'))
-connectors[Chain.bitcoin_mainnet] = provider_list
 
-# configure testnet providers
-xtn_provider_list = providers.providers_for_config_string(PYCOIN_XTN_PROVIDERS,
-                                                          helpers.to_pycoin_chain(Chain.bitcoin_testnet))
-xtn_provider_list.append(ChainSoProvider(netcode=helpers.to_pycoin_chain(Chain.bitcoin_testnet)))
-xtn_provider_list.append(BlockcypherProvider('https://api.blockcypher.com/v1/btc/test3', blockcypher_token))
-xtn_provider_list.append(BlockstreamBroadcaster('https://blockstream.info/testnet/api'))
-connectors[Chain.bitcoin_testnet] = xtn_provider_list
+def create_providers_for_chain(chain):
+    """
+    Builds the providers of a chain. pycoin's service providers are only imported here, so that importing this module
+    stays cheap for runs that never reach a bitcoin API.
+    :param chain:
+    :return: list of providers
+    """
+    from pycoin.services import providers
+    from pycoin.services.chain_so import ChainSoProvider
+    from pycoin.services.insight import InsightProvider
+
+    # configure api tokens
+    config = cert_issuer.config.CONFIG
+    blockcypher_token = None if config is None else config.blockcypher_api_token
+
+    if chain == Chain.bitcoin_mainnet:
+        provider_list = providers.providers_for_config_string(PYCOIN_BTC_PROVIDERS,
+                                                              helpers.to_pycoin_chain(Chain.bitcoin_mainnet))
+        provider_list.append(BlockcypherProvider('https://api.blockcypher.com/v1/btc/main', blockcypher_token))
+        provider_list.append(InsightProvider(netcode=helpers.to_pycoin_chain(Chain.bitcoin_mainnet)))
+        provider_list.append(ChainSoProvider(netcode=helpers.to_pycoin_chain(Chain.bitcoin_mainnet)))
+        provider_list.append(BlockstreamBroadcaster('https://blockstream.info/api'))
+        return provider_list
+
+    if chain == Chain.bitcoin_testnet:
+        xtn_provider_list = providers.providers_for_config_string(PYCOIN_XTN_PROVIDERS,
+                                                                  helpers.to_pycoin_chain(Chain.bitcoin_testnet))
+        xtn_provider_list.append(ChainSoProvider(netcode=helpers.to_pycoin_chain(Chain.bitcoin_testnet)))
+        xtn_provider_list.append(BlockcypherProvider('https://api.blockcypher.com/v1/btc/test3', blockcypher_token))
+        xtn_provider_list.append(BlockstreamBroadcaster('https://blockstream.info/testnet/api'))
+        return xtn_provider_list
+
+    raise KeyError(chain)
 
 
 def get_providers_for_chain(chain, bitcoind=False):
     if bitcoind:
         return [BitcoindConnector(helpers.to_pycoin_chain(chain))]
-    else:
+    with connectors_lock:
+        if chain not in connectors:
+            connectors[chain] = create_providers_for_chain(chain)
         return connectors[chain]
+
+
+def service_provider_methods(method_name, service_providers):
+    """
+    Same as pycoin's service_provider_methods, without importing pycoin.services
+    """
+    methods = [getattr(m, method_name, None) for m in service_providers]
+    return [m for m in methods if m]
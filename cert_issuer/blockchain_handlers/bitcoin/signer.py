@@ -14,20 +14,18 @@ from cert_issuer.models import Signer
 
 class BitcoinSigner(Signer):
     def __init__(self, bitcoin_chain):
+        super().__init__()
         self.bitcoin_chain = bitcoin_chain
+        self.network = None
 
     def sign_message(self, wif, message_to_sign):
-        secret_key = CBitcoinSecret(wif)
+        secret_key = self.get_key(wif, 'secret', CBitcoinSecret)
         message = BitcoinMessage(message_to_sign)
         signature = SignMessage(secret_key, message)
         return str(signature, 'utf-8')
 
     def sign_transaction(self, wif, transaction_to_sign):
-        netcode = to_pycoin_chain(self.bitcoin_chain)
-        network = network_for_netcode(netcode)
-        key = network.parse.wif(wif)
-        secret_exponent = key.secret_exponent()
-        lookup = build_hash160_lookup([secret_exponent])
+        lookup = self.get_key(wif, 'hash160_lookup', self.build_hash160_lookup)
         signed_transaction = transaction_to_sign.sign(lookup)
         # Because signing failures silently continue, first check that the inputs are signed
         for input in signed_transaction.txs_in:
@@ -36,6 +34,12 @@ class BitcoinSigner(Signer):
                 raise UnableToSignTxError('Unable to sign transaction')
         return signed_transaction
 
+    def build_hash160_lookup(self, wif):
+        if self.network is None:
+            self.network = network_for_netcode(to_pycoin_chain(self.bitcoin_chain))
+        key = self.network.parse.wif(wif)
+        return build_hash160_lookup([key.secret_exponent()], [self.network.generator])
+
 
 def verify_message(address, message, signature):
     """
@@ -1,11 +1,11 @@
 import logging
-import random
 
 from pycoin.encoding.hexbytes import b2h
 
 from cert_issuer.blockchain_handlers.bitcoin import tx_utils
+from cert_issuer.blockchain_handlers.bitcoin.utxo import UtxoCache, select_inputs
 from cert_issuer.config import ESTIMATE_NUM_INPUTS, V2_NUM_OUTPUTS
-from cert_issuer.errors import InsufficientFundsError
+from cert_issuer.errors import BroadcastError, InsufficientFundsError
 from cert_issuer.models import TransactionCreator, TransactionHandler
 from cert_issuer.signer import FinalizableSigner
 
@@ -36,10 +36,11 @@ class BitcoinTransactionHandler(TransactionHandler):
         self.issuing_address = issuing_address
         self.prepared_inputs = prepared_inputs
         self.transaction_creator = transaction_creator
+        self.utxo_cache = UtxoCache(connector, issuing_address)
 
     def ensure_balance(self):
         # ensure the issuing address has sufficient balance
-        balance = self.connector.get_balance(self.issuing_address)
+        balance = self.utxo_cache.get_balance()
 
         transaction_cost = self.transaction_creator.estimate_cost_for_certificate_batch(self.tx_cost_constants)
         logging.info('Total cost will be %d satoshis', transaction_cost)
@@ -48,6 +49,8 @@ class BitcoinTransactionHandler(TransactionHandler):
             error_message = 'Please add {} satoshis to the address {}'.format(
                 transaction_cost - balance, self.issuing_address)
             logging.error(error_message)
+            # fetch the unspent outputs again on the next batch, once the address may have been topped up
+            self.utxo_cache.invalidate()
             raise InsufficientFundsError(error_message)
 
     def issue_transaction(self, blockchain_bytes):
@@ -55,7 +58,13 @@ class BitcoinTransactionHandler(TransactionHandler):
         prepared_tx = self.create_transaction(blockchain_bytes)
         signed_tx = self.sign_transaction(prepared_tx)
         self.verify_transaction(signed_tx, op_return_value)
-        txid = self.broadcast_transaction(signed_tx)
+        try:
+            txid = self.broadcast_transaction(signed_tx)
+        except BroadcastError:
+            # the transaction may still have reached the network, fetch the unspent outputs again on the next attempt
+            self.utxo_cache.invalidate()
+            raise
+        self.utxo_cache.spend(signed_tx)
         # this logging is already done in issuer
         # logging.info('Broadcast transaction with txid %s', txid)
         return txid
@@ -64,21 +73,25 @@ class BitcoinTransactionHandler(TransactionHandler):
         if self.prepared_inputs:
             inputs = self.prepared_inputs
         else:
-            spendables = self.connector.get_unspent_outputs(self.issuing_address)
+            spendables = self.utxo_cache.get_spendables()
             if not spendables:
                 error_message = 'No money to spend at address {}'.format(self.issuing_address)
                 logging.error(error_message)
+                self.utxo_cache.invalidate()
                 raise InsufficientFundsError(error_message)
 
-            cost = self.transaction_creator.estimate_cost_for_certificate_batch(self.tx_cost_constants)
-            current_total = 0
-            inputs = []
-            random.shuffle(spendables)
-            for s in spendables:
-                inputs.append(s)
-                current_total += s.coin_value
-                if current_total > cost:
-                    break
+            def get_cost(num_inputs):
+                # leave no change output below the dust threshold
+                return (self.transaction_creator.estimate_cost_for_certificate_batch(self.tx_cost_constants,
+                                                                                     num_inputs) +
+                        self.tx_cost_constants.get_minimum_output_coin())
+
+            inputs = select_inputs(spendables, get_cost)
+            if inputs is None:
+                error_message = 'Not enough money to spend at address {}'.format(self.issuing_address)
+                logging.error(error_message)
+                self.utxo_cache.invalidate()
+                raise InsufficientFundsError(error_message)
 
         tx = self.transaction_creator.create_transaction(self.tx_cost_constants, self.issuing_address, inputs,
                                                          op_return_bytes)
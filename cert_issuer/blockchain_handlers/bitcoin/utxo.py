@@ -0,0 +1,76 @@
+import logging
+
+from pycoin.coins.bitcoin.Spendable import Spendable
+
+
+def outpoint(spendable):
+    return spendable.tx_hash, spendable.tx_out_index
+
+
+class UtxoCache(object):
+    """
+    Unspent outputs of the issuing address, fetched from the connector once and then kept up to date with the
+    transactions broadcast by the issuer: their inputs are removed and their change outputs are added. The cache is
+    invalidated whenever it may be out of date, after a failed broadcast or when the funds are insufficient, so that
+    the next batch sees the outputs of a top up.
+    """
+    def __init__(self, connector, address):
+        self.connector = connector
+        self.address = address
+        self.spendables = None
+
+    def get_spendables(self):
+        """
+        :return: list of the unspent outputs of the address
+        """
+        if self.spendables is None:
+            self.spendables = list(self.connector.get_unspent_outputs(self.address) or [])
+        return list(self.spendables)
+
+    def get_balance(self):
+        balance = sum(s.coin_value for s in self.get_spendables())
+        if not balance:
+            logging.warning('address %s has a balance of 0', self.address)
+        return balance
+
+    def spend(self, signed_tx):
+        """
+        Records a broadcast transaction: its inputs are spent and its outputs paying back to the address can be spent
+        by the next transactions
+        :param signed_tx: pycoin transaction, with the unspent outputs it spends
+        :return:
+        """
+        if self.spendables is None:
+            return
+        spent = set((tx_in.previous_hash, tx_in.previous_index) for tx_in in signed_tx.txs_in)
+        own_scripts = set(unspent.script for unspent in signed_tx.unspents)
+        self.spendables = [s for s in self.spendables if outpoint(s) not in spent]
+        tx_hash = signed_tx.hash()
+        for index, tx_out in enumerate(signed_tx.txs_out):
+            if tx_out.coin_value > 0 and tx_out.script in own_scripts:
+                self.spendables.append(Spendable(tx_out.coin_value, tx_out.script, tx_hash, index))
+
+    def invalidate(self):
+        self.spendables = None
+
+
+def select_inputs(spendables, get_cost):
+    """
+    Deterministic coin selection using as few inputs as possible. The largest outputs are taken first, and the last
+    one is replaced by the smallest output covering the rest of the cost, keeping larger outputs for the next batches.
+    :param spendables: candidate unspent outputs
+    :param get_cost: function returning the amount, in satoshis, the inputs must cover for a number of inputs
+    :return: list of the selected spendables, or None if they cannot cover the cost
+    """
+    candidates = sorted(spendables, key=lambda s: (-s.coin_value, s.tx_hash, s.tx_out_index))
+    selected = []
+    total = 0
+    for index, spendable in enumerate(candidates):
+        missing = get_cost(len(selected) + 1) - total
+        if spendable.coin_value >= missing:
+            last = min((s for s in candidates[index:] if s.coin_value >= missing),
+                       key=lambda s: (s.coin_value, s.tx_hash, s.tx_out_index))
+            return selected + [last]
+        selected.append(spendable)
+        total += spendable.coin_value
+    return None
@@ -4,11 +4,9 @@ import os
 from cert_core import UnknownChainError
 
 from cert_issuer.certificate_handlers import CertificateBatchHandler, CertificateV3Handler, CertificateBatchWebHandler, CertificateWebV3Handler
-from cert_issuer.blockchain_handlers.ethereum.connectors import EthereumServiceProviderConnector
-from cert_issuer.blockchain_handlers.ethereum.signer import EthereumSigner
-from cert_issuer.blockchain_handlers.ethereum.transaction_handlers import EthereumTransactionHandler
 from cert_issuer.merkle_tree_generator import MerkleTreeGenerator
 from cert_issuer.models import MockTransactionHandler
+from cert_issuer.connectivity import create_connectivity_gate
 from cert_issuer.signer import FileSecretManager
 
 ONE_BILLION = 1000000000
@@ -43,16 +41,23 @@ class EthereumTransactionCostConstants(object):
 
 
 def initialize_signer(app_config):
+    if getattr(app_config, 'remote_signer_url', None):
+        from cert_issuer.remote_signer import create_remote_secret_manager
+        return create_remote_secret_manager(app_config)
+
     path_to_secret = os.path.join(app_config.usb_name, app_config.key_file)
 
     if app_config.chain.is_ethereum_type():
+        # web3 and eth_account are only imported when issuing on ethereum
+        from cert_issuer.blockchain_handlers.ethereum.signer import EthereumSigner
         signer = EthereumSigner(ethereum_chain=app_config.chain)
     elif app_config.is_mock_type():
         signer = None
     else:
         raise UnknownChainError(app_config.chain)
     secret_manager = FileSecretManager(signer=signer, path_to_secret=path_to_secret,
-                                       safe_mode=app_config.safe_mode, issuing_address=app_config.issuing_address)
+                                       safe_mode=app_config.safe_mode, issuing_address=app_config.issuing_address,
+                                       connectivity_gate=create_connectivity_gate(app_config))
     return secret_manager
 
 
@@ -72,6 +77,8 @@ def instantiate_blockchain_handlers(app_config, file_mode=True):
         transaction_handler = MockTransactionHandler()
     # ethereum chains
     elif chain.is_ethereum_type():
+        from cert_issuer.blockchain_handlers.ethereum.connectors import EthereumServiceProviderConnector
+        from cert_issuer.blockchain_handlers.ethereum.transaction_handlers import EthereumTransactionHandler
         nonce = app_config.nonce
         connector = EthereumServiceProviderConnector(chain, app_config)
 
@@ -1,7 +1,6 @@
 import logging
 import time
 
-import requests
 import web3
 from web3 import Web3, HTTPProvider
 
@@ -15,6 +14,8 @@ except ImportError:
 from cert_core import Chain
 from cert_issuer.models import ServiceProviderConnector
 from cert_issuer.errors import BroadcastError
+from cert_issuer.blockchain_handlers.provider_registry import provider_registry
+from cert_issuer.blockchain_handlers.sessions import get_session
 
 BROADCAST_RETRY_INTERVAL = 30
 MAX_BROADCAST_ATTEMPTS = 3
@@ -88,36 +89,27 @@ class EthereumServiceProviderConnector(ServiceProviderConnector):
         return self.connectors[chain]
 
     def get_balance(self, address):
-        for m in self.get_providers_for_chain(self.ethereum_chain, self.local_node):
-            try:
-                logging.debug('m=%s', m)
-                balance = m.get_balance(address)
-                return balance
-            except Exception as e:
-                logging.warning(e)
-                pass
+        try:
+            return provider_registry.call(self.get_providers_for_chain(self.ethereum_chain, self.local_node),
+                                          'get_balance', address)
+        except Exception as e:
+            logging.warning(e)
         return 0
 
     def gas_price(self):
-        for m in self.get_providers_for_chain(self.ethereum_chain, self.local_node):
-            try:
-                logging.info('m=%s', m)
-                gas_price = m.gas_price()
-                return gas_price
-            except Exception as e:
-                logging.info(e)
-                pass
+        try:
+            return provider_registry.call(self.get_providers_for_chain(self.ethereum_chain, self.local_node),
+                                          'gas_price')
+        except Exception as e:
+            logging.info(e)
         return 0
 
     def get_address_nonce(self, address):
-        for m in self.get_providers_for_chain(self.ethereum_chain, self.local_node):
-            try:
-                logging.debug('m=%s', m)
-                nonce = m.get_address_nonce(address)
-                return nonce
-            except Exception as e:
-                logging.warning(e)
-                pass
+        try:
+            return provider_registry.call(self.get_providers_for_chain(self.ethereum_chain, self.local_node),
+                                          'get_address_nonce', address)
+        except Exception as e:
+            logging.warning(e)
         return 0
 
     def broadcast_tx(self, tx):
@@ -163,7 +155,7 @@ class EthereumRPCProvider(object):
     def __init__(self, ethereum_url):
         self.ethereum_url = ethereum_url
         logging.info(f'Setting up a new RPC provider for Ethereum at url: {ethereum_url}')
-        self.w3 = Web3(HTTPProvider(ethereum_url))
+        self.w3 = Web3(HTTPProvider(ethereum_url, session=get_session()))
 
     def broadcast_tx(self, tx):
         logging.info('Broadcasting transaction with EthereumRPCProvider')
@@ -197,7 +189,7 @@ class EtherscanBroadcaster(object):
         headers = {
             'User-Agent': 'Python-urllib/3.8'
         }
-        response = requests.request(method, url, data=data, headers=headers)
+        response = get_session().request(method, url, data=data, headers=headers)
         return response
 
     def broadcast_tx(self, tx):
@@ -285,7 +277,7 @@ class MyEtherWalletBroadcaster(object):
             "params": ["0x" + tx],
             "id": 1
         }
-        response = requests.post(self.base_url, json=data, headers={'user-agent':'cert-issuer'})
+        response = get_session().post(self.base_url, json=data, headers={'user-agent':'cert-issuer'})
         if 'error' in response.json():
             logging.error("MyEtherWallet returned an error: %s", response.json()['error'])
             raise BroadcastError(response.json()['error'])
@@ -307,7 +299,7 @@ class MyEtherWalletBroadcaster(object):
             "params": [address, "latest"],
             "id": 1
         }
-        response = requests.post(self.base_url, json=data, headers={'user-agent':'cert-issuer'})
+        response = get_session().post(self.base_url, json=data, headers={'user-agent':'cert-issuer'})
         if int(response.status_code) == 200:
             logging.info('Balance check response: %s', response.json())
             balance = int(response.json().get('result', None), 0)
@@ -328,7 +320,7 @@ class MyEtherWalletBroadcaster(object):
             "params": [address, "pending"],
             "id": 1
         }
-        response = requests.post(self.base_url, json=data, headers={'user-agent':'cert-issuer'})
+        response = get_session().post(self.base_url, json=data, headers={'user-agent':'cert-issuer'})
         if int(response.status_code) == 200:
             # the int(res, 0) transforms the hex nonce to int
             nonce = int(response.json().get('result', None), 0)
@@ -1,7 +1,9 @@
 import logging
 
 import web3
+from eth_keys import keys
 from eth_utils import to_hex
+from hexbytes import HexBytes
 
 from cert_issuer.errors import UnableToSignTxError
 from cert_issuer.models import Signer
@@ -9,6 +11,7 @@ from cert_issuer.models import Signer
 
 class EthereumSigner(Signer):
     def __init__(self, ethereum_chain):
+        super().__init__()
         self.ethereum_chain = ethereum_chain
         # Netcode ensures replay protection (see EIP155)
         if ethereum_chain.external_display_value == 'ethereumMainnet':
@@ -30,7 +33,9 @@ class EthereumSigner(Signer):
         if isinstance(transaction_to_sign, dict):
             try:
                 transaction_to_sign['chainId'] = self.netcode
-                raw_tx = web3.Account.sign_transaction(transaction_to_sign, wif)['rawTransaction']
+                private_key = self.get_key(wif, 'private_key', parse_private_key)
+                signed_tx = web3.Account.sign_transaction(transaction_to_sign, private_key)
+                raw_tx = getattr(signed_tx, 'raw_transaction', None) or signed_tx['rawTransaction']
                 raw_tx_hex = to_hex(raw_tx)
                 return raw_tx_hex
             except Exception as msg:
@@ -38,3 +43,12 @@ class EthereumSigner(Signer):
                 return {'error': True, 'message': msg}
         else:
             raise UnableToSignTxError('"sign_transaction()" expects a dict representing an unsigned transaction with fields such as "gas", "to", "data", etc. run "$ python cert_issuer -h" for more information on transaction configuration.')
+
+
+def parse_private_key(wif):
+    """
+    Parses the hex private key, deriving its public key once instead of on every signature
+    :param wif: hex private key
+    :return: eth_keys PrivateKey
+    """
+    return keys.PrivateKey(HexBytes(wif))
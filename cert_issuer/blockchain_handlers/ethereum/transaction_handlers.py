@@ -63,6 +63,9 @@ class EthereumTransactionHandler(TransactionHandler):
         signed_tx = self.sign_transaction(prepared_tx)
         self.verify_transaction(signed_tx, eth_data_field)
         txid = self.broadcast_transaction(signed_tx)
+        if self.nonce:
+            # a configured nonce is used up once broadcast, the next batch of a long-running issuer needs the next one
+            self.nonce += 1
         return txid
 
     def create_transaction(self, blockchain_bytes):
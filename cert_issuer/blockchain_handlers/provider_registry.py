@@ -0,0 +1,168 @@
+"""
+Health tracking of the blockchain API providers, so that lookups go to the healthiest providers first and skip the
+ones that keep failing instead of waiting for them to time out on every call.
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+WINDOW_SIZE = 20
+FAILURE_THRESHOLD = 3
+COOLDOWN = 60
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class ProviderStats(object):
+    """
+    Rolling window of the outcome and latency of the last calls to a provider, with a circuit breaker that opens after
+    failure_threshold consecutive failures. Once cooldown seconds have passed, the provider is half open: it can be
+    called again, and its circuit opens again on its first failure.
+    """
+    def __init__(self, window_size=WINDOW_SIZE, failure_threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN):
+        self.calls = deque(maxlen=window_size)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.opened_at = None
+
+    def error_rate(self):
+        if not self.calls:
+            return 0.0
+        return sum(1 for success, _ in self.calls if not success) / len(self.calls)
+
+    def average_latency(self):
+        if not self.calls:
+            return 0.0
+        return sum(latency for _, latency in self.calls) / len(self.calls)
+
+    def state(self, now):
+        if self.opened_at is None:
+            return CLOSED
+        if now - self.opened_at >= self.cooldown:
+            return HALF_OPEN
+        return OPEN
+
+    def is_available(self, now):
+        return self.state(now) != OPEN
+
+    def record(self, success, latency, now):
+        self.calls.append((success, latency))
+        if success:
+            self.consecutive_failures = 0
+            self.opened_at = None
+            return
+        self.consecutive_failures += 1
+        if self.opened_at is not None or self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = now
+
+    def to_dict(self, now):
+        return {
+            'state': self.state(now),
+            'calls': len(self.calls),
+            'error_rate': self.error_rate(),
+            'average_latency': self.average_latency(),
+            'consecutive_failures': self.consecutive_failures
+        }
+
+
+class ProviderRegistry(object):
+    """
+    Routes calls to the providers of a chain in order of health, sorted by error rate and then average latency.
+    Providers with an open circuit are skipped until their cooldown expires, unless every provider has an open
+    circuit, in which case they are all tried in their configured order.
+    """
+    def __init__(self, window_size=WINDOW_SIZE, failure_threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN,
+                 clock=time.monotonic):
+        self.window_size = window_size
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    def _get_stats(self, name):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = ProviderStats(self.window_size, self.failure_threshold, self.cooldown)
+            self.stats[name] = stats
+        return stats
+
+    def order(self, providers):
+        """
+        :param providers:
+        :return: list of providers to try, healthiest first
+        """
+        now = self.clock()
+        with self.lock:
+            available = [(index, provider) for index, provider in enumerate(providers)
+                         if self._get_stats(get_provider_name(provider)).is_available(now)]
+            if not available:
+                return list(providers)
+
+            def health(item):
+                index, provider = item
+                stats = self.stats[get_provider_name(provider)]
+                return stats.error_rate(), stats.average_latency(), index
+            return [provider for _, provider in sorted(available, key=health)]
+
+    def record(self, provider, success, latency):
+        with self.lock:
+            self._get_stats(get_provider_name(provider)).record(success, latency, self.clock())
+
+    def call(self, providers, method_name, *args):
+        """
+        Calls method_name on the healthiest provider implementing it, falling back to the next one on error
+        :param providers:
+        :param method_name:
+        :param args:
+        :return: the result of the first successful call
+        :raises: the last provider error if all of them failed
+        """
+        last_exception = None
+        for provider in self.order([provider for provider in providers if hasattr(provider, method_name)]):
+            start = self.clock()
+            try:
+                logging.debug('m=%s', provider)
+                result = getattr(provider, method_name)(*args)
+            except Exception as e:
+                logging.warning('Provider %s failed to %s: %s', get_provider_name(provider), method_name, e)
+                self.record(provider, False, self.clock() - start)
+                last_exception = e
+                continue
+            self.record(provider, True, self.clock() - start)
+            return result
+        if last_exception is None:
+            raise LookupError('No provider implements {}'.format(method_name))
+        raise last_exception
+
+    def get_stats(self):
+        """
+        :return: dict of the health stats of each provider, by provider name
+        """
+        now = self.clock()
+        with self.lock:
+            return {name: stats.to_dict(now) for name, stats in self.stats.items()}
+
+    def log_stats(self):
+        for name, stats in sorted(self.get_stats().items()):
+            logging.info('Provider %s: %s', name, stats)
+
+    def reset(self):
+        with self.lock:
+            self.stats = {}
+
+
+def get_provider_name(provider):
+    for attribute in ('base_url', 'ethereum_url', 'netcode'):
+        value = getattr(provider, attribute, None)
+        if value:
+            return '{}({})'.format(type(provider).__name__, value)
+    # without an endpoint to tell providers apart, each instance gets its own stats and circuit
+    return '{}@{:x}'.format(type(provider).__name__, id(provider))
+
+
+provider_registry = ProviderRegistry()
@@ -0,0 +1,99 @@
+"""
+Shared HTTP sessions for the blockchain connectors, so that calls to a provider reuse pooled keep-alive connections
+instead of paying a new TCP and TLS handshake each time.
+"""
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import cert_issuer.config
+
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 4
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TimeoutSession(requests.Session):
+    """
+    Session applying a default timeout to requests that do not set one
+    """
+    def __init__(self, timeout):
+        super(TimeoutSession, self).__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super(TimeoutSession, self).request(method, url, **kwargs)
+
+
+def create_session(connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                   read_timeout=DEFAULT_READ_TIMEOUT,
+                   pool_connections=DEFAULT_POOL_CONNECTIONS,
+                   pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                   retries=DEFAULT_RETRIES,
+                   backoff_factor=DEFAULT_BACKOFF_FACTOR):
+    """
+    Creates a session with keep-alive connection pools and a transport level retry policy.
+
+    Connection errors are retried for every method, while read errors and retryable statuses are only retried for
+    idempotent methods, so that a broadcast is never sent twice by the transport.
+    :param connect_timeout: seconds
+    :param read_timeout: seconds
+    :param pool_connections: number of hosts to keep connection pools for
+    :param pool_maxsize: maximum number of connections per host
+    :param retries: number of retries
+    :param backoff_factor: exponential backoff factor between retries, in seconds
+    :return: requests.Session
+    """
+    retry = Retry(total=retries,
+                  connect=retries,
+                  read=retries,
+                  status=retries,
+                  backoff_factor=backoff_factor,
+                  status_forcelist=RETRY_STATUSES,
+                  allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+                  raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=True,
+                          max_retries=retry)
+    session = TimeoutSession((connect_timeout, read_timeout))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def create_session_from_config(app_config):
+    return create_session(
+        connect_timeout=getattr(app_config, 'http_connect_timeout', None) or DEFAULT_CONNECT_TIMEOUT,
+        read_timeout=getattr(app_config, 'http_read_timeout', None) or DEFAULT_READ_TIMEOUT,
+        pool_maxsize=getattr(app_config, 'http_pool_maxsize', None) or DEFAULT_POOL_MAXSIZE,
+        retries=getattr(app_config, 'http_retries', DEFAULT_RETRIES))
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Returns the session shared by the connectors, created from the loaded config on first use
+    :return: requests.Session
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session_from_config(cert_issuer.config.CONFIG)
+        return _session
+
+
+def reset_session():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
@@ -1,22 +1,43 @@
+import hashlib
 import json
 import logging
 
-from cert_issuer import helpers
+from cert_issuer import helpers, pipeline
+from cert_issuer.digests import digest_index
 from cert_issuer.proof_handler import ProofHandler
-from pycoin.encoding.hexbytes import b2h
 from cert_issuer.normalization_handler import JSONLDHandler
+from cert_issuer.normalization_cache import get_normalization_cache
+from cert_issuer.document_store import get_document_store
+from cert_issuer.certificate_writer import CertificateWriter
 from cert_issuer.models import CertificateHandler, BatchHandler
+from cert_issuer.models.batch_validator import BatchCredentialValidator
 
 from cert_issuer.signer import FinalizableSigner
 
 
+def get_normalization_workers(app_config):
+    return getattr(app_config, 'normalization_workers', 1) or 1
+
+
 class CertificateV3Handler(CertificateHandler):
     def __init__(self, app_config):
         self.app_config = app_config
+        self.normalization_cache = None
+        self.document_store = get_document_store(app_config)
+        self.certificate_writer = CertificateWriter(getattr(app_config, 'writer_threads', 1) or 1)
+
+    def start_batch(self):
+        self.document_store.clear()
 
     def get_byte_array_to_issue(self, certificate_metadata):
         certificate_json = self._get_certificate_to_issue(certificate_metadata)
-        return JSONLDHandler.normalize_to_utf8(certificate_json)
+        return JSONLDHandler.normalize_to_utf8(certificate_json, self._get_normalization_cache())
+
+    def get_byte_arrays_to_issue(self, certificates_metadata):
+        certificates_json = (self._get_certificate_to_issue(metadata) for metadata in certificates_metadata)
+        return JSONLDHandler.normalize_batch_to_utf8(certificates_json,
+                                                     get_normalization_workers(self.app_config),
+                                                     self._get_normalization_cache())
 
     def add_proof(self, certificate_metadata, merkle_proof_value):
         """
@@ -25,15 +46,21 @@ class CertificateV3Handler(CertificateHandler):
         :return:
         """
         certificate_json = self._get_certificate_to_issue(certificate_metadata)
+        # the proof is added to the stored document, which must not be reused afterwards
+        self.document_store.release(certificate_metadata.unsigned_cert_file_name)
         certificate_json = ProofHandler().add_merkle_proof_2019(certificate_json, merkle_proof_value, self.app_config)
+        self.certificate_writer.write(certificate_metadata.blockchain_cert_file_name, json.dumps(certificate_json))
 
-        with open(certificate_metadata.blockchain_cert_file_name, 'w') as out_file:
-            out_file.write(json.dumps(certificate_json))
+    def flush(self):
+        self.certificate_writer.flush()
 
     def _get_certificate_to_issue(self, certificate_metadata):
-        with open(certificate_metadata.unsigned_cert_file_name, 'r') as unsigned_cert_file:
-            certificate_json = json.load(unsigned_cert_file)
-        return certificate_json
+        return self.document_store.get(certificate_metadata.unsigned_cert_file_name)
+
+    def _get_normalization_cache(self):
+        if self.normalization_cache is None:
+            self.normalization_cache = get_normalization_cache(self.app_config)
+        return self.normalization_cache
 
 class CertificateWebV3Handler(CertificateHandler):
     def __init__(self, app_config):
@@ -42,11 +69,19 @@ class CertificateWebV3Handler(CertificateHandler):
     def get_byte_array_to_issue(self, certificate_json):
         return JSONLDHandler.normalize_to_utf8(certificate_json)
 
+    def get_byte_arrays_to_issue(self, certificates_json):
+        return JSONLDHandler.normalize_batch_to_utf8(certificates_json, get_normalization_workers(self.app_config))
+
     def add_proof(self, certificate_json, merkle_proof_value):
         certificate_json = ProofHandler().add_merkle_proof_2019(certificate_json, merkle_proof_value, self.app_config)
         return certificate_json
 
 class CertificateBatchWebHandler(BatchHandler):
+    def set_certificates_in_batch(self, certificates_to_issue):
+        super().set_certificates_in_batch(certificates_to_issue)
+        # resources that failed to resolve for a previous batch are tried again
+        digest_index.clear_failures()
+
     def finish_batch(self, tx_id, chain):
         self.proof = []
         proof_generator = self.merkle_tree.get_proof_generator(tx_id, chain)
@@ -60,8 +95,7 @@ class CertificateBatchWebHandler(BatchHandler):
         :return:
         """
 
-        for cert in self.certificates_to_issue:
-            data_to_issue = self.certificate_handler.get_byte_array_to_issue(cert)
+        for data_to_issue in self.certificate_handler.get_byte_arrays_to_issue(self.certificates_to_issue):
             yield data_to_issue
 
     def prepare_batch(self):
@@ -70,11 +104,12 @@ class CertificateBatchWebHandler(BatchHandler):
         :return: byte array to put on the blockchain
         """
 
-        for cert in self.certificates_to_issue:
-            self.certificate_handler.validate_certificate(cert)
+        validator = BatchCredentialValidator(self.certificate_handler)
+        validator.validate(enumerate(self.certificates_to_issue))
+        validator.raise_for_errors()
 
         self.merkle_tree.populate(self.get_certificate_generator())
-        logging.info('here is the op_return_code data: %s', b2h(self.merkle_tree.get_blockchain_data()))
+        logging.info('here is the op_return_code data: %s', helpers.hexlify(self.merkle_tree.get_blockchain_data()))
         return self.merkle_tree.get_blockchain_data()
 
 
@@ -87,6 +122,12 @@ class CertificateBatchHandler(BatchHandler):
     def pre_batch_actions(self, config):
         self._process_directories(config)
 
+    def set_certificates_in_batch(self, certificates_to_issue):
+        super().set_certificates_in_batch(certificates_to_issue)
+        self.merkle_tree.reset()
+        self.certificate_handler.start_batch()
+        digest_index.clear_failures()
+
     def post_batch_actions(self, config):
         helpers.copy_output(self.certificates_to_issue)
         logging.info('Your Blockchain Certificates are in %s', config.blockchain_certificates_dir)
@@ -97,34 +138,60 @@ class CertificateBatchHandler(BatchHandler):
         :return: byte array to put on the blockchain
         """
 
-        # validate batch
-        for _, metadata in self.certificates_to_issue.items():
-            certificate_json = self.certificate_handler._get_certificate_to_issue(metadata)
-            self.certificate_handler.validate_certificate(certificate_json)
+        # validate, normalize and hash the batch as a pipeline, stopping at the first invalid certificate.
+        # Certificates are only signed once they are all valid, which keeps signing after the last network access.
+        data_to_issue = self.get_certificate_generator()
+        if get_normalization_workers(getattr(self.certificate_handler, 'app_config', None)) <= 1:
+            # normalization worker processes are forked by the thread running this stage. It stays on this thread,
+            # which only forks once validation is done, so that no other thread holds a lock at fork time
+            data_to_issue = pipeline.run_in_background(data_to_issue)
+        digests = [hashlib.sha256(data).digest() for data in data_to_issue]
+        self.merkle_tree.populate_digests(digests)
 
         # sign batch
         with FinalizableSigner(self.secret_manager) as signer:
             for _, metadata in self.certificates_to_issue.items():
                 self.certificate_handler.sign_certificate(signer, metadata)
 
-        self.merkle_tree.populate(self.get_certificate_generator())
-        logging.info('here is the op_return_code data: %s', b2h(self.merkle_tree.get_blockchain_data()))
+        logging.info('here is the op_return_code data: %s', helpers.hexlify(self.merkle_tree.get_blockchain_data()))
         return self.merkle_tree.get_blockchain_data()
 
+    def get_validated_certificates(self):
+        """
+        Returns a generator of the metadata of the certificates in the batch, validating each of them before it is
+        yielded. Validation stops at the first invalid certificate, unless report_all_invalid_certificates is set: the
+        remaining certificates are then still validated but no longer yielded. An InvalidCertificatesError listing
+        the invalid certificates found is raised at the end
+        :return:
+        """
+        report_all = getattr(self.config, 'report_all_invalid_certificates', False)
+        validator = BatchCredentialValidator(self.certificate_handler)
+        for uid, metadata in self.certificates_to_issue.items():
+            certificate_json = self.certificate_handler._get_certificate_to_issue(metadata)
+            if validator.check(uid, certificate_json):
+                if not validator.reports:
+                    yield metadata
+            elif not report_all:
+                break
+        validator.raise_for_errors()
+
     def get_certificate_generator(self):
         """
         Returns a generator (1-time iterator) of certificates in the batch
         :return:
         """
-        for uid, metadata in self.certificates_to_issue.items():
-            data_to_issue = self.certificate_handler.get_byte_array_to_issue(metadata)
+        certificates_metadata = pipeline.run_in_background(self.get_validated_certificates())
+        for data_to_issue in self.certificate_handler.get_byte_arrays_to_issue(certificates_metadata):
             yield data_to_issue
 
     def finish_batch(self, tx_id, chain):
         proof_generator = self.merkle_tree.get_proof_generator(tx_id, chain)
-        for _, metadata in self.certificates_to_issue.items():
-            proof_value = next(proof_generator)
-            self.certificate_handler.add_proof(metadata, proof_value)
+        try:
+            for _, metadata in self.certificates_to_issue.items():
+                proof_value = next(proof_generator)
+                self.certificate_handler.add_proof(metadata, proof_value)
+        finally:
+            self.certificate_handler.flush()
 
     def _process_directories(self, config):
         unsigned_certs_dir = config.unsigned_certificates_dir
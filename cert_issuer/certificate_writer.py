@@ -0,0 +1,126 @@
+import logging
+import os
+import queue
+import tempfile
+import threading
+
+QUEUE_SIZE_PER_WRITER = 64
+MAX_GROUP_SIZE = 64
+
+_STOP = object()
+
+
+class CertificateWriter(object):
+    """
+    Writes certificates to disk from a pool of writer threads fed by a bounded queue, so that producing certificates
+    never holds more than a fixed number of them in memory.
+
+    Each file is written to a temporary file, fsynced and atomically renamed to its destination. Writers drain the
+    queue in groups and fsync each destination directory once per group rather than once per file.
+    """
+    def __init__(self, writers=1):
+        self.writers = max(1, writers)
+        self.queue = None
+        self.threads = []
+        self.errors = []
+
+    def write(self, file_name, content):
+        if self.queue is None:
+            self._start()
+        if self.errors:
+            self._raise_error()
+        self.queue.put((file_name, content))
+
+    def flush(self):
+        """
+        Waits for all pending writes to complete, and raises the first write error if any occurred
+        :return:
+        """
+        if self.queue is None:
+            return
+        for _ in self.threads:
+            self.queue.put(_STOP)
+        for thread in self.threads:
+            thread.join()
+        self.queue = None
+        self.threads = []
+        if self.errors:
+            self._raise_error()
+
+    def _start(self):
+        self.errors = []
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE_PER_WRITER * self.writers)
+        self.threads = [threading.Thread(target=self._run, args=(self.queue,), daemon=True)
+                        for _ in range(self.writers)]
+        for thread in self.threads:
+            thread.start()
+
+    def _run(self, write_queue):
+        stopped = False
+        while not stopped:
+            group = []
+            item = write_queue.get()
+            while True:
+                # each writer consumes exactly one stop marker
+                if item is _STOP:
+                    stopped = True
+                    break
+                group.append(item)
+                if len(group) >= MAX_GROUP_SIZE:
+                    break
+                try:
+                    item = write_queue.get_nowait()
+                except queue.Empty:
+                    break
+            # after an error, keep draining the queue so producers are never blocked
+            if group and not self.errors:
+                try:
+                    write_group(group)
+                except Exception as e:
+                    logging.error('Failed to write certificates: %s', e)
+                    self.errors.append(e)
+
+    def _raise_error(self):
+        errors, self.errors = self.errors, []
+        raise errors[0]
+
+
+def write_group(group):
+    """
+    Atomically writes a group of (file_name, content) pairs
+    :param group:
+    :return:
+    """
+    renames = []
+    try:
+        for file_name, content in group:
+            directory = os.path.dirname(file_name) or '.'
+            fd, tmp_file_name = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            renames.append((tmp_file_name, file_name))
+            with os.fdopen(fd, 'w') as tmp_file:
+                tmp_file.write(content)
+                tmp_file.flush()
+                os.fsync(tmp_file.fileno())
+        for tmp_file_name, file_name in renames:
+            os.replace(tmp_file_name, file_name)
+    except Exception:
+        for tmp_file_name, _ in renames:
+            if os.path.exists(tmp_file_name):
+                os.remove(tmp_file_name)
+        raise
+
+    for directory in set(os.path.dirname(file_name) or '.' for _, file_name in renames):
+        fsync_directory(directory)
+
+
+def fsync_directory(directory):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -1,7 +1,6 @@
 import logging
 import os
 
-import bitcoin
 import configargparse
 from cert_core import BlockchainType, Chain, chain_to_bitcoin_network, UnknownChainError
 
@@ -31,6 +30,20 @@ def configure_logger():
         logger.addHandler(handler)
 
 
+def configure_proof_debug_sink(path_to_file):
+    """
+    Writes every generated merkle proof as a json line to path_to_file, instead of the application logs
+    :param path_to_file:
+    :return:
+    """
+    logger = logging.getLogger('cert_issuer.proofs')
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    handler = logging.FileHandler(path_to_file)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+
+
 # restructured arguments to put the chain specific arguments together.
 def add_arguments(p):
     p.add('-c', '--my-config', required=False, env_var='CONFIG_FILE',
@@ -47,7 +60,7 @@ def add_arguments(p):
     p.add_argument('--blockchain_certificates_dir', default=os.path.join(DATA_PATH, 'blockchain_certificates'),
                    help='Default path to data directory storing blockchain certs', env_var='BLOCKCHAIN_CERTIFICATES_DIR')
     p.add_argument('--work_dir', default=WORK_PATH,
-                   help='Default path to work directory, storing intermediate outputs. This gets deleted in between runs.', env_var='WORK_DIR')
+                   help='Default path to work directory, storing intermediate outputs. This gets deleted in between runs, except for the normalization and schema caches.', env_var='WORK_DIR')
     p.add_argument('--max_retry', default=10, type=int, help='Maximum attempts to retry transaction on failure', env_var='MAX_RETRY')
     p.add_argument('--chain', default='bitcoin_regtest',
                    help=('Which chain to use. Default is bitcoin_regtest (which is how the docker container is configured). Other options are '
@@ -57,6 +70,29 @@ def add_arguments(p):
                    help='Used to make sure your private key is not plugged in with the wifi.', env_var='SAFE_MODE')
     p.add_argument('--no_safe_mode', dest='safe_mode', default=False, action='store_false',
                    help='Turns off safe mode. Only change this option for testing or unit testing.', env_var='NO_SAFE_MODE')
+    p.add_argument('--connectivity_probe_urls', default=None, type=str, nargs='+',
+                   help='Urls probed by safe mode to tell whether the machine is online. Space separated list, ' +
+                        'the machine is online when any of them answers. Defaults to http://google.com.',
+                   env_var='CONNECTIVITY_PROBE_URLS')
+    p.add_argument('--connectivity_probe_timeout', default=3, type=float,
+                   help='Seconds to wait for a safe mode connectivity probe to answer.',
+                   env_var='CONNECTIVITY_PROBE_TIMEOUT')
+    p.add_argument('--key_poll_interval', default=0.25, type=float,
+                   help='Seconds between checks of the key file while safe mode waits for the USB to be plugged ' +
+                        'in or out.', env_var='KEY_POLL_INTERVAL')
+    p.add_argument('--remote_signer_url', default=None, type=str,
+                   help='Sign with the signing service at this url instead of a local key file, for instance a ' +
+                        'reference signer started with `python -m cert_issuer.remote_signer`.',
+                   env_var='REMOTE_SIGNER_URL')
+    p.add_argument('--remote_signer_token', default=None, type=str,
+                   help='Bearer token shared by the issuer and the signing service.', env_var='REMOTE_SIGNER_TOKEN')
+    p.add_argument('--remote_signer_timeout', default=30, type=float,
+                   help='Seconds to wait for the signing service to answer.', env_var='REMOTE_SIGNER_TIMEOUT')
+    p.add_argument('--signer_host', default='127.0.0.1', type=str,
+                   help='Address the reference signing service listens on. Addresses other than loopback ' +
+                        'require remote_signer_token.', env_var='SIGNER_HOST')
+    p.add_argument('--signer_port', default=8765, type=int,
+                   help='Port the reference signing service listens on.', env_var='SIGNER_PORT')
     # bitcoin arguments
     p.add_argument('--dust_threshold', default=0.0000275, type=float,
                    help='blockchain dust threshold (in BTC) -- below this 1/3 is fees.', env_var='DUST_THRESHOLD')
@@ -96,6 +132,28 @@ def add_arguments(p):
     p.add_argument('--blockcypher_api_token', default=None, type=str,
                    help='the API token of the blockcypher broadcaster', env_var='BLOCKCYPHER_API_TOKEN')
 
+    p.add_argument('--http_connect_timeout', default=5, type=float,
+                   help='Timeout in seconds to connect to the blockchain APIs.', env_var='HTTP_CONNECT_TIMEOUT')
+    p.add_argument('--http_read_timeout', default=30, type=float,
+                   help='Timeout in seconds to read a response from the blockchain APIs.', env_var='HTTP_READ_TIMEOUT')
+    p.add_argument('--http_pool_maxsize', default=4, type=int,
+                   help='Maximum number of keep-alive connections kept open to each blockchain API host.',
+                   env_var='HTTP_POOL_MAXSIZE')
+    p.add_argument('--http_retries', default=2, type=int,
+                   help='Number of transport level retries of failed connections to the blockchain APIs. Broadcasts ' +
+                        'are only retried when the connection could not be established.',
+                   env_var='HTTP_RETRIES')
+    p.add_argument('--daemon', dest='daemon', default=False, action='store_true',
+                   help='Keep running and issue the batches dropped in spool_dir, one subdirectory per batch.',
+                   env_var='DAEMON')
+    p.add_argument('--spool_dir', default=os.path.join(DATA_PATH, 'spool'),
+                   help='Directory watched for batches to issue in daemon mode.', env_var='SPOOL_DIR')
+    p.add_argument('--spool_poll_interval', default=2.0, type=float,
+                   help='Seconds to wait between scans of an empty spool directory in daemon mode.',
+                   env_var='SPOOL_POLL_INTERVAL')
+    p.add_argument('--profile_import', '--profile-import', dest='profile_import', default=False, action='store_true',
+                   help='Report the time spent importing each module when the run ends.', env_var='PROFILE_IMPORT')
+
     p.add_argument('--context_urls',
                    default=None,
                    type=str,
@@ -115,6 +173,23 @@ def add_arguments(p):
                    env_var='CONTEXT_FILE_PATHS',
                    nargs='+'
                    )
+    p.add_argument('--credential_schema_urls',
+                   default=None,
+                   type=str,
+                   help='Resolve these credentialSchema urls from local files instead of fetching them. ' +
+                        'Space separated list, must be used in conjunction with the `--credential_schema_file_paths` property.',
+                   env_var='CREDENTIAL_SCHEMA_URLS',
+                   nargs='+'
+                   )
+    p.add_argument('--credential_schema_file_paths',
+                   default=None,
+                   type=str,
+                   help='Local files of the schemas listed in `--credential_schema_urls`. ' +
+                        'Space separated list, must be used in conjunction with the `--credential_schema_urls` property. ' +
+                        'Path should be relative to CWD, order should match `--credential_schema_urls` order.',
+                   env_var='CREDENTIAL_SCHEMA_FILE_PATHS',
+                   nargs='+'
+                   )
     p.add_argument('--multiple_proofs',
                    default='chained',
                    type=str,
@@ -127,6 +202,36 @@ def add_arguments(p):
                         '"concurrent": Concurrent proofs mean the parties independently sign the document without ' +
                         'the other parties\' signatures. Defaults to chained proofs.'
     )
+    p.add_argument('--normalization_workers',
+                   default=1,
+                   type=int,
+                   help='Number of worker processes used to normalize the certificates of a batch. \n' +
+                        'Defaults to 1, which normalizes the certificates serially in the issuing process.',
+                   env_var='NORMALIZATION_WORKERS'
+                   )
+    p.add_argument('--normalization_cache', dest='normalization_cache', default=True, action='store_true',
+                   help='Default; reuse normalized certificates cached under work_dir when re-issuing the same certificates.',
+                   env_var='NORMALIZATION_CACHE')
+    p.add_argument('--no_normalization_cache', dest='normalization_cache', default=False, action='store_false',
+                   help='Bypass the normalization cache and normalize every certificate.',
+                   env_var='NO_NORMALIZATION_CACHE')
+    p.add_argument('--normalization_cache_max_size', default=256, type=int,
+                   help='Maximum size of the normalization cache, in megabytes. Least recently used entries are evicted first.',
+                   env_var='NORMALIZATION_CACHE_MAX_SIZE')
+    p.add_argument('--report_all_invalid_certificates', default=False, action='store_true',
+                   help='Validate the whole batch and report every invalid certificate, instead of stopping at the ' +
+                        'first one.',
+                   env_var='REPORT_ALL_INVALID_CERTIFICATES')
+    p.add_argument('--max_documents_in_memory', default=0, type=int,
+                   help='Maximum number of parsed certificates kept in memory during a batch. Past this number, parsed ' +
+                        'certificates are spilled to work_dir. Defaults to 0, which keeps the whole batch in memory.',
+                   env_var='MAX_DOCUMENTS_IN_MEMORY')
+    p.add_argument('--writer_threads', default=1, type=int,
+                   help='Number of threads writing the blockchain certificates to disk.',
+                   env_var='WRITER_THREADS')
+    p.add_argument('--proof_debug_file', default=None, type=str,
+                   help='Debug option; write the json of every generated merkle proof to this file, one per line.',
+                   env_var='PROOF_DEBUG_FILE')
     p.add_argument('--issuance_timezone',
                    default='UTC',
                    type=str,
@@ -165,10 +270,14 @@ def get_config(path_to_config=os.path.join(PATH, 'conf.ini')):
 
     logging.info('This run will try to issue on the %s chain', parsed_config.chain.name)
 
+    if parsed_config.proof_debug_file:
+        configure_proof_debug_sink(parsed_config.proof_debug_file)
+
     if parsed_config.chain.blockchain_type == BlockchainType.bitcoin:
         bitcoin_chain_for_python_bitcoinlib = parsed_config.chain
         if parsed_config.chain == Chain.bitcoin_regtest:
             bitcoin_chain_for_python_bitcoinlib = Chain.bitcoin_regtest
+        import bitcoin
         bitcoin.SelectParams(chain_to_bitcoin_network(bitcoin_chain_for_python_bitcoinlib))
 
     CONFIG = parsed_config
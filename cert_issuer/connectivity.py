@@ -0,0 +1,130 @@
+"""
+Safe mode gate, holding the signer until the machine is offline with the key plugged in, and releasing it once the
+machine is back online with the key unplugged.
+
+The key file is watched with a short interval poll, and connectivity is only probed once the key file is in the
+expected state, so the gate reacts within a poll interval instead of sleeping for a fixed time.
+"""
+import logging
+import os
+import threading
+import time
+
+import requests
+
+DEFAULT_PROBE_URLS = ('http://google.com',)
+DEFAULT_PROBE_TIMEOUT = 3
+DEFAULT_KEY_POLL_INTERVAL = 0.25
+DEFAULT_PROBE_INTERVAL = 2
+
+OFFLINE = 'offline'
+ONLINE = 'online'
+
+
+class HttpProbe(object):
+    """
+    Considers the machine online when any of the probe urls answers within the timeout
+    """
+    def __init__(self, urls=DEFAULT_PROBE_URLS, timeout=DEFAULT_PROBE_TIMEOUT):
+        self.urls = list(urls)
+        self.timeout = timeout
+
+    def is_online(self):
+        for url in self.urls:
+            try:
+                requests.head(url, timeout=self.timeout, allow_redirects=False)
+                return True
+            except requests.exceptions.RequestException:
+                logging.debug('Connectivity probe %s is unreachable', url)
+        return False
+
+
+class GateMetrics(object):
+    """
+    Time the gate blocked the signer, by direction
+    """
+    def __init__(self):
+        self.blocked = {OFFLINE: [], ONLINE: []}
+        self.lock = threading.Lock()
+
+    def record(self, direction, seconds):
+        with self.lock:
+            self.blocked[direction].append(seconds)
+
+    def to_dict(self):
+        with self.lock:
+            return {direction: {'count': len(durations),
+                                'total': sum(durations),
+                                'max': max(durations) if durations else 0.0,
+                                'last': durations[-1] if durations else 0.0}
+                    for direction, durations in self.blocked.items()}
+
+
+class ConnectivityGate(object):
+    def __init__(self, probe=None, key_poll_interval=DEFAULT_KEY_POLL_INTERVAL, probe_interval=DEFAULT_PROBE_INTERVAL,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.probe = probe or HttpProbe()
+        self.key_poll_interval = key_poll_interval
+        self.probe_interval = probe_interval
+        self.clock = clock
+        self.sleep = sleep
+        self.metrics = GateMetrics()
+
+    def wait_until_offline(self, secrets_file_path):
+        """
+        Blocks until the internet is off and the key file is present
+        :param secrets_file_path:
+        :return: seconds blocked
+        """
+        return self._wait(secrets_file_path, True, False, OFFLINE,
+                          'Turn off your internet and plug in your USB to continue...')
+
+    def wait_until_online(self, secrets_file_path):
+        """
+        Blocks until the internet is on and the key file is removed
+        :param secrets_file_path:
+        :return: seconds blocked
+        """
+        return self._wait(secrets_file_path, False, True, ONLINE,
+                          'Turn on your internet and unplug your USB to continue...')
+
+    def _wait(self, secrets_file_path, key_present, online, direction, message):
+        start = self.clock()
+        prompted = False
+        while True:
+            if os.path.exists(secrets_file_path) == key_present:
+                if self.probe.is_online() == online:
+                    break
+                timeout = self.probe_interval
+            else:
+                timeout = None
+            if not prompted:
+                print(message)
+                prompted = True
+            self._wait_for_key_file(secrets_file_path, key_present, timeout)
+
+        blocked = self.clock() - start
+        self.metrics.record(direction, blocked)
+        logging.info('Safe mode gate waited %.2f seconds for the machine to be %s', blocked, direction)
+        return blocked
+
+    def _wait_for_key_file(self, secrets_file_path, key_present, timeout):
+        """
+        Polls the key file until it is in the expected state, or until timeout seconds have passed if it already is
+        """
+        deadline = None if timeout is None else self.clock() + timeout
+        while True:
+            self.sleep(self.key_poll_interval)
+            if deadline is not None:
+                if self.clock() >= deadline:
+                    return
+            elif os.path.exists(secrets_file_path) == key_present:
+                return
+
+
+def create_connectivity_gate(app_config):
+    probe_urls = getattr(app_config, 'connectivity_probe_urls', None) or DEFAULT_PROBE_URLS
+    probe_timeout = getattr(app_config, 'connectivity_probe_timeout', None) or DEFAULT_PROBE_TIMEOUT
+    return ConnectivityGate(
+        probe=HttpProbe(probe_urls, probe_timeout),
+        key_poll_interval=getattr(app_config, 'key_poll_interval', None) or DEFAULT_KEY_POLL_INTERVAL)
@@ -0,0 +1,104 @@
+"""
+Long-running issuer processing batches dropped in a spool directory back to back, keeping the blockchain handlers,
+HTTP connection pools, compiled validators and loaded contexts warm between batches.
+
+Each batch is a subdirectory of the spool directory holding the unsigned certificates. To avoid picking up a
+partially written batch, write it to a temporary directory on the same filesystem and rename it into the spool
+directory. Batches are processed in the order they arrived. A processed batch is moved to the done subdirectory, or to
+the failed subdirectory when it could not be issued.
+"""
+import copy
+import logging
+import os
+import shutil
+import threading
+
+from cert_issuer.issue_certificates import issue
+
+DONE_DIR = 'done'
+FAILED_DIR = 'failed'
+DEFAULT_POLL_INTERVAL = 2.0
+
+
+class IssuanceDaemon(object):
+    def __init__(self, app_config, certificate_batch_handler, transaction_handler, spool_dir,
+                 poll_interval=DEFAULT_POLL_INTERVAL):
+        self.app_config = app_config
+        self.certificate_batch_handler = certificate_batch_handler
+        self.transaction_handler = transaction_handler
+        self.spool_dir = spool_dir
+        self.poll_interval = poll_interval
+        self.stop_event = threading.Event()
+        for directory in (spool_dir, os.path.join(spool_dir, DONE_DIR), os.path.join(spool_dir, FAILED_DIR)):
+            os.makedirs(directory, exist_ok=True)
+
+    def get_pending_batches(self):
+        """
+        :return: list of the paths of the batches waiting in the spool directory, oldest first
+        """
+        batches = []
+        for name in os.listdir(self.spool_dir):
+            path = os.path.join(self.spool_dir, name)
+            if name in (DONE_DIR, FAILED_DIR) or name.startswith('.') or not os.path.isdir(path):
+                continue
+            batches.append((os.stat(path).st_mtime, name, path))
+        return [path for _, _, path in sorted(batches)]
+
+    def issue_batch(self, batch_dir):
+        """
+        Issues the certificates of batch_dir with the warm handlers, and moves the batch out of the spool directory
+        :param batch_dir:
+        :return: transaction id, or None if the batch failed
+        """
+        batch_config = copy.copy(self.app_config)
+        batch_config.unsigned_certificates_dir = batch_dir
+        tx_id = None
+        try:
+            tx_id = issue(batch_config, self.certificate_batch_handler, self.transaction_handler)
+        except Exception as e:
+            logging.error('Could not issue batch %s: %s', batch_dir, e, exc_info=True)
+        if tx_id:
+            logging.info('Issued batch %s with transaction id %s', batch_dir, tx_id)
+        self._move(batch_dir, DONE_DIR if tx_id else FAILED_DIR)
+        return tx_id
+
+    def process_pending(self):
+        """
+        Issues the batches waiting in the spool directory, one after the other
+        :return: number of batches processed
+        """
+        batches = self.get_pending_batches()
+        for batch_dir in batches:
+            if self.stop_event.is_set():
+                break
+            self.issue_batch(batch_dir)
+        return len(batches)
+
+    def run(self):
+        logging.info('Waiting for batches to issue in %s', self.spool_dir)
+        while not self.stop_event.is_set():
+            if not self.process_pending():
+                self.stop_event.wait(self.poll_interval)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _move(self, batch_dir, target):
+        name = os.path.basename(batch_dir)
+        destination = os.path.join(self.spool_dir, target, name)
+        suffix = 1
+        while os.path.exists(destination):
+            destination = os.path.join(self.spool_dir, target, '{}.{}'.format(name, suffix))
+            suffix += 1
+        shutil.move(batch_dir, destination)
+
+
+def run_daemon(app_config, certificate_batch_handler, transaction_handler):
+    daemon = IssuanceDaemon(app_config, certificate_batch_handler, transaction_handler,
+                            spool_dir=app_config.spool_dir,
+                            poll_interval=getattr(app_config, 'spool_poll_interval', None) or DEFAULT_POLL_INTERVAL)
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        logging.info('Stopping the issuance daemon')
+        daemon.stop()
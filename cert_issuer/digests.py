@@ -1,16 +1,96 @@
+import atexit
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from cert_schema import get_context_digests, preloaded_context_document_loader
 
+MAX_DIGEST_WORKERS = 8
+
+
+class DigestIndex(object):
+    """
+    Maps relatedResource ids to their digests. Each resource is resolved once per process, either to the digests
+    computed by cert_schema or to None when the resource document is not available. A resource failing to resolve
+    raises the same error until the failures are cleared, once per batch, so that it is not fetched again by the
+    verification following a prefetch. Prefetching runs on a pool of workers created on first use, and kept until the
+    index is cleared or the process exits.
+    """
+    def __init__(self):
+        self.digests = {}
+        self.failures = {}
+        self.lock = threading.Lock()
+        self.executor = None
+
+    def get_digests(self, related_resource_id):
+        with self.lock:
+            if related_resource_id in self.digests:
+                return self.digests[related_resource_id]
+            failure = self.failures.get(related_resource_id)
+        if failure is not None:
+            raise failure
+        digests = None
+        try:
+            context_document = preloaded_context_document_loader(related_resource_id)
+            if context_document is not None:
+                logging.info('Found document in cached list of contexts')
+                digests = get_context_digests(related_resource_id)
+        except Exception as e:
+            with self.lock:
+                self.failures[related_resource_id] = e
+            raise
+        with self.lock:
+            self.digests[related_resource_id] = digests
+        return digests
+
+    def prefetch(self, related_resource_ids):
+        """
+        Resolves the resources not indexed yet concurrently. Resolution errors are left to be raised when the
+        resource gets verified
+        :param related_resource_ids:
+        :return:
+        """
+        with self.lock:
+            missing = [resource_id for resource_id in set(related_resource_ids)
+                       if resource_id not in self.digests and resource_id not in self.failures]
+        if len(missing) < 2:
+            return
+        executor = self._get_executor()
+        for resource_id, future in [(resource_id, executor.submit(self.get_digests, resource_id))
+                                    for resource_id in missing]:
+            if future.exception() is not None:
+                logging.debug('Could not resolve digests of resource %s: %s', resource_id, future.exception())
+
+    def clear_failures(self):
+        with self.lock:
+            self.failures = {}
+
+    def clear(self):
+        with self.lock:
+            self.digests = {}
+            self.failures = {}
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def _get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=MAX_DIGEST_WORKERS,
+                                                   thread_name_prefix='digest-index')
+            return self.executor
+
+
+digest_index = DigestIndex()
+atexit.register(digest_index.clear)
+
 
 def validate_digest_sri(related_resource_id, target_digest):
     logging.info('Validating digest SRI for resource {}'.format(related_resource_id))
     try:
-        context_document = preloaded_context_document_loader(related_resource_id)
-        if context_document is not None:
-            logging.info('Found document in cached list of contexts')
+        file_digests = digest_index.get_digests(related_resource_id)
+        if file_digests is not None:
             hashing_algorithm = target_digest.split('-', 1)[0]
             target_digest_value = target_digest.split('-', 1)[1]
-            file_digests = get_context_digests(related_resource_id)
             local_digest_sri = file_digests['digestSRI'][hashing_algorithm]
             if local_digest_sri != target_digest_value:
                 raise ValueError('Locally computed {} digest SRI does not match '
@@ -24,10 +104,8 @@ def validate_digest_sri(related_resource_id, target_digest):
 def validate_digest_multibase(related_resource_id, target_digest):
     logging.info('Validating digest Multibase for resource {}'.format(related_resource_id))
     try:
-        context_document = preloaded_context_document_loader(related_resource_id)
-        if context_document is not None:
-            logging.info('Found document in cached list of contexts')
-            file_digests = get_context_digests(related_resource_id)
+        file_digests = digest_index.get_digests(related_resource_id)
+        if file_digests is not None:
             # temporarily assume all digest multibase are sha256, but in the future check for algorithm header
             local_digest_multibase = file_digests['digestMultibase']['sha256']
             if local_digest_multibase != target_digest:
@@ -0,0 +1,72 @@
+import json
+import logging
+import os
+import pickle
+import shutil
+
+DOCUMENT_STORE_DIR = 'document_store'
+
+
+class DocumentStore(object):
+    """
+    Batch scoped store of parsed certificates, so that each unsigned certificate file is read and parsed once per run.
+
+    When max_documents_in_memory is set, documents loaded past that count are pickled to spill_dir instead of being
+    kept in memory.
+    """
+    def __init__(self, spill_dir=None, max_documents_in_memory=None):
+        self.spill_dir = spill_dir
+        self.max_documents_in_memory = max_documents_in_memory
+        self.documents = {}
+        self.spilled = {}
+        self.spill_count = 0
+
+    def get(self, file_name):
+        if file_name in self.documents:
+            return self.documents[file_name]
+        if file_name in self.spilled:
+            with open(self.spilled[file_name], 'rb') as spill_file:
+                return pickle.load(spill_file)
+
+        with open(file_name, 'r') as document_file:
+            document = json.load(document_file)
+        if self._should_spill():
+            self._spill(file_name, document)
+        else:
+            self.documents[file_name] = document
+        return document
+
+    def release(self, file_name):
+        self.documents.pop(file_name, None)
+        spill_file_name = self.spilled.pop(file_name, None)
+        if spill_file_name is not None and os.path.exists(spill_file_name):
+            os.remove(spill_file_name)
+
+    def clear(self):
+        self.documents = {}
+        self.spilled = {}
+        self.spill_count = 0
+        if self.spill_dir is not None and os.path.isdir(self.spill_dir):
+            shutil.rmtree(self.spill_dir)
+
+    def _should_spill(self):
+        return self.spill_dir is not None and \
+            self.max_documents_in_memory and \
+            len(self.documents) >= self.max_documents_in_memory
+
+    def _spill(self, file_name, document):
+        os.makedirs(self.spill_dir, exist_ok=True)
+        spill_file_name = os.path.join(self.spill_dir, '{}.pickle'.format(self.spill_count))
+        self.spill_count += 1
+        with open(spill_file_name, 'wb') as spill_file:
+            pickle.dump(document, spill_file, protocol=pickle.HIGHEST_PROTOCOL)
+        if self.spill_count == 1:
+            logging.info('Document store is full, spilling documents to %s', self.spill_dir)
+        self.spilled[file_name] = spill_file_name
+
+
+def get_document_store(app_config):
+    max_documents_in_memory = getattr(app_config, 'max_documents_in_memory', None)
+    if not max_documents_in_memory:
+        return DocumentStore()
+    return DocumentStore(os.path.join(app_config.work_dir, DOCUMENT_STORE_DIR), max_documents_in_memory)
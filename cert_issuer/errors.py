@@ -28,6 +28,13 @@ class UnableToSignTxError(Error):
     pass
 
 
+class RemoteSignerError(Error):
+    """
+    The remote signer could not be reached, or refused to sign
+    """
+    pass
+
+
 class UnverifiedTransactionError(Error):
     """
     The transaction could not be verified
@@ -68,3 +75,21 @@ class UnrecognizedChainError(Error):
     Didn't recognize chain
     """
     pass
+
+
+class InvalidCertificatesError(Error, ValueError):
+    """
+    One or more certificates of the batch failed validation
+    """
+    def __init__(self, reports):
+        self.reports = reports
+        super(InvalidCertificatesError, self).__init__(format_validation_reports(reports))
+
+
+def format_validation_reports(reports, max_reports=10):
+    if len(reports) == 1:
+        return str(reports[0].error)
+    details = '; '.join('{}: {}'.format(report.uid, report.error) for report in reports[:max_reports])
+    if len(reports) > max_reports:
+        details += '; and {} more'.format(len(reports) - max_reports)
+    return '{} invalid certificate(s): {}'.format(len(reports), details)
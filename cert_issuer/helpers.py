@@ -1,3 +1,4 @@
+import binascii
 import collections
 import logging
 import os
@@ -5,12 +6,22 @@ import shutil
 
 import glob2
 from cert_core import Chain, UnknownChainError
-from pycoin.encoding.hexbytes import b2h, h2b
 
 from cert_issuer.errors import NoCertificatesFoundError
+from cert_issuer.normalization_cache import NORMALIZATION_CACHE_DIR
+from cert_issuer.schema_resolver import SCHEMA_CACHE_DIR
+
+
+def hexlify(the_bytes):
+    return binascii.hexlify(the_bytes).decode('utf-8')
+
+
+def unhexlify(hex_string):
+    try:
+        return binascii.unhexlify(hex_string.encode('ascii'))
+    except Exception:
+        raise ValueError('Could not unhexlify {}'.format(hex_string))
 
-unhexlify = h2b
-hexlify = b2h
 
 UNSIGNED_CERTIFICATES_DIR = 'unsigned_certificates'
 SIGNED_CERTIFICATES_DIR = 'signed_certificates'
@@ -48,10 +59,10 @@ def prepare_issuance_batch(unsigned_certs_dir, signed_certs_dir, blockchain_cert
     os.makedirs(blockchain_certs_dir, exist_ok=True)
     os.makedirs(signed_certs_dir, exist_ok=True)
 
-    # ensure previous processing state, if any, is cleaned up
+    # ensure previous processing state, if any, is cleaned up. The normalization and schema caches are kept across runs
     for item in os.listdir(work_dir):
         file_path = os.path.join(work_dir, item)
-        if os.path.isdir(file_path):
+        if os.path.isdir(file_path) and item not in (NORMALIZATION_CACHE_DIR, SCHEMA_CACHE_DIR):
             shutil.rmtree(file_path)
 
     # define work subdirs
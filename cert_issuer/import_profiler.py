@@ -0,0 +1,92 @@
+"""
+Per-module import time profiling, enabled with --profile_import or PROFILE_IMPORT, to see which dependencies a run pays for before it
+starts issuing.
+"""
+import os
+import sys
+import threading
+import time
+
+PROFILE_IMPORT_FLAGS = ('--profile_import', '--profile-import')
+PROFILE_IMPORT_ENV_VAR = 'PROFILE_IMPORT'
+DEFAULT_REPORT_SIZE = 25
+
+
+class ImportProfiler(object):
+    """
+    Meta path finder timing the execution of every module imported while it is installed. It only wraps the
+    exec_module of the loader instances found by the other finders, so module specs and loader types are unchanged.
+
+    Cumulative time includes the imports triggered by the module, self time excludes them.
+    """
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.timings = {}
+        self.local = threading.local()
+
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                loader = spec.loader
+                if loader is not None and not isinstance(loader, type) and hasattr(loader, 'exec_module'):
+                    loader.exec_module = self._timed(fullname, loader, loader.exec_module)
+                return spec
+        return None
+
+    def _timed(self, fullname, loader, exec_module):
+        def timed_exec_module(module):
+            stack = self.local.__dict__.setdefault('stack', [])
+            stack.append(0.0)
+            start = self.clock()
+            try:
+                return exec_module(module)
+            finally:
+                cumulative = self.clock() - start
+                children = stack.pop()
+                if stack:
+                    stack[-1] += cumulative
+                self.timings[fullname] = (cumulative - children, cumulative)
+                try:
+                    del loader.exec_module
+                except AttributeError:
+                    pass
+        return timed_exec_module
+
+    def get_report(self, limit=DEFAULT_REPORT_SIZE):
+        """
+        :param limit: number of modules to report
+        :return: list of (module name, self seconds, cumulative seconds), slowest cumulative first
+        """
+        report = sorted(((name, self_time, cumulative) for name, (self_time, cumulative) in self.timings.items()),
+                        key=lambda timing: timing[2], reverse=True)
+        return report[:limit]
+
+    def format_report(self, limit=DEFAULT_REPORT_SIZE):
+        lines = ['{:>12} {:>12}  module'.format('self [ms]', 'cumul [ms]')]
+        for name, self_time, cumulative in self.get_report(limit):
+            lines.append('{:12.1f} {:12.1f}  {}'.format(self_time * 1000, cumulative * 1000, name))
+        return '\n'.join(lines)
+
+
+def profile_import_requested(argv, environ=os.environ):
+    # checked before the config gets parsed, with the values configargparse accepts for a flag set in the environment
+    if environ.get(PROFILE_IMPORT_ENV_VAR, '').lower() in ('true', 'yes', '1'):
+        return True
+    return any(arg in PROFILE_IMPORT_FLAGS for arg in argv)
+
+
+def start_import_profiler():
+    profiler = ImportProfiler()
+    profiler.install()
+    return profiler
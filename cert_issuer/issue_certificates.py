@@ -2,6 +2,7 @@ import logging
 import sys
 
 from cert_issuer.issuer import Issuer
+from cert_issuer.blockchain_handlers.provider_registry import provider_registry
 
 if sys.version_info.major < 3:
     sys.stderr.write('Sorry, Python 3.x required by this script.\n')
@@ -16,21 +17,30 @@ def issue(app_config, certificate_batch_handler, transaction_handler):
     issuer = Issuer(
         certificate_batch_handler=certificate_batch_handler,
         transaction_handler=transaction_handler,
-        max_retry=app_config.max_retry)
+        max_retry=app_config.max_retry,
+        secret_manager=certificate_batch_handler.secret_manager)
     tx_id = issuer.issue(app_config.chain)
 
     certificate_batch_handler.post_batch_actions(app_config)
+    provider_registry.log_stats()
     return tx_id
 
 
-def main(app_config):
+def instantiate_blockchain_handlers(app_config):
     chain = app_config.chain
     if chain.is_ethereum_type():
         from cert_issuer.blockchain_handlers import ethereum
-        certificate_batch_handler, transaction_handler, connector = ethereum.instantiate_blockchain_handlers(app_config)
+        return ethereum.instantiate_blockchain_handlers(app_config)
     else:
         from cert_issuer.blockchain_handlers import bitcoin
-        certificate_batch_handler, transaction_handler, connector = bitcoin.instantiate_blockchain_handlers(app_config)
+        return bitcoin.instantiate_blockchain_handlers(app_config)
+
+
+def main(app_config):
+    certificate_batch_handler, transaction_handler, connector = instantiate_blockchain_handlers(app_config)
+    if getattr(app_config, 'daemon', False):
+        from cert_issuer.daemon import run_daemon
+        return run_daemon(app_config, certificate_batch_handler, transaction_handler)
     return issue(app_config, certificate_batch_handler, transaction_handler)
 
 
@@ -0,0 +1,89 @@
+import hashlib
+
+DIGEST_SIZE = 32
+HEX_DIGEST_SIZE = 2 * DIGEST_SIZE
+
+
+class MerkleTree(object):
+    """
+    sha256 Merkle tree storing its nodes as packed digests in a single bytearray, level after level from the leaves up
+    to the root.
+
+    An odd node at the end of a level is promoted unchanged to the next level, so roots and proofs are the same as the
+    ones computed by blockcerts_merkletools.
+    """
+    def __init__(self):
+        self.nodes = bytearray()
+        self.leaf_count = 0
+        self.levels = None
+
+    def add_leaf(self, digest):
+        """
+        :param digest: 32 bytes sha256 digest
+        :return:
+        """
+        if len(digest) != DIGEST_SIZE:
+            raise ValueError('Merkle tree leaves must be {} bytes digests'.format(DIGEST_SIZE))
+        if self.levels is not None:
+            self._reset_levels()
+        self.nodes += digest
+        self.leaf_count += 1
+
+    def get_leaf_count(self):
+        return self.leaf_count
+
+    def make_tree(self):
+        self._reset_levels()
+        offset, count = 0, self.leaf_count
+        levels = [(offset, count)]
+        while count > 1:
+            next_level = bytearray()
+            with memoryview(self.nodes) as nodes:
+                level = nodes[offset * DIGEST_SIZE:(offset + count) * DIGEST_SIZE]
+                for start in range(0, (count - 1) * DIGEST_SIZE, 2 * DIGEST_SIZE):
+                    next_level += hashlib.sha256(level[start:start + 2 * DIGEST_SIZE]).digest()
+                if count % 2 == 1:
+                    next_level += level[(count - 1) * DIGEST_SIZE:]
+                level.release()
+            self.nodes += next_level
+            offset, count = offset + count, len(next_level) // DIGEST_SIZE
+            levels.append((offset, count))
+        self.levels = levels
+
+    def get_merkle_root(self):
+        """
+        :return: hex string of the root, or None if the tree is empty or not built
+        """
+        if self.levels is None or self.leaf_count == 0:
+            return None
+        offset, _ = self.levels[-1]
+        return self.nodes[offset * DIGEST_SIZE:(offset + 1) * DIGEST_SIZE].hex()
+
+    def get_proofs(self):
+        """
+        Returns a generator of (target_hash, path) for each leaf, in insertion order. Every node is hex encoded once
+        for the whole tree, and paths share the resulting strings.
+        :return:
+        """
+        if self.levels is None:
+            raise ValueError('Merkle tree must be built before extracting proofs')
+        hex_nodes = self.nodes.hex()
+        node_hashes = [hex_nodes[start:start + HEX_DIGEST_SIZE] for start in range(0, len(hex_nodes), HEX_DIGEST_SIZE)]
+        for leaf_index in range(self.leaf_count):
+            index = leaf_index
+            path = []
+            for offset, count in self.levels[:-1]:
+                if index == count - 1 and count % 2 == 1:
+                    # odd end node, promoted to the next level without sibling
+                    index //= 2
+                    continue
+                if index % 2 == 1:
+                    path.append({'left': node_hashes[offset + index - 1]})
+                else:
+                    path.append({'right': node_hashes[offset + index + 1]})
+                index //= 2
+            yield node_hashes[leaf_index], path
+
+    def _reset_levels(self):
+        del self.nodes[self.leaf_count * DIGEST_SIZE:]
+        self.levels = None
@@ -1,17 +1,15 @@
 import hashlib
+import json
 import logging
 from datetime import datetime
 
 from cert_core import Chain
-from blockcerts_merkletools import MerkleTools
-from pycoin.encoding.hexbytes import h2b
-from lds_merkle_proof_2019.merkle_proof_2019 import MerkleProof2019
 from cert_issuer import helpers
+from cert_issuer.merkle_tree import MerkleTree
+from cert_issuer.proof_suites.merkle_proof_2019 import MerkleProof2019BatchEncoder
 
-
-def hash_byte_array(data):
-    hashed = hashlib.sha256(data).hexdigest()
-    return hashed
+PROOF_LOGGER_NAME = 'cert_issuer.proofs'
+proof_logger = logging.getLogger(PROOF_LOGGER_NAME)
 
 
 def ensure_string(value):
@@ -22,18 +20,33 @@ def ensure_string(value):
 
 class MerkleTreeGenerator(object):
     def __init__(self):
-        self.tree = MerkleTools(hash_type='sha256')
+        self.tree = MerkleTree()
+
+    def reset(self):
+        """
+        Empties the tree, so that the generator can be reused for the next batch
+        :return:
+        """
+        self.tree = MerkleTree()
 
     def populate(self, node_generator):
         """
         Populate Merkle Tree with data from node_generator. This requires that node_generator yield byte[] elements.
-        Hashes, computes hex digest, and adds it to the Merkle Tree
+        Hashes, and adds the digest to the Merkle Tree
         :param node_generator:
         :return:
         """
         for data in node_generator:
-            hashed = hash_byte_array(data)
-            self.tree.add_leaf(hashed)
+            self.tree.add_leaf(hashlib.sha256(data).digest())
+
+    def populate_digests(self, digests):
+        """
+        Populate Merkle Tree with the sha256 digests of its leaves, in order
+        :param digests: iterable of 32 bytes digests
+        :return:
+        """
+        for digest in digests:
+            self.tree.add_leaf(digest)
 
     def get_blockchain_data(self):
         """
@@ -42,7 +55,7 @@ class MerkleTreeGenerator(object):
         """
         self.tree.make_tree()
         merkle_root = self.tree.get_merkle_root()
-        return h2b(ensure_string(merkle_root))
+        return helpers.unhexlify(ensure_string(merkle_root))
 
     def get_proof_generator(self, tx_id, chain=Chain.bitcoin_mainnet):
         """
@@ -51,31 +64,25 @@ class MerkleTreeGenerator(object):
         :param tx_id: blockchain transaction id
         :return:
         """
-        root = ensure_string(self.tree.get_merkle_root())
-        node_count = len(self.tree.leaves)
-        for index in range(0, node_count):
-            proof = self.tree.get_proof(index)
-            proof2 = []
-
-            for p in proof:
-                dict2 = dict()
-                for key, value in p.items():
-                    dict2[key] = ensure_string(value)
-                proof2.append(dict2)
-            target_hash = ensure_string(self.tree.get_leaf(index))
-            mp2019 = MerkleProof2019()
-            merkle_json = {
-                  "path": proof2,
-                  "merkleRoot": root,
-                  "targetHash": target_hash,
-                  "anchors": [
-                    helpers.tx_to_blink(chain, tx_id)
-                  ]
-                }
-            logging.info('merkle_json: %s', str(merkle_json))
+        root = self.tree.get_merkle_root()
+        anchor = helpers.tx_to_blink(chain, tx_id)
+        logging.info('Generating %d merkle proofs for merkle root %s anchored to %s',
+                     self.tree.get_leaf_count(), root, anchor)
+        log_proofs = proof_logger.isEnabledFor(logging.DEBUG)
+        encoder = MerkleProof2019BatchEncoder(root, [anchor])
+        for target_hash, path in self.tree.get_proofs():
+            if log_proofs:
+                merkle_json = {
+                      "path": path,
+                      "merkleRoot": root,
+                      "targetHash": target_hash,
+                      "anchors": [
+                        anchor
+                      ]
+                    }
+                proof_logger.debug(json.dumps(merkle_json))
 
-            proof_value = mp2019.encode(merkle_json)
-            yield proof_value
+            yield encoder.encode(path, target_hash)
 
 
 def to_source_id(txid, chain):
@@ -40,6 +40,13 @@ class CertificateHandler(object):
 
         pass
 
+    def start_batch(self):
+        """
+        Called when a new batch of certificates is set, before any of them gets processed
+        :return:
+        """
+        pass
+
     @abstractmethod
     def sign_certificate(self, signer, certificate_metadata):
         pass
@@ -48,10 +55,26 @@ class CertificateHandler(object):
     def get_byte_array_to_issue(self, certificate_metadata):
         pass
 
+    def get_byte_arrays_to_issue(self, certificates_metadata):
+        """
+        Returns a generator of byte arrays to issue, in the order of certificates_metadata
+        :param certificates_metadata:
+        :return:
+        """
+        for certificate_metadata in certificates_metadata:
+            yield self.get_byte_array_to_issue(certificate_metadata)
+
     @abstractmethod
     def add_proof(self, certificate_metadata, merkle_proof):
         pass
 
+    def flush(self):
+        """
+        Waits for the certificates passed to add_proof to be written
+        :return:
+        """
+        pass
+
 
 class ServiceProviderConnector(object):
     @abstractmethod
@@ -62,13 +85,37 @@ class ServiceProviderConnector(object):
         pass
 
 
+class MockServiceProviderConnector(ServiceProviderConnector):
+    def get_balance(self, address):
+        pass
+
+    def broadcast_tx(self, tx):
+        pass
+
+
 class Signer(object):
     """
     Abstraction for a component that can sign.
     """
 
     def __init__(self):
-        pass
+        self.keys = {}
+
+    def get_key(self, wif, name, parse):
+        """
+        Returns the key material parsed from wif, cached until the secret manager stops and calls clear_keys
+        :param wif: private key, as read by the secret manager
+        :param name: name of the key material
+        :param parse: function parsing wif into the key material
+        :return:
+        """
+        cache_key = (name, wif)
+        if cache_key not in self.keys:
+            self.keys[cache_key] = parse(wif)
+        return self.keys[cache_key]
+
+    def clear_keys(self):
+        self.keys = {}
 
     @abstractmethod
     def sign_message(self, wif, message_to_sign):
@@ -92,6 +139,12 @@ class SecretManager(object):
     def stop(self):
         pass
 
+    def supports_batch_session(self):
+        """
+        :return: whether the key can stay unlocked for a whole batch, across the network calls between signatures
+        """
+        return False
+
     def sign_message(self, message_to_sign):
         return self.signer.sign_message(self.wif, message_to_sign)
 
@@ -0,0 +1,54 @@
+import logging
+
+from jsonschema.exceptions import ValidationError
+
+from cert_issuer.errors import InvalidCertificatesError
+
+# errors raised by the certificate handlers for invalid certificates, anything else is left to propagate
+VALIDATION_ERRORS = (ValueError, ValidationError)
+
+
+class ValidationReport(object):
+    def __init__(self, uid, error):
+        self.uid = uid
+        self.error = error
+
+    def __repr__(self):
+        return 'ValidationReport({!r}, {!r})'.format(self.uid, self.error)
+
+
+class BatchCredentialValidator(object):
+    """
+    Validates the certificates of a batch with the certificate handler, recording an error report for each invalid
+    certificate instead of stopping at the first one.
+    """
+    def __init__(self, certificate_handler):
+        self.certificate_handler = certificate_handler
+        self.reports = []
+
+    def check(self, uid, certificate_json):
+        """
+        :param uid: identifier of the certificate in the reports
+        :param certificate_json:
+        :return: True if the certificate is valid
+        """
+        try:
+            self.certificate_handler.validate_certificate(certificate_json)
+        except VALIDATION_ERRORS as e:
+            logging.error('Certificate %s is invalid: %s', uid, e)
+            self.reports.append(ValidationReport(uid, e))
+            return False
+        return True
+
+    def validate(self, certificates):
+        """
+        :param certificates: iterable of (uid, certificate_json)
+        :return: list of ValidationReport, one per invalid certificate
+        """
+        for uid, certificate_json in certificates:
+            self.check(uid, certificate_json)
+        return self.reports
+
+    def raise_for_errors(self):
+        if self.reports:
+            raise InvalidCertificatesError(self.reports)
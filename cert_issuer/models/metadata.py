@@ -1,18 +1,25 @@
 import logging
 
-from jsonschema import validate
-from copy import copy
+from jsonschema.exceptions import best_match
+
+from cert_issuer.schema_resolver import get_schema_validator
 
 
 def validate_metadata_structure(metadata):
     if 'schema' in metadata:
+        # metadata was just parsed from the certificate and is not shared: the schema is left out of the validated
+        # object in place rather than in a copy
+        schema = metadata.pop('schema')
         try:
-            json_object = copy(metadata)
-            del json_object['schema']
-            validate(instance=json_object, schema=metadata['schema'])
+            validator = get_schema_validator(schema)
+            error = best_match(validator.iter_errors(metadata))
+            if error is not None:
+                raise error
         except Exception as e:
-            print(e)
-            raise Exception('Certificate.metadata object does not match its provided schema')
+            logging.error('Metadata does not match its schema: %s', e)
+            raise ValueError('Certificate.metadata object does not match its provided schema')
+        finally:
+            metadata['schema'] = schema
     else:
         logging.warning("""
             The metadata object provided with the certificate does not include a `schema` property.
@@ -1,17 +1,26 @@
 import re
 import logging
-import json
 from urllib.parse import urlparse
 from cert_schema import ContextUrls
-from urllib.request import urlretrieve
-from jsonschema import validate as jsonschema_validate
+from jsonschema.exceptions import best_match
 from dateutil import parser, tz
-from cert_issuer.digests import validate_digest_sri, validate_digest_multibase
+from cert_issuer.digests import digest_index, validate_digest_sri, validate_digest_multibase
+from cert_issuer.schema_resolver import get_schema_resolver
+
+# https://www.w3.org/TR/vc-data-model-2.0/#example-regular-expression-to-detect-a-valid-xml-schema-1-1-part-2-datetimestamp
+RFC3339_DATE_PATTERN = re.compile(r'-?([1-9][0-9]{3,}|0[0-9]{3})-(0[1-9]|1[0-2])-(0[1-9]|[12][0-9]|3[01])T(([01][0-9]|2[0-3]):[0-5][0-9]:[0-5][0-9](\.[0-9]+)?|(24:00:00(\.0+)?))(Z|(\+|-)((0[0-9]|1[0-3]):[0-5][0-9]|14:00))$')
+
+# ContextUrls reads its urls from disk on every instantiation, so they are only read once
+CONTEXT_URLS = ContextUrls()
+VERIFIABLE_CREDENTIAL_V1_CONTEXT = CONTEXT_URLS.verifiable_credential_v1()
+VERIFIABLE_CREDENTIAL_V2_CONTEXT = CONTEXT_URLS.verifiable_credential_v2()
+VERIFIABLE_CREDENTIAL_CONTEXTS = [VERIFIABLE_CREDENTIAL_V1_CONTEXT, VERIFIABLE_CREDENTIAL_V2_CONTEXT]
+BLOCKCERTS_V3_CONTEXTS = CONTEXT_URLS.v3_all()
+
 
 # TODO: move the v3 checks to cert-schema
 def validate_RFC3339_date(date):
-    # // https://www.w3.org/TR/vc-data-model-2.0/#example-regular-expression-to-detect-a-valid-xml-schema-1-1-part-2-datetimestamp
-    return re.match('-?([1-9][0-9]{3,}|0[0-9]{3})-(0[1-9]|1[0-2])-(0[1-9]|[12][0-9]|3[01])T(([01][0-9]|2[0-3]):[0-5][0-9]:[0-5][0-9](\.[0-9]+)?|(24:00:00(\.0+)?))(Z|(\+|-)((0[0-9]|1[0-3]):[0-5][0-9]|14:00))$', date)
+    return RFC3339_DATE_PATTERN.match(date)
 
 
 def is_valid_url(url):
@@ -25,13 +34,11 @@ def is_valid_url(url):
 
 
 def is_V1_verifiable_credential(context):
-    ContextUrlsInstance = ContextUrls()
-    return ContextUrlsInstance.verifiable_credential_v1() in context
+    return VERIFIABLE_CREDENTIAL_V1_CONTEXT in context
 
 
 def is_V2_verifiable_credential(context):
-    ContextUrlsInstance = ContextUrls()
-    return ContextUrlsInstance.verifiable_credential_v2() in context
+    return VERIFIABLE_CREDENTIAL_V2_CONTEXT in context
 
 
 def validate_url(url):
@@ -59,9 +66,8 @@ def validate_id(identifier):
 
 
 def validate_context(context, type):
-    ContextUrlsInstance = ContextUrls()
-    vc_context_url = [ContextUrlsInstance.verifiable_credential_v1(), ContextUrlsInstance.verifiable_credential_v2()]
-    blockcerts_valid_context_url = ContextUrlsInstance.v3_all()
+    vc_context_url = VERIFIABLE_CREDENTIAL_CONTEXTS
+    blockcerts_valid_context_url = BLOCKCERTS_V3_CONTEXTS
 
     if not isinstance(context, list):
         raise ValueError('`@context` property must be an array')
@@ -99,13 +105,13 @@ def validate_credential_subject_against_schema(credential_subject, credential_sc
     if not isinstance(credential_subject, list):
         credential_subject = [credential_subject]
 
+    schema_resolver = get_schema_resolver()
     for schema in credential_schema:
-        schema_url = schema['id']
-        local_filename, headers = urlretrieve(schema_url)
-        with open(local_filename) as f:
-            schema_data = json.load(f)
-            for subject in credential_subject:
-                jsonschema_validate(subject, schema_data)
+        validator = schema_resolver.get_validator(schema['id'])
+        for subject in credential_subject:
+            error = best_match(validator.iter_errors(subject))
+            if error is not None:
+                raise error
 
 
 def validate_issuer(certificate_issuer):
@@ -183,6 +189,9 @@ def validate_related_resource(related_resource):
     if any(not isinstance(resource, dict) for resource in related_resource):
         raise ValueError('relatedResource entry must be an object')
 
+    digest_index.prefetch(resource['id'] for resource in related_resource
+                          if 'id' in resource and is_valid_url(resource['id']))
+
     for resource in related_resource:
         if 'id' not in resource:
             raise ValueError('relatedResource.id is required')
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from cert_schema.__version__ import __version__ as cert_schema_version
+
+NORMALIZATION_CACHE_DIR = 'normalization_cache'
+MEGABYTE = 1024 * 1024
+
+
+class NormalizationCache(object):
+    """
+    Content-addressed on-disk cache of normalized certificates.
+
+    Entries are keyed by a digest of the certificate json and of the set of preloaded contexts, and are evicted in
+    least recently used order once the cache grows over max_size bytes.
+    """
+    def __init__(self, cache_dir, max_size):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.size = sum(size for _, _, size in self._list_entries())
+
+    @staticmethod
+    def key_for(certificate_json, context_fingerprint):
+        hasher = hashlib.sha256()
+        hasher.update(json.dumps(certificate_json, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+        hasher.update(context_fingerprint.encode('utf-8'))
+        hasher.update(cert_schema_version.encode('utf-8'))
+        return hasher.hexdigest()
+
+    def get(self, key):
+        path = self._path_for(key)
+        try:
+            with open(path, 'rb') as cache_file:
+                normalized = cache_file.read()
+        except FileNotFoundError:
+            return None
+        # refresh the entry so it is evicted last
+        os.utime(path)
+        return normalized
+
+    def set(self, key, normalized):
+        path = self._path_for(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(normalized)
+        os.replace(tmp_path, path)
+        self.size += len(normalized)
+        if self.size > self.max_size:
+            self._evict()
+
+    def _path_for(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _list_entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_mtime_ns, stat.st_size
+
+    def _evict(self):
+        target_size = self.max_size * 0.9
+        entries = sorted(self._list_entries(), key=lambda entry: entry[1])
+        self.size = sum(size for _, _, size in entries)
+        evicted = 0
+        for path, _, size in entries:
+            if self.size <= target_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.size -= size
+            evicted += 1
+        logging.info('Evicted %d entries from normalization cache at %s', evicted, self.cache_dir)
+
+
+def get_normalization_cache(app_config):
+    """
+    Returns the normalization cache configured for this run, or None if caching is disabled
+    :param app_config:
+    :return:
+    """
+    if not getattr(app_config, 'normalization_cache', False):
+        return None
+    cache_dir = os.path.join(app_config.work_dir, NORMALIZATION_CACHE_DIR)
+    return NormalizationCache(cache_dir, app_config.normalization_cache_max_size * MEGABYTE)
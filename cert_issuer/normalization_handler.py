@@ -1,6 +1,8 @@
+import hashlib
 import json
 import os
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from cert_schema import normalize_jsonld, extend_preloaded_context
 
 from cert_issuer.config import get_config
@@ -8,21 +10,143 @@ from cert_issuer.config import get_config
 
 class JSONLDHandler:
     @staticmethod
-    def normalize_to_utf8(certificate_json):
-        logging.info('preload contexts before normalization')
+    def normalize_to_utf8(certificate_json, cache=None):
         JSONLDHandler.preload_contexts()
-        normalized = normalize_jsonld(certificate_json, detect_unmapped_fields=True)
-        return normalized.encode('utf-8')
+        if cache is not None:
+            key = cache.key_for(certificate_json, context_registry.fingerprint())
+            normalized = cache.get(key)
+            if normalized is not None:
+                return normalized
+        normalized = normalize_jsonld(certificate_json, detect_unmapped_fields=True).encode('utf-8')
+        if cache is not None:
+            cache.set(key, normalized)
+        return normalized
 
     @staticmethod
-    def preload_contexts():
+    def normalize_batch_to_utf8(certificates_json, workers=1, cache=None):
+        """
+        Normalizes an iterable of certificates, yielding the byte arrays in input order.
+        When more than one worker is requested, normalization is spread over a process pool whose workers
+        preload the contexts once at startup.
+        :param certificates_json: iterable of certificate json objects
+        :param workers: number of worker processes
+        :param cache: optional NormalizationCache, only cache misses get normalized
+        :return: generator of normalized byte arrays
+        """
+        if workers is None or workers <= 1:
+            for certificate_json in certificates_json:
+                yield JSONLDHandler.normalize_to_utf8(certificate_json, cache)
+            return
+
+        # the input is consumed before the workers get forked, so that the stages feeding it are done by then
+        certificates_json = list(certificates_json)
+        if cache is None:
+            yield from JSONLDHandler._normalize_in_pool(certificates_json, workers)
+            return
+
+        JSONLDHandler.preload_contexts()
+        context_fingerprint = context_registry.fingerprint()
+        keys = [cache.key_for(certificate_json, context_fingerprint) for certificate_json in certificates_json]
+        cached = [cache.get(key) for key in keys]
+        misses = [index for index, normalized in enumerate(cached) if normalized is None]
+        logging.info('Found %d of %d normalized certificates in cache', len(keys) - len(misses), len(keys))
+
+        normalized_misses = JSONLDHandler._normalize_in_pool([certificates_json[index] for index in misses], workers)
+        for key, normalized in zip(keys, cached):
+            if normalized is None:
+                normalized = next(normalized_misses)
+                cache.set(key, normalized)
+            yield normalized
+
+    @staticmethod
+    def _normalize_in_pool(certificates_json, workers):
+        if not certificates_json:
+            return
+
+        context_urls, context_file_paths = JSONLDHandler.get_contexts_to_preload()
+        chunksize = max(1, len(certificates_json) // (workers * 4))
+        logging.info('Normalizing %d certificates with %d workers', len(certificates_json), workers)
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_normalization_worker,
+                                 initargs=(context_urls, context_file_paths)) as executor:
+            # map preserves input order, which keeps the merkle leaves deterministic
+            for normalized in executor.map(_normalize_in_worker, certificates_json, chunksize=chunksize):
+                yield normalized
+
+    @staticmethod
+    def get_contexts_to_preload():
         config = get_config()
         if config is None or config.context_urls is None or config.context_file_paths is None:
-            logging.info('No config or context defined in config, aborting preloading of contexts')
+            return None, None
+        return config.context_urls, config.context_file_paths
+
+    @staticmethod
+    def preload_contexts():
+        context_urls, context_file_paths = JSONLDHandler.get_contexts_to_preload()
+        if context_urls is None:
+            logging.debug('No config or context defined in config, aborting preloading of contexts')
             return
-        for (url, path) in zip(config.context_urls, config.context_file_paths):
-            with open(os.path.join(os.getcwd(), path)) as context_file:
-                logging.info(f'preloading context at url {url}')
-                context_data = json.load(context_file)
-                logging.debug(f'adding preloaded context {context_data} for {url}')
-                extend_preloaded_context(url, context_data)
+        context_registry.load(context_urls, context_file_paths)
+
+
+class ContextRegistry(object):
+    """
+    Keeps track of the local context files registered with cert_schema, so that each file is only read and parsed
+    again when it changes on disk. Files are first compared by mtime and size, then by the hash of their content.
+    """
+    def __init__(self):
+        self.entries = {}
+
+    def load(self, context_urls, context_file_paths):
+        for (url, path) in zip(context_urls, context_file_paths):
+            self._load_context(url, os.path.join(os.getcwd(), path))
+
+    def _load_context(self, url, path):
+        stat = os.stat(path)
+        stat_key = (path, stat.st_mtime_ns, stat.st_size)
+        entry = self.entries.get(url)
+        if entry is not None and entry['stat_key'] == stat_key:
+            return
+
+        with open(path, 'rb') as context_file:
+            raw_content = context_file.read()
+        digest = hashlib.sha256(raw_content).hexdigest()
+        if entry is not None and entry['digest'] == digest:
+            entry['stat_key'] = stat_key
+            return
+
+        logging.info(f'preloading context at url {url}')
+        context_data = json.loads(raw_content)
+        logging.debug(f'adding preloaded context {context_data} for {url}')
+        extend_preloaded_context(url, context_data)
+        self.entries[url] = {
+            'stat_key': stat_key,
+            'digest': digest
+        }
+
+    def fingerprint(self):
+        """
+        Digest identifying the set of contexts currently registered
+        :return: hex string
+        """
+        hasher = hashlib.sha256()
+        for url in sorted(self.entries):
+            hasher.update(url.encode('utf-8'))
+            hasher.update(self.entries[url]['digest'].encode('utf-8'))
+        return hasher.hexdigest()
+
+    def clear(self):
+        self.entries = {}
+
+
+context_registry = ContextRegistry()
+
+
+def _init_normalization_worker(context_urls, context_file_paths):
+    if context_urls is not None and context_file_paths is not None:
+        context_registry.load(context_urls, context_file_paths)
+
+
+def _normalize_in_worker(certificate_json):
+    normalized = normalize_jsonld(certificate_json, detect_unmapped_fields=True)
+    return normalized.encode('utf-8')
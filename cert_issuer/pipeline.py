@@ -0,0 +1,60 @@
+import queue
+import threading
+
+DEFAULT_QUEUE_SIZE = 64
+PUT_TIMEOUT = 0.1
+
+_DONE = object()
+
+
+class _Failure(object):
+    def __init__(self, error):
+        self.error = error
+
+
+def run_in_background(iterable, queue_size=DEFAULT_QUEUE_SIZE):
+    """
+    Consumes iterable in a background thread and yields its items in order, through a bounded queue. Chaining calls
+    builds a pipeline where each stage runs while the next one processes the items already produced.
+
+    An exception raised while consuming iterable is re-raised to the caller after the items produced before it. If the
+    caller stops iterating early, the background thread stops at its next item.
+    :param iterable:
+    :param queue_size: maximum number of items produced ahead of the caller
+    :return: generator
+    """
+    items = queue.Queue(maxsize=queue_size)
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_Failure(e))
+            return
+        put(_DONE)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                break
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stopped.set()
+        thread.join()
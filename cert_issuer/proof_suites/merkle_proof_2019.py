@@ -1,6 +1,11 @@
 import uuid
 from datetime import datetime, timezone, tzinfo
 
+from cbor2 import dumps as cbor_dumps
+from multibase import decode as multibase_decode
+from lds_merkle_proof_2019.merkle_proof_2019 import MerkleProof2019
+from lds_merkle_proof_2019.mappings import root as ROOT_MAPPING, path as PATH_MAPPING
+
 DATA_INTEGRITY_PROOF_TYPE = 'DataIntegrityProof'
 MERKLE_PROOF_2019_TYPE = 'merkle-proof-2019'
 class MerkleProof2019Suite:
@@ -31,3 +36,72 @@ class MerkleProof2019Suite:
 
     def to_json_object(self):
         return self.__dict__
+
+
+BASE58_BTC_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+BASE58_BTC_PREFIX = b'z'
+BASE58_CHUNK_DIGITS = 10
+BASE58_CHUNK = 58 ** BASE58_CHUNK_DIGITS
+# header of a CBOR array of 4 items: path, merkleRoot, targetHash, anchors
+PROOF_CBOR_HEADER = b'\x84'
+
+
+class MerkleProof2019BatchEncoder:
+    """
+    Encodes the MerkleProof2019 proof values of a batch of certificates.
+
+    merkleRoot and anchors are the same for every certificate of a batch, so their CBOR encoding is computed once and
+    only the path and targetHash of each leaf get serialized. Proof values are the same bytes as the ones returned by
+    lds_merkle_proof_2019 MerkleProof2019.encode.
+    """
+    def __init__(self, merkle_root, anchors):
+        self.merkle_root_fragment = encode_proof_fragment('merkleRoot', merkle_root)
+        self.anchors_fragment = encode_proof_fragment('anchors', anchors)
+
+    def encode(self, path, target_hash):
+        path_list = []
+        for path_item in path:
+            if 'right' in path_item:
+                path_list.append([PATH_MAPPING['right'], cbor_dumps(path_item['right'])])
+            if 'left' in path_item:
+                path_list.append([PATH_MAPPING['left'], cbor_dumps(path_item['left'])])
+        cbor_encoding = b''.join([
+            PROOF_CBOR_HEADER,
+            cbor_dumps([ROOT_MAPPING['path'], path_list]),
+            self.merkle_root_fragment,
+            cbor_dumps([ROOT_MAPPING['targetHash'], cbor_dumps(target_hash)]),
+            self.anchors_fragment
+        ])
+        return BASE58_BTC_PREFIX + base58_encode(cbor_encoding)
+
+
+def encode_proof_fragment(key, value):
+    """
+    CBOR encoding of a single entry of the proof map, as mapped by lds_merkle_proof_2019
+    """
+    proof_value = MerkleProof2019().encode({key: value})
+    cbor_encoding = multibase_decode(proof_value)
+    # strip the header of the single item CBOR array
+    return cbor_encoding[1:]
+
+
+def base58_encode(data):
+    """
+    Base58 (bitcoin alphabet) encoding of data read as a big endian integer, like multibase's base58btc converter
+    """
+    number = int.from_bytes(data, byteorder='big', signed=False)
+    if number == 0:
+        return BASE58_BTC_ALPHABET[0].encode('ascii')
+    # divide by a power of 58 so that most of the work is done on machine sized integers
+    chunks = []
+    while number:
+        number, chunk = divmod(number, BASE58_CHUNK)
+        chunks.append(chunk)
+    digits = []
+    for index, chunk in enumerate(chunks):
+        for _ in range(BASE58_CHUNK_DIGITS):
+            if not chunk and index == len(chunks) - 1:
+                break
+            chunk, remainder = divmod(chunk, 58)
+            digits.append(BASE58_BTC_ALPHABET[remainder])
+    return ''.join(reversed(digits)).encode('ascii')
@@ -0,0 +1,289 @@
+"""
+Remote signing, so that several issuer processes can share one signer without each of them loading the key.
+
+RemoteSecretManager sends signing requests over HTTP to a signing service, batching the requests it is given together
+and reusing its connections. SigningServer is a reference signing service holding the key of a local secret manager,
+started with:
+
+    python -m cert_issuer.remote_signer -c conf.ini --signer_port 8765
+
+Requests are POSTed as json to /sign: {"requests": [{"method": "sign_transaction", "format": ..., "payload": ...}]},
+and answered with {"results": [{"format": ..., "payload": ...} or {"error": ...}]} in the same order.
+"""
+import copy
+import hmac
+import ipaddress
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cert_issuer.errors import RemoteSignerError
+from cert_issuer.models import SecretManager
+
+SIGN_MESSAGE = 'sign_message'
+SIGN_TRANSACTION = 'sign_transaction'
+SIGN_METHODS = (SIGN_MESSAGE, SIGN_TRANSACTION)
+
+TEXT_FORMAT = 'text'
+JSON_FORMAT = 'json'
+BITCOIN_TX_FORMAT = 'bitcoin_tx'
+
+DEFAULT_SIGNER_HOST = '127.0.0.1'
+DEFAULT_SIGNER_PORT = 8765
+DEFAULT_SIGNER_TIMEOUT = 30
+MAX_REQUEST_SIZE = 1024 * 1024
+
+
+def encode_value(value):
+    """
+    :param value: message, ethereum transaction dict or pycoin transaction
+    :return: json serializable dict
+    """
+    if isinstance(value, str):
+        return {'format': TEXT_FORMAT, 'payload': value}
+    if isinstance(value, dict):
+        payload = {key: '0x' + item.hex() if isinstance(item, bytes) else item for key, item in value.items()}
+        return {'format': JSON_FORMAT, 'payload': payload}
+    if hasattr(value, 'as_hex'):
+        return {'format': BITCOIN_TX_FORMAT, 'payload': value.as_hex(include_unspents=True)}
+    raise TypeError('Cannot send a {} to the remote signer'.format(type(value).__name__))
+
+
+def decode_value(encoded):
+    value_format = encoded['format']
+    if value_format in (TEXT_FORMAT, JSON_FORMAT):
+        return encoded['payload']
+    if value_format == BITCOIN_TX_FORMAT:
+        from pycoin.coins.bitcoin.Tx import Tx
+        return Tx.from_hex(encoded['payload'])
+    raise ValueError('Unknown remote signer format {}'.format(value_format))
+
+
+class RemoteSecretManager(SecretManager):
+    """
+    Secret manager delegating signatures to a signing service. The key never leaves the signing service, so there is
+    nothing to unlock or zeroize locally. Nested sessions are counted, and the service is only checked when the
+    outermost one starts.
+    """
+    def __init__(self, url, token=None, timeout=DEFAULT_SIGNER_TIMEOUT, session=None):
+        super().__init__(signer=None)
+        self.url = url.rstrip('/')
+        self.token = token
+        self.timeout = timeout
+        if session is None:
+            from cert_issuer.blockchain_handlers.sessions import create_session
+            session = create_session(read_timeout=timeout, retries=0)
+        self.session = session
+        self.sessions = 0
+
+    def supports_batch_session(self):
+        return True
+
+    def start(self):
+        if not self.sessions:
+            self._post('/status', {})
+        self.sessions += 1
+
+    def stop(self):
+        self.sessions = max(0, self.sessions - 1)
+
+    def sign_message(self, message_to_sign):
+        return self.sign_batch([(SIGN_MESSAGE, message_to_sign)])[0]
+
+    def sign_transaction(self, transaction_to_sign):
+        return self.sign_batch([(SIGN_TRANSACTION, transaction_to_sign)])[0]
+
+    def sign_messages(self, messages_to_sign):
+        return self.sign_batch([(SIGN_MESSAGE, message) for message in messages_to_sign])
+
+    def sign_transactions(self, transactions_to_sign):
+        return self.sign_batch([(SIGN_TRANSACTION, transaction) for transaction in transactions_to_sign])
+
+    def sign_batch(self, requests_to_sign):
+        """
+        Signs several messages or transactions in a single round trip
+        :param requests_to_sign: list of (method, value), method being sign_message or sign_transaction
+        :return: list of signed values, in order
+        """
+        if not requests_to_sign:
+            return []
+        body = {'requests': [dict(encode_value(value), method=method) for method, value in requests_to_sign]}
+        results = self._post('/sign', body).get('results', [])
+        if len(results) != len(requests_to_sign):
+            raise RemoteSignerError('Remote signer answered {} results for {} requests'.format(
+                len(results), len(requests_to_sign)))
+        signed = []
+        for result in results:
+            if 'error' in result:
+                raise RemoteSignerError('Remote signer could not sign: {}'.format(result['error']))
+            signed.append(decode_value(result))
+        return signed
+
+    def _post(self, path, body):
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = 'Bearer {}'.format(self.token)
+        try:
+            response = self.session.post(self.url + path, data=json.dumps(body), headers=headers,
+                                         timeout=self.timeout)
+        except Exception as e:
+            raise RemoteSignerError('Could not reach the remote signer at {}: {}'.format(self.url, e))
+        if response.status_code != 200:
+            raise RemoteSignerError('Remote signer at {} answered {}: {}'.format(
+                self.url, response.status_code, response.text))
+        return response.json()
+
+
+class SigningServer(object):
+    """
+    Reference signing service, signing with the key of secret_manager. The key is unlocked once when the server
+    starts and locked again when it is closed. Signatures are serialized, as signers are not thread safe.
+
+    Without a token the server only listens on a loopback address. Requests are authorized before their body is read,
+    and bodies larger than MAX_REQUEST_SIZE are refused.
+    """
+    def __init__(self, secret_manager, host=DEFAULT_SIGNER_HOST, port=DEFAULT_SIGNER_PORT, token=None):
+        if not token and not is_loopback(host):
+            raise ValueError('Refusing to serve signatures on {} without a token, set remote_signer_token or '
+                             'listen on a loopback address'.format(host))
+        self.secret_manager = secret_manager
+        self.token = token
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def sign(self, request):
+        method = request.get('method')
+        if method not in SIGN_METHODS:
+            return {'error': 'Unknown method {}'.format(method)}
+        try:
+            value = decode_value(request)
+            with self.lock:
+                signed = getattr(self.secret_manager, method)(value)
+            if isinstance(signed, dict) and signed.get('error') is True:
+                return {'error': str(signed.get('message'))}
+            return encode_value(signed)
+        except Exception as e:
+            logging.error('Could not sign %s request: %s', method, e)
+            return {'error': str(e)}
+
+    def is_authorized(self, authorization):
+        if not self.token:
+            return True
+        return hmac.compare_digest(authorization or '', 'Bearer {}'.format(self.token))
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                if not server.is_authorized(self.headers.get('Authorization')):
+                    return self._reject(401, 'Unauthorized')
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                except ValueError:
+                    return self._reject(400, 'Invalid Content-Length')
+                if length < 0:
+                    return self._reject(400, 'Invalid Content-Length')
+                if length > MAX_REQUEST_SIZE:
+                    return self._reject(413, 'Request larger than {} bytes'.format(MAX_REQUEST_SIZE))
+                body = self.rfile.read(length) if length else b'{}'
+                if self.path == '/status':
+                    return self._respond(200, {'status': 'ok'})
+                if self.path != '/sign':
+                    return self._respond(404, {'error': 'Not found'})
+                try:
+                    signing_requests = json.loads(body.decode('utf-8'))['requests']
+                except (ValueError, KeyError) as e:
+                    return self._respond(400, {'error': 'Invalid request: {}'.format(e)})
+                self._respond(200, {'results': [server.sign(request) for request in signing_requests]})
+
+            def _reject(self, status, error):
+                # the body was not read, so the connection cannot be reused
+                self._respond(status, {'error': error}, close=True)
+
+            def _respond(self, status, body, close=False):
+                response_body = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(response_body)))
+                if close:
+                    self.send_header('Connection', 'close')
+                self.end_headers()
+                self.wfile.write(response_body)
+
+            def log_message(self, format, *args):
+                logging.debug('Signing server: ' + format, *args)
+
+        return Handler
+
+    def start(self):
+        """
+        Unlocks the key and serves requests in a background thread
+        """
+        self.secret_manager.start()
+        self.thread = threading.Thread(target=self.httpd.serve_forever, kwargs={'poll_interval': 0.1},
+                                       daemon=True)
+        self.thread.start()
+        logging.info('Signing server listening on %s', self.url)
+
+    def serve_forever(self):
+        self.secret_manager.start()
+        logging.info('Signing server listening on %s', self.url)
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        if self.thread is not None:
+            self.httpd.shutdown()
+            self.thread.join()
+            self.thread = None
+        self.httpd.server_close()
+        self.secret_manager.stop()
+
+
+def is_loopback(host):
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def create_remote_secret_manager(app_config):
+    return RemoteSecretManager(app_config.remote_signer_url,
+                               token=getattr(app_config, 'remote_signer_token', None),
+                               timeout=getattr(app_config, 'remote_signer_timeout', None) or DEFAULT_SIGNER_TIMEOUT)
+
+
+def main(app_config):
+    local_config = copy.copy(app_config)
+    local_config.remote_signer_url = None
+    if local_config.chain.is_ethereum_type():
+        from cert_issuer.blockchain_handlers.ethereum import initialize_signer
+    else:
+        from cert_issuer.blockchain_handlers.bitcoin import initialize_signer
+    server = SigningServer(initialize_signer(local_config),
+                           host=getattr(app_config, 'signer_host', None) or DEFAULT_SIGNER_HOST,
+                           port=getattr(app_config, 'signer_port', None) or DEFAULT_SIGNER_PORT,
+                           token=getattr(app_config, 'remote_signer_token', None))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info('Stopping the signing server')
+
+
+if __name__ == '__main__':
+    from cert_issuer import config
+    main(config.get_config())
@@ -0,0 +1,247 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from jsonschema.validators import validator_for
+
+from cert_issuer import config
+
+SCHEMA_CACHE_DIR = 'schema_cache'
+MAX_SCHEMAS_IN_MEMORY = 64
+DEFAULT_MAX_AGE = 300
+FETCH_TIMEOUT = 10
+
+MAX_CACHED_VALIDATORS = 32
+
+MAX_AGE_PATTERN = re.compile(r'max-age=(\d+)')
+
+_validators = OrderedDict()
+_validators_lock = threading.Lock()
+
+
+def get_schema_validator(schema):
+    """
+    Returns a compiled validator for schema, shared by every schema with the same canonical json
+    :param schema:
+    :return: jsonschema validator instance
+    """
+    key = hashlib.sha256(json.dumps(schema, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+    with _validators_lock:
+        validator = _validators.get(key)
+        if validator is not None:
+            _validators.move_to_end(key)
+            return validator
+
+    validator_class = validator_for(schema)
+    validator_class.check_schema(schema)
+    validator = validator_class(schema)
+    with _validators_lock:
+        _validators[key] = validator
+        while len(_validators) > MAX_CACHED_VALIDATORS:
+            _validators.popitem(last=False)
+    return validator
+
+
+class SchemaEntry(object):
+    def __init__(self, schema, etag=None, expires=None):
+        self.schema = schema
+        self.etag = etag
+        # None never expires, used for the schemas preloaded from local files
+        self.expires = expires
+        self._validator = None
+
+    def is_fresh(self):
+        return self.expires is None or time.time() < self.expires
+
+    def get_validator(self):
+        """
+        Looks up the compiled validator for this schema on first use
+        :return: jsonschema validator instance
+        """
+        if self._validator is None:
+            self._validator = get_schema_validator(self.schema)
+        return self._validator
+
+
+class SchemaResolver(object):
+    """
+    Resolves credentialSchema urls to compiled jsonschema validators.
+
+    Schemas are kept in an in-process LRU and, when cache_dir is set, in an on-disk cache that survives across runs.
+    Cached schemas are reused until their Cache-Control max-age expires, then revalidated with their ETag. If the
+    schema server cannot be reached, a stale cached copy is used rather than failing the issuance.
+    """
+    def __init__(self, cache_dir=None, max_entries=MAX_SCHEMAS_IN_MEMORY):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.preloaded = {}
+        self.settings = None
+        self.lock = threading.Lock()
+        # one lock per url, so that a slow schema host only holds up the lookups of its own schemas
+        self.fetch_locks = {}
+
+    def configure(self, cache_dir, schema_urls=None, schema_file_paths=None):
+        """
+        Applies the run settings, only reloading the preloaded schemas when the settings change
+        :param cache_dir: on-disk cache directory, or None to only cache in memory
+        :param schema_urls: urls of the schemas to preload
+        :param schema_file_paths: local files of the schemas to preload, in the same order as schema_urls
+        :return:
+        """
+        settings = (cache_dir, tuple(schema_urls or ()), tuple(schema_file_paths or ()))
+        with self.lock:
+            if settings == self.settings:
+                return
+            self.settings = settings
+            self.cache_dir = cache_dir
+            self.preloaded = {}
+            self.entries.clear()
+        if schema_urls and schema_file_paths:
+            self.preload(schema_urls, schema_file_paths)
+
+    def preload(self, schema_urls, schema_file_paths):
+        for (url, path) in zip(schema_urls, schema_file_paths):
+            logging.info('preloading schema at url %s', url)
+            with open(os.path.join(os.getcwd(), path), 'r') as schema_file:
+                schema = json.load(schema_file)
+            with self.lock:
+                self.preloaded[url] = SchemaEntry(schema)
+
+    def get_validator(self, url):
+        return self.get_entry(url).get_validator()
+
+    def get_entry(self, url):
+        entry = self._get_cached_entry(url)
+        if entry is not None:
+            return entry
+        with self.lock:
+            fetch_lock = self.fetch_locks.setdefault(url, threading.Lock())
+        with fetch_lock:
+            # another thread may have refreshed the entry while this one was waiting
+            entry = self._get_cached_entry(url)
+            if entry is not None:
+                return entry
+            with self.lock:
+                entry = self.entries.get(url)
+            if entry is None:
+                entry = self._read_from_disk(url)
+            if entry is None or not entry.is_fresh():
+                entry = self._fetch(url, entry)
+            with self.lock:
+                self.entries[url] = entry
+                self.entries.move_to_end(url)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+            return entry
+
+    def _get_cached_entry(self, url):
+        """
+        :return: the preloaded or fresh in-memory entry of url, or None if it has to be read or fetched
+        """
+        with self.lock:
+            entry = self.preloaded.get(url)
+            if entry is not None:
+                return entry
+            entry = self.entries.get(url)
+            if entry is not None and entry.is_fresh():
+                self.entries.move_to_end(url)
+                return entry
+        return None
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def _fetch(self, url, cached_entry):
+        headers = {'Accept': 'application/schema+json, application/json'}
+        if cached_entry is not None and cached_entry.etag is not None:
+            headers['If-None-Match'] = cached_entry.etag
+        try:
+            with urlopen(Request(url, headers=headers), timeout=FETCH_TIMEOUT) as response:
+                schema = json.loads(response.read().decode('utf-8'))
+                response_headers = response.headers
+        except HTTPError as e:
+            if e.code == 304 and cached_entry is not None:
+                logging.debug('schema at url %s not modified', url)
+                cached_entry.expires = get_expiry(e.headers)
+                self._write_to_disk(url, cached_entry)
+                return cached_entry
+            if e.code >= 500 and cached_entry is not None:
+                logging.warning('Schema server answered %d for url %s, using the cached copy', e.code, url)
+                return cached_entry
+            raise
+        except (URLError, OSError) as e:
+            if cached_entry is None:
+                raise
+            logging.warning('Could not fetch schema at url %s, using the cached copy: %s', url, e)
+            return cached_entry
+
+        logging.info('fetched schema at url %s', url)
+        entry = SchemaEntry(schema, response_headers.get('ETag'), get_expiry(response_headers))
+        self._write_to_disk(url, entry)
+        return entry
+
+    def _path_for(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+    def _read_from_disk(self, url):
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self._path_for(url), 'r') as cache_file:
+                cached = json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+        if cached.get('url') != url:
+            return None
+        return SchemaEntry(cached['schema'], cached.get('etag'), cached.get('expires', 0))
+
+    def _write_to_disk(self, url, entry):
+        if self.cache_dir is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+        with os.fdopen(fd, 'w') as tmp_file:
+            json.dump({
+                'url': url,
+                'etag': entry.etag,
+                'expires': entry.expires,
+                'schema': entry.schema
+            }, tmp_file)
+        os.replace(tmp_path, self._path_for(url))
+
+
+def get_expiry(headers):
+    cache_control = headers.get('Cache-Control', '') if headers is not None else ''
+    if 'no-store' in cache_control or 'no-cache' in cache_control:
+        return time.time()
+    match = MAX_AGE_PATTERN.search(cache_control)
+    max_age = int(match.group(1)) if match else DEFAULT_MAX_AGE
+    return time.time() + max_age
+
+
+schema_resolver = SchemaResolver()
+
+
+def get_schema_resolver():
+    """
+    Returns the schema resolver, configured from the loaded config if any. Validation does not load the config itself
+    :return:
+    """
+    app_config = config.CONFIG
+    if app_config is not None:
+        work_dir = getattr(app_config, 'work_dir', None)
+        schema_resolver.configure(
+            os.path.join(work_dir, SCHEMA_CACHE_DIR) if work_dir else None,
+            getattr(app_config, 'credential_schema_urls', None),
+            getattr(app_config, 'credential_schema_file_paths', None))
+    return schema_resolver
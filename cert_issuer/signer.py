@@ -1,33 +1,47 @@
 import logging
-import os
-import time
-
-import requests
 
+from cert_issuer.connectivity import ConnectivityGate, HttpProbe
 from cert_issuer.models import SecretManager
 
 
 class FileSecretManager(SecretManager):
-    def __init__(self, signer, path_to_secret, safe_mode=True, issuing_address=None):
+    def __init__(self, signer, path_to_secret, safe_mode=True, issuing_address=None, connectivity_gate=None):
         super().__init__(signer)
         self.path_to_secret = path_to_secret
         self.safe_mode = safe_mode
         self.issuing_address = issuing_address
+        self.connectivity_gate = connectivity_gate or ConnectivityGate()
+        self.sessions = 0
+
+    def supports_batch_session(self):
+        # in safe mode the key must be unplugged whenever the issuer goes online
+        return not self.safe_mode
 
     def start(self):
+        if self.sessions:
+            # already unlocked by an enclosing session
+            self.sessions += 1
+            return
         if self.safe_mode:
-            check_internet_off(self.path_to_secret)
+            self.connectivity_gate.wait_until_offline(self.path_to_secret)
         else:
             logging.warning(
                 'app is configured to skip the wifi check when the USB is plugged in. Read the documentation to'
                 ' ensure this is what you want, since this is less secure')
 
         self.wif = import_key(self.path_to_secret)
+        self.sessions = 1
 
     def stop(self):
+        if self.sessions > 1:
+            self.sessions -= 1
+            return
+        self.sessions = 0
         self.wif = None
+        if self.signer is not None:
+            self.signer.clear_keys()
         if self.safe_mode:
-            check_internet_on(self.path_to_secret)
+            self.connectivity_gate.wait_until_online(self.path_to_secret)
         else:
             logging.warning(
                 'app is configured to skip the wifi check when the USB is plugged in. Read the documentation to'
@@ -48,6 +62,28 @@ class FinalizableSigner(object):
         self.secret_manager.stop()
 
 
+class BatchSigningSession(object):
+    """
+    Keeps the key unlocked for a whole batch, so that signing the certificates and every transaction attempt reuse it
+    instead of unlocking it again. Secret managers that cannot keep the key unlocked across the network calls of a
+    batch, like a FileSecretManager in safe mode, are left to unlock the key for each signing phase.
+    """
+    def __init__(self, secret_manager):
+        self.secret_manager = secret_manager
+        self.active = isinstance(secret_manager, SecretManager) and secret_manager.supports_batch_session()
+
+    def __enter__(self):
+        if self.active:
+            logging.info('Starting batch signing session')
+            self.secret_manager.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.active:
+            logging.info('Stopping batch signing session')
+            self.secret_manager.stop()
+
+
 def import_key(secrets_file_path):
     with open(secrets_file_path) as key_file:
         key = key_file.read().strip()
@@ -56,30 +92,16 @@ def import_key(secrets_file_path):
 
 def internet_on():
     """Pings Google to see if the internet is on. If online, returns true. If offline, returns false."""
-    try:
-        requests.get('http://google.com')
-        return True
-    except requests.exceptions.RequestException:
-        return False
+    return HttpProbe().is_online()
 
 
 def check_internet_off(secrets_file_path):
     """If internet off and USB plugged in, returns true. Else, continues to wait..."""
-    while True:
-        if internet_on() is False and os.path.exists(secrets_file_path):
-            break
-        else:
-            print("Turn off your internet and plug in your USB to continue...")
-            time.sleep(10)
+    ConnectivityGate().wait_until_offline(secrets_file_path)
     return True
 
 
 def check_internet_on(secrets_file_path):
     """If internet on and USB unplugged, returns true. Else, continues to wait..."""
-    while True:
-        if internet_on() is True and not os.path.exists(secrets_file_path):
-            break
-        else:
-            print("Turn on your internet and unplug your USB to continue...")
-            time.sleep(10)
+    ConnectivityGate().wait_until_online(secrets_file_path)
     return True
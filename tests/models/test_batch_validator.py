@@ -0,0 +1,62 @@
+import unittest
+
+import mock
+from jsonschema.exceptions import ValidationError
+
+from cert_issuer.errors import InvalidCertificatesError
+from cert_issuer.models.batch_validator import BatchCredentialValidator
+
+
+def validate_certificate(certificate_json):
+    if 'error' in certificate_json:
+        raise ValueError(certificate_json['error'])
+
+
+class BatchCredentialValidatorTestSuite(unittest.TestCase):
+    def _get_validator(self):
+        certificate_handler = mock.Mock()
+        certificate_handler.validate_certificate.side_effect = validate_certificate
+        return BatchCredentialValidator(certificate_handler)
+
+    def test_validate_returns_a_report_per_invalid_certificate(self):
+        validator = self._get_validator()
+        reports = validator.validate([
+            ('a', {}),
+            ('b', {'error': 'first error'}),
+            ('c', {}),
+            ('d', {'error': 'second error'})
+        ])
+        self.assertEqual([report.uid for report in reports], ['b', 'd'])
+        self.assertEqual([str(report.error) for report in reports], ['first error', 'second error'])
+
+        with self.assertRaises(InvalidCertificatesError) as context:
+            validator.raise_for_errors()
+        self.assertEqual(str(context.exception), '2 invalid certificate(s): b: first error; d: second error')
+
+    def test_single_invalid_certificate_keeps_its_message(self):
+        validator = self._get_validator()
+        validator.validate([('a', {'error': '`issuer` property must be defined'})])
+        with self.assertRaises(ValueError) as context:
+            validator.raise_for_errors()
+        self.assertEqual(str(context.exception), '`issuer` property must be defined')
+
+    def test_other_errors_propagate(self):
+        validator = self._get_validator()
+        validator.certificate_handler.validate_certificate.side_effect = IOError('unreachable')
+        with self.assertRaises(IOError):
+            validator.validate([('a', {})])
+        self.assertEqual(validator.reports, [])
+
+    def test_schema_errors_are_reported(self):
+        validator = self._get_validator()
+        validator.certificate_handler.validate_certificate.side_effect = ValidationError('not a string')
+        self.assertEqual([report.uid for report in validator.validate([('a', {})])], ['a'])
+
+    def test_valid_batch_does_not_raise(self):
+        validator = self._get_validator()
+        self.assertEqual(validator.validate([('a', {}), ('b', {})]), [])
+        validator.raise_for_errors()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,8 @@
 import json
 import logging
 import unittest
-from cert_issuer.models.metadata import validate_metadata_structure
+from cert_issuer.models.metadata import validate_metadata_structure, get_schema_validator
+from cert_issuer.schema_resolver import SchemaEntry
 from kgb import SpyAgency
 
 class MetadataValidationTestSuite(unittest.TestCase):
@@ -119,3 +120,23 @@ class MetadataValidationTestSuite(unittest.TestCase):
             )
         )
         logging.warning.unspy()
+
+    def test_schema_validator_is_compiled_once_per_schema(self):
+        schema = {"$schema": "http://json-schema.org/draft-04/schema#", "type": "object", "required": ["certificate"]}
+        validator = get_schema_validator(schema)
+        self.assertIs(get_schema_validator(json.loads(json.dumps(schema))), validator)
+        self.assertIs(get_schema_validator(dict(reversed(list(schema.items())))), validator)
+        self.assertIsNot(get_schema_validator(dict(schema, required=["recipient"])), validator)
+        self.assertIs(SchemaEntry(json.loads(json.dumps(schema))).get_validator(), validator)
+
+    def test_json_schema_validation_keeps_schema_in_metadata(self):
+        schema = {"$schema": "http://json-schema.org/draft-04/schema#", "type": "object", "additionalProperties": False,
+                  "properties": {"certificate": {"type": "object"}, "displayOrder": {"type": "array"}}}
+        metadata = {"schema": schema, "certificate": {}, "displayOrder": []}
+        validate_metadata_structure(metadata)
+        self.assertIs(metadata["schema"], schema)
+
+        metadata["recipient"] = {}
+        with self.assertRaises(Exception):
+            validate_metadata_structure(metadata)
+        self.assertIs(metadata["schema"], schema)
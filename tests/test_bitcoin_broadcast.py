@@ -0,0 +1,73 @@
+import threading
+import unittest
+
+import mock
+from cert_core import Chain
+
+from cert_issuer.blockchain_handlers.bitcoin import connectors
+from cert_issuer.blockchain_handlers.bitcoin.connectors import BitcoinServiceProviderConnector, \
+    get_broadcast_retry_delay
+from cert_issuer.errors import BroadcastError
+
+
+class FakeProvider(object):
+    def __init__(self, tx_id=None, release=None, error=None):
+        self.tx_id = tx_id
+        self.release = release
+        self.error = error
+        self.calls = 0
+        self.finished = threading.Event()
+
+    def broadcast_tx(self, tx):
+        self.calls += 1
+        try:
+            if self.release is not None:
+                self.release.wait(5)
+            if self.error is not None:
+                raise self.error
+            return self.tx_id
+        finally:
+            self.finished.set()
+
+
+class TestBitcoinBroadcast(unittest.TestCase):
+    def _broadcast(self, providers):
+        with mock.patch.object(connectors, 'get_providers_for_chain', return_value=providers):
+            return BitcoinServiceProviderConnector.broadcast_tx_with_chain(mock.Mock(), Chain.bitcoin_testnet)
+
+    def test_returns_first_tx_id_without_waiting_for_slow_providers(self):
+        release = threading.Event()
+        slow_provider = FakeProvider('txid', release=release)
+        tx_id = self._broadcast([slow_provider, FakeProvider(error=BroadcastError('down')), FakeProvider('txid')])
+        self.assertEqual(tx_id, 'txid')
+        self.assertFalse(slow_provider.finished.is_set())
+        release.set()
+        self.assertTrue(slow_provider.finished.wait(5))
+
+    def test_logs_conflicting_tx_ids(self):
+        release = threading.Event()
+        logged = threading.Event()
+        late_provider = FakeProvider('other txid', release=release)
+        with mock.patch.object(connectors.logging, 'error', side_effect=lambda *args: logged.set()) as log_error:
+            self.assertEqual(self._broadcast([FakeProvider('txid'), late_provider]), 'txid')
+            release.set()
+            self.assertTrue(logged.wait(5))
+        self.assertIn('conflicting', log_error.call_args[0][0])
+
+    @mock.patch.object(connectors.time, 'sleep')
+    def test_retries_with_backoff_when_all_providers_fail(self, sleep):
+        providers = [FakeProvider(error=BroadcastError('down')), FakeProvider()]
+        with self.assertRaises(BroadcastError):
+            self._broadcast(providers)
+        self.assertEqual(providers[0].calls, connectors.MAX_BROADCAST_ATTEMPTS)
+        self.assertEqual(sleep.call_count, connectors.MAX_BROADCAST_ATTEMPTS - 1)
+
+    def test_retry_delay_grows_and_is_capped(self):
+        for attempt_number in range(10):
+            delay = min(connectors.BROADCAST_RETRY_INTERVAL, connectors.BROADCAST_BACKOFF_BASE * 2 ** attempt_number)
+            for _ in range(20):
+                self.assertTrue(delay / 2 <= get_broadcast_retry_delay(attempt_number) <= delay)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+import threading
 import unittest
 
 import mock
@@ -8,6 +9,7 @@ from mock import patch
 from cert_issuer.certificate_handlers import CertificateWebV3Handler, CertificateV3Handler, CertificateBatchHandler, CertificateHandler, CertificateBatchWebHandler
 from cert_issuer.merkle_tree_generator import MerkleTreeGenerator
 from cert_issuer import helpers
+from cert_issuer.errors import InvalidCertificatesError
 from cert_core import Chain
 from mock import ANY
 
@@ -73,6 +75,7 @@ class TestCertificateHandler(unittest.TestCase):
 
         config = mock.Mock()
         config.issuing_address = "http://example.com"
+        config.report_all_invalid_certificates = False
 
         handler = CertificateBatchHandler(
                 secret_manager=secret_manager,
@@ -98,6 +101,74 @@ class TestCertificateHandler(unittest.TestCase):
         self.assertEqual(
                 b2h(result), '0932f1d2e98219f7d7452801e2b64ebd9e5c005539db12d9b1ddabe7834d9044')
 
+    def test_batch_handler_prepare_batch_stops_at_invalid_certificate(self):
+        certificate_batch_handler, certificates_to_issue = self._get_certificate_batch_handler()
+        certificate_batch_handler.set_certificates_in_batch(certificates_to_issue)
+
+        def validate_certificate(certificate_json):
+            if certificate_batch_handler.certificate_handler.validated == 1:
+                raise ValueError('invalid certificate')
+            certificate_batch_handler.certificate_handler.validated += 1
+
+        certificate_batch_handler.certificate_handler.validated = 0
+        with patch.object(DummyCertificateHandler, 'validate_certificate', side_effect=validate_certificate):
+            with self.assertRaises(ValueError):
+                certificate_batch_handler.prepare_batch()
+
+        self.assertFalse(certificate_batch_handler.secret_manager.start.called)
+        self.assertLessEqual(certificate_batch_handler.certificate_handler.counter, 1)
+
+    def test_batch_handlers_retry_failed_resources_in_a_new_batch(self):
+        for get_handler in (self._get_certificate_batch_handler, self._get_certificate_batch_web_handler):
+            handler, certificates_to_issue = get_handler()
+            with patch('cert_issuer.certificate_handlers.digest_index') as digest_index:
+                handler.set_certificates_in_batch(certificates_to_issue)
+            digest_index.clear_failures.assert_called_once_with()
+
+    def test_batch_handler_normalizes_in_processes_on_the_calling_thread(self):
+        certificate_batch_handler, certificates_to_issue = self._get_certificate_batch_handler()
+        certificate_batch_handler.set_certificates_in_batch(certificates_to_issue)
+        certificate_handler = certificate_batch_handler.certificate_handler
+        certificate_handler.app_config = mock.Mock(normalization_workers=2)
+        threads_before = set(threading.enumerate())
+        threads_at_fork = []
+
+        def get_byte_arrays_to_issue(certificates_metadata):
+            certificates_metadata = list(certificates_metadata)
+            threads_at_fork.append((threading.current_thread(), set(threading.enumerate())))
+            return [certificate_handler.get_byte_array_to_issue(metadata) for metadata in certificates_metadata]
+
+        with patch.object(certificate_handler, 'get_byte_arrays_to_issue', side_effect=get_byte_arrays_to_issue):
+            result = certificate_batch_handler.prepare_batch()
+        self.assertEqual(
+                b2h(result), '0932f1d2e98219f7d7452801e2b64ebd9e5c005539db12d9b1ddabe7834d9044')
+        self.assertEqual(threads_at_fork, [(threading.current_thread(), threads_before)])
+
+    def test_batch_handler_prepare_batch_stops_validating_at_invalid_certificate(self):
+        certificate_batch_handler, certificates_to_issue = self._get_certificate_batch_handler()
+        certificate_batch_handler.set_certificates_in_batch(certificates_to_issue)
+
+        with patch.object(DummyCertificateHandler, 'validate_certificate',
+                          side_effect=ValueError('invalid certificate')) as validate_certificate:
+            with self.assertRaises(ValueError):
+                certificate_batch_handler.prepare_batch()
+
+        self.assertEqual(validate_certificate.call_count, 1)
+        self.assertEqual(certificate_batch_handler.certificate_handler.counter, 0)
+
+    def test_batch_handler_prepare_batch_reports_every_invalid_certificate(self):
+        certificate_batch_handler, certificates_to_issue = self._get_certificate_batch_handler()
+        certificate_batch_handler.config.report_all_invalid_certificates = True
+        certificate_batch_handler.set_certificates_in_batch(certificates_to_issue)
+
+        with patch.object(DummyCertificateHandler, 'validate_certificate', side_effect=ValueError('invalid certificate')):
+            with self.assertRaises(InvalidCertificatesError) as context:
+                certificate_batch_handler.prepare_batch()
+
+        self.assertEqual([report.uid for report in context.exception.reports], ['1', '2', '3'])
+        self.assertEqual(certificate_batch_handler.certificate_handler.counter, 0)
+        self.assertFalse(certificate_batch_handler.secret_manager.start.called)
+
     def test_batch_web_handler_finish_batch(self):
         certificate_batch_handler, certificates_to_issue = self._get_certificate_batch_web_handler()
 
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+import mock
+
+from cert_issuer.certificate_writer import CertificateWriter
+
+
+class TestCertificateWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _file_name(self, index):
+        return os.path.join(self.tmp_dir.name, '{}.json'.format(index))
+
+    def test_writes_all_files(self):
+        writer = CertificateWriter(writers=3)
+        for index in range(500):
+            writer.write(self._file_name(index), '{"index": %d}' % index)
+        writer.flush()
+        self.assertEqual(len(os.listdir(self.tmp_dir.name)), 500)
+        for index in range(500):
+            with open(self._file_name(index)) as written_file:
+                self.assertEqual(written_file.read(), '{"index": %d}' % index)
+
+    def test_writer_can_be_reused(self):
+        writer = CertificateWriter()
+        writer.write(self._file_name(0), 'first')
+        writer.flush()
+        writer.write(self._file_name(0), 'second')
+        writer.flush()
+        with open(self._file_name(0)) as written_file:
+            self.assertEqual(written_file.read(), 'second')
+
+    def test_flush_raises_write_error(self):
+        writer = CertificateWriter(writers=2)
+        with mock.patch('cert_issuer.certificate_writer.os.replace', side_effect=OSError('disk full')):
+            for index in range(10):
+                writer.write(self._file_name(index), 'content')
+            with self.assertRaises(OSError):
+                writer.flush()
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+    def test_flush_without_writes(self):
+        CertificateWriter().flush()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from cert_issuer.connectivity import ConnectivityGate, OFFLINE, ONLINE, create_connectivity_gate
+from cert_issuer.signer import FileSecretManager
+
+
+class FakeProbe(object):
+    def __init__(self, states):
+        self.states = list(states)
+        self.calls = 0
+
+    def is_online(self):
+        self.calls += 1
+        return self.states.pop(0) if len(self.states) > 1 else self.states[0]
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+        self.on_sleep = None
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        if self.on_sleep is not None:
+            self.on_sleep(self.now)
+
+
+class TestConnectivityGate(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.key_path = os.path.join(self.directory, 'pk_issuer.txt')
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _gate(self, probe):
+        return ConnectivityGate(probe, key_poll_interval=0.25, probe_interval=2, clock=self.clock,
+                                sleep=self.clock.sleep)
+
+    def _write_key(self):
+        with open(self.key_path, 'w') as f:
+            f.write('key')
+
+    def test_passes_without_waiting_when_ready(self):
+        self._write_key()
+        gate = self._gate(FakeProbe([False]))
+        self.assertEqual(gate.wait_until_offline(self.key_path), 0)
+        self.assertEqual(gate.metrics.to_dict()[OFFLINE]['count'], 1)
+
+    def test_reacts_to_the_key_file_without_probing(self):
+        probe = FakeProbe([False])
+        gate = self._gate(probe)
+
+        def plug_in_key(now):
+            if now >= 1 and not os.path.exists(self.key_path):
+                self._write_key()
+        self.clock.on_sleep = plug_in_key
+
+        with mock.patch('builtins.print'):
+            blocked = gate.wait_until_offline(self.key_path)
+        self.assertEqual(blocked, 1)
+        self.assertEqual(probe.calls, 1)
+
+    def test_probes_until_online_once_key_is_unplugged(self):
+        probe = FakeProbe([False, False, True])
+        gate = self._gate(probe)
+        with mock.patch('builtins.print') as prompt:
+            blocked = gate.wait_until_online(self.key_path)
+        self.assertEqual(blocked, 4)
+        self.assertEqual(probe.calls, 3)
+        prompt.assert_called_once()
+        metrics = gate.metrics.to_dict()
+        self.assertEqual(metrics[ONLINE], {'count': 1, 'total': 4, 'max': 4, 'last': 4})
+        self.assertEqual(metrics[OFFLINE]['count'], 0)
+
+    def test_secret_manager_uses_the_gate(self):
+        self._write_key()
+        gate = mock.Mock()
+        secret_manager = FileSecretManager(None, self.key_path, safe_mode=True, connectivity_gate=gate)
+        secret_manager.start()
+        gate.wait_until_offline.assert_called_once_with(self.key_path)
+        self.assertEqual(secret_manager.wif, 'key')
+        secret_manager.stop()
+        gate.wait_until_online.assert_called_once_with(self.key_path)
+        self.assertIsNone(secret_manager.wif)
+
+    def test_create_from_config(self):
+        app_config = mock.Mock(connectivity_probe_urls=['http://localhost:1'], connectivity_probe_timeout=0.5,
+                               key_poll_interval=0.1)
+        gate = create_connectivity_gate(app_config)
+        self.assertEqual(gate.probe.urls, ['http://localhost:1'])
+        self.assertEqual(gate.probe.timeout, 0.5)
+        self.assertEqual(gate.key_poll_interval, 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,7 +7,12 @@ from bitcoin.wallet import P2PKHBitcoinAddress
 from mock import patch
 from pycoin.encoding.hexbytes import b2h
 
-from cert_issuer.blockchain_handlers.bitcoin.connectors import BitcoindConnector
+from cert_core import Chain
+
+from cert_issuer import config
+from cert_issuer.blockchain_handlers.bitcoin import connectors
+from cert_issuer.blockchain_handlers.bitcoin.connectors import BitcoindConnector, BlockcypherProvider, \
+    get_providers_for_chain
 
 TESTNET_TX = '010000000137e6a590428144e64cf008beb6e3193efee5a1a4ddfbbd48d10a12025b88c23c00000000fd5d0100473044022024959a1439e7e364c32f012a7e46dfa2d8cfa036ccdf230e9b3642fb9cdd4341022048292d0dbed226fadeae36b20627b50a3351456f164cae2923dba897995843c701483045022100e6dbcfb4ae35322e5c05688a6afcb144ab347654c217c9a3b2e963c2447418e702205cb639b549c7a9eace7d59ff2ce7c23167d60a214e6c9c011ce93317063850de014cc95241048aa0d470b7a9328889c84ef0291ed30346986e22558e80c3ae06199391eae21308a00cdcfb34febc0ea9c80dfd16b01f26c7ec67593cb8ab474aca8fa1d7029d4104cf54956634c4d0bdaf00e6b1871c089b7a892d0fecc077f03b91e8d4d146861b0a4fdd237891a9819c878984d4b123f6fe92d9bbc05873a1bb4fe510145bf369410471843c33b2971e4944c73d4500abd6f61f7edf9ec919c408cbe12a6c9132d2cb8ebed8253322760d5ec6081165e0ab68900683de503f1544f03816d47fec699a53aeffffffff09d29e91010000000017a9145629021f7668d4ec310ac5e99701a6d6cf95eb8f8727ed19190000000017a9145629021f7668d4ec310ac5e99701a6d6cf95eb8f874eda33320000000017a9145629021f7668d4ec310ac5e99701a6d6cf95eb8f879db467640000000017a9145629021f7668d4ec310ac5e99701a6d6cf95eb8f87a43d23030000000017a9145629021f7668d4ec310ac5e99701a6d6cf95eb8f87497b46060000000017a9145629021f7668d4ec310ac5e99701a6d6cf95eb8f87d29e91010000000017a9145629021f7668d4ec310ac5e99701a6d6cf95eb8f8793f68c0c0000000017a9145629021f7668d4ec310ac5e99701a6d6cf95eb8f8716400e00000000001976a9146efcf883b4b6f9997be9a0600f6c095fe2bd2d9288ac00000000'
 MAINNET_TX = '0100000001ce379123234bc9662f3f00f2a9c59d5420fc9f9d5e1fd8881b8666e8c9def133000000006a473044022032d2d9c2a67d90eb5ea32d9a5e935b46080d4c62a1d53265555c78775e8f6f2102205c3469593995b9b76f8d24aa4285a50b72ca71661ca021cd219883f1a8f14abe012103704cf7aa5e4152639617d0b3f8bcd302e231bbda13b468cba1b12aa7be14f3b3ffffffff07be0a0000000000001976a91464799d48941b0fbfdb4a7ee6340840fb2eb5c2c388acbe0a0000000000001976a914c615ecb52f6e877df0621f4b36bdb25410ec22c388acbe0a0000000000001976a9144e9862ff1c4041b7d083fe30cf5f68f7bedb321b88acbe0a0000000000001976a914413df7bf4a41f2e8a1366fcf7352885e6c88964b88acbe0a0000000000001976a914fabc1ff527531581b4a4c58f13bd088e274122bc88acbb810000000000001976a914fcbe34aa288a91eab1f0fe93353997ec6aa3594088ac0000000000000000226a2068f3ede17fdb67ffd4a5164b5687a71f9fbb68da803b803935720f2aa38f772800000000'
@@ -76,5 +81,31 @@ class TestConnectors(unittest.TestCase):
         #    self.assertEqual(balance, 49005500)
 
 
+class TestProviderFactory(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.dict(connectors.connectors, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_providers_are_built_once_per_chain(self):
+        with patch.object(connectors, 'create_providers_for_chain',
+                          side_effect=lambda chain: [chain]) as create_providers:
+            self.assertEqual(get_providers_for_chain(Chain.bitcoin_mainnet), [Chain.bitcoin_mainnet])
+            self.assertIs(get_providers_for_chain(Chain.bitcoin_mainnet), get_providers_for_chain(Chain.bitcoin_mainnet))
+            get_providers_for_chain(Chain.bitcoin_testnet)
+        self.assertEqual(create_providers.call_count, 2)
+
+    def test_providers_read_config_on_first_use(self):
+        app_config = type('AppConfig', (object,), {'blockcypher_api_token': 'token'})()
+        with patch.object(config, 'CONFIG', app_config):
+            providers = get_providers_for_chain(Chain.bitcoin_testnet)
+        blockcypher = [provider for provider in providers if isinstance(provider, BlockcypherProvider)]
+        self.assertEqual(blockcypher[0].api_token, 'token')
+
+    def test_unsupported_chain(self):
+        with self.assertRaises(KeyError):
+            get_providers_for_chain(Chain.bitcoin_regtest)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import mock
+
+from cert_issuer import daemon
+from cert_issuer.daemon import IssuanceDaemon
+from cert_issuer.merkle_tree_generator import MerkleTreeGenerator
+
+
+class TestIssuanceDaemon(unittest.TestCase):
+    def setUp(self):
+        self.spool_dir = tempfile.mkdtemp()
+        self.app_config = mock.Mock(unsigned_certificates_dir='/unused')
+        self.batch_handler = mock.Mock()
+        self.transaction_handler = mock.Mock()
+        self.daemon = IssuanceDaemon(self.app_config, self.batch_handler, self.transaction_handler,
+                                     self.spool_dir, poll_interval=0.01)
+
+    def tearDown(self):
+        shutil.rmtree(self.spool_dir)
+
+    def _add_batch(self, name, mtime):
+        path = os.path.join(self.spool_dir, name)
+        os.makedirs(path)
+        with open(os.path.join(path, 'cert.json'), 'w') as f:
+            f.write('{}')
+        os.utime(path, (mtime, mtime))
+        return path
+
+    @mock.patch.object(daemon, 'issue', side_effect=['txid', Exception('no money')])
+    def test_issues_batches_in_arrival_order_with_the_same_handlers(self, issue):
+        self._add_batch('b', 100)
+        self._add_batch('a', 200)
+        with open(os.path.join(self.spool_dir, 'not_a_batch.json'), 'w') as f:
+            f.write('{}')
+
+        self.assertEqual(self.daemon.process_pending(), 2)
+
+        batch_dirs = [call[0][0].unsigned_certificates_dir for call in issue.call_args_list]
+        self.assertEqual(batch_dirs, [os.path.join(self.spool_dir, 'b'), os.path.join(self.spool_dir, 'a')])
+        for call in issue.call_args_list:
+            self.assertIs(call[0][1], self.batch_handler)
+            self.assertIs(call[0][2], self.transaction_handler)
+        self.assertEqual(self.app_config.unsigned_certificates_dir, '/unused')
+        self.assertTrue(os.path.isfile(os.path.join(self.spool_dir, daemon.DONE_DIR, 'b', 'cert.json')))
+        self.assertTrue(os.path.isfile(os.path.join(self.spool_dir, daemon.FAILED_DIR, 'a', 'cert.json')))
+        self.assertEqual(self.daemon.get_pending_batches(), [])
+
+    @mock.patch.object(daemon, 'issue', return_value='txid')
+    def test_keeps_batches_with_the_same_name(self, issue):
+        self._add_batch('batch', 100)
+        self.daemon.process_pending()
+        self._add_batch('batch', 100)
+        self.daemon.process_pending()
+        self.assertEqual(sorted(os.listdir(os.path.join(self.spool_dir, daemon.DONE_DIR))), ['batch', 'batch.1'])
+
+    @mock.patch.object(daemon, 'issue', return_value='txid')
+    def test_run_picks_up_new_batches_until_stopped(self, issue):
+        thread = threading.Thread(target=self.daemon.run)
+        thread.start()
+        try:
+            self._add_batch('batch', time.time())
+            for _ in range(200):
+                if issue.called:
+                    break
+                time.sleep(0.01)
+        finally:
+            self.daemon.stop()
+            thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(issue.call_count, 1)
+
+    def test_merkle_tree_generator_is_reusable(self):
+        generator = MerkleTreeGenerator()
+        generator.populate([b'first'])
+        first_root = generator.get_blockchain_data()
+        generator.reset()
+        generator.populate([b'second'])
+        self.assertNotEqual(generator.get_blockchain_data(), first_root)
+        generator.reset()
+        generator.populate([b'first'])
+        self.assertEqual(generator.get_blockchain_data(), first_root)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+
+import mock
+
+from cert_issuer import digests
+from cert_issuer.digests import DigestIndex
+
+CONTEXT_DIGESTS = {
+    'digestSRI': {'sha384': 'sri-digest'},
+    'digestMultibase': {'sha256': 'uMultibaseDigest'}
+}
+
+
+class TestDigestIndex(unittest.TestCase):
+    def setUp(self):
+        loader_patcher = mock.patch.object(digests, 'preloaded_context_document_loader', return_value={'document': {}})
+        digests_patcher = mock.patch.object(digests, 'get_context_digests', return_value=CONTEXT_DIGESTS)
+        self.loader = loader_patcher.start()
+        self.get_context_digests = digests_patcher.start()
+        self.addCleanup(loader_patcher.stop)
+        self.addCleanup(digests_patcher.stop)
+
+    def test_resolves_each_resource_once(self):
+        index = DigestIndex()
+        for _ in range(10):
+            self.assertEqual(index.get_digests('https://example.org/context'), CONTEXT_DIGESTS)
+        self.assertEqual(self.loader.call_count, 1)
+        self.assertEqual(self.get_context_digests.call_count, 1)
+
+    def test_prefetch_resolves_unique_resources(self):
+        index = DigestIndex()
+        resource_ids = ['https://example.org/context/{}'.format(number % 5) for number in range(20)]
+        index.prefetch(resource_ids)
+        self.assertEqual(self.loader.call_count, 5)
+        for resource_id in resource_ids:
+            index.get_digests(resource_id)
+        self.assertEqual(self.loader.call_count, 5)
+
+    def test_prefetch_reuses_its_workers_until_cleared(self):
+        index = DigestIndex()
+        index.prefetch(['https://example.org/context/1', 'https://example.org/context/2'])
+        executor = index.executor
+        index.prefetch(['https://example.org/context/3', 'https://example.org/context/4'])
+        self.assertIs(index.executor, executor)
+        self.assertEqual(self.loader.call_count, 4)
+
+        index.clear()
+        self.assertIsNone(index.executor)
+        with self.assertRaises(RuntimeError):
+            executor.submit(index.get_digests, 'https://example.org/context/5')
+        index.prefetch(['https://example.org/context/1', 'https://example.org/context/2'])
+        self.assertIsNotNone(index.executor)
+        self.assertEqual(self.loader.call_count, 6)
+        index.clear()
+
+    def test_prefetch_leaves_errors_to_verification(self):
+        def load_document(url):
+            if 'missing' in url:
+                raise IOError('unreachable')
+            return {'document': {}}
+        self.loader.side_effect = load_document
+        index = DigestIndex()
+        index.prefetch(['https://example.org/missing', 'https://example.org/context'])
+        self.assertEqual(index.get_digests('https://example.org/context'), CONTEXT_DIGESTS)
+        with self.assertRaises(IOError):
+            index.get_digests('https://example.org/missing')
+
+    def test_failures_are_resolved_once_per_batch(self):
+        self.loader.side_effect = IOError('unreachable')
+        index = DigestIndex()
+        index.prefetch(['https://example.org/missing', 'https://example.org/other'])
+        for _ in range(3):
+            with self.assertRaises(IOError):
+                index.get_digests('https://example.org/missing')
+        self.assertEqual(self.loader.call_count, 2)
+
+        index.clear_failures()
+        self.loader.side_effect = None
+        self.assertEqual(index.get_digests('https://example.org/missing'), CONTEXT_DIGESTS)
+        self.assertEqual(self.loader.call_count, 3)
+        index.clear()
+
+    def test_validate_digests_against_index(self):
+        with mock.patch.object(digests, 'digest_index', DigestIndex()):
+            digests.validate_digest_sri('https://example.org/context', 'sha384-sri-digest')
+            digests.validate_digest_multibase('https://example.org/context', 'uMultibaseDigest')
+            with self.assertRaises(ValueError):
+                digests.validate_digest_sri('https://example.org/context', 'sha384-other-digest')
+            with self.assertRaises(ValueError):
+                digests.validate_digest_multibase('https://example.org/context', 'uOtherDigest')
+        self.assertEqual(self.loader.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
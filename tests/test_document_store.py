@@ -0,0 +1,56 @@
+import json
+import os
+import tempfile
+import unittest
+
+import mock
+
+from cert_issuer.document_store import DocumentStore
+
+
+class TestDocumentStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_names = []
+        for index in range(3):
+            file_name = os.path.join(self.tmp_dir.name, '{}.json'.format(index))
+            with open(file_name, 'w') as document_file:
+                json.dump({'index': index}, document_file)
+            self.file_names.append(file_name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_get_parses_file_once(self):
+        store = DocumentStore()
+        with mock.patch('cert_issuer.document_store.json.load', wraps=json.load) as mock_load:
+            self.assertEqual(store.get(self.file_names[0]), {'index': 0})
+            self.assertEqual(store.get(self.file_names[0]), {'index': 0})
+        self.assertEqual(mock_load.call_count, 1)
+
+    def test_release_reloads_from_file(self):
+        store = DocumentStore()
+        store.get(self.file_names[0])['proof'] = 'proof'
+        store.release(self.file_names[0])
+        self.assertEqual(store.get(self.file_names[0]), {'index': 0})
+
+    def test_spill_to_disk(self):
+        spill_dir = os.path.join(self.tmp_dir.name, 'document_store')
+        store = DocumentStore(spill_dir, max_documents_in_memory=1)
+        for index, file_name in enumerate(self.file_names):
+            self.assertEqual(store.get(file_name), {'index': index})
+        self.assertEqual(len(store.documents), 1)
+        self.assertEqual(len(os.listdir(spill_dir)), 2)
+
+        with mock.patch('cert_issuer.document_store.json.load') as mock_load:
+            self.assertEqual(store.get(self.file_names[2]), {'index': 2})
+        mock_load.assert_not_called()
+
+        store.release(self.file_names[2])
+        self.assertEqual(len(os.listdir(spill_dir)), 1)
+        store.clear()
+        self.assertFalse(os.path.exists(spill_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
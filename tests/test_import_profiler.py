@@ -0,0 +1,70 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from cert_issuer.import_profiler import ImportProfiler, profile_import_requested
+
+CHECK_LOADED_MODULES = """
+import sys
+from cert_issuer import config, issue_certificates
+from cert_issuer.blockchain_handlers import {}
+print(','.join(sorted(name for name in ('bitcoin', 'pycoin', 'web3') if name in sys.modules)))
+"""
+
+
+class TestImportProfiler(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        with open(os.path.join(self.path, 'profiled_parent.py'), 'w') as f:
+            f.write('import profiled_child\n')
+        with open(os.path.join(self.path, 'profiled_child.py'), 'w') as f:
+            f.write('VALUE = 1\n')
+        sys.path.insert(0, self.path)
+
+    def tearDown(self):
+        sys.path.remove(self.path)
+        for name in ('profiled_parent', 'profiled_child'):
+            sys.modules.pop(name, None)
+        shutil.rmtree(self.path)
+
+    def test_reports_self_and_cumulative_time(self):
+        profiler = ImportProfiler()
+        profiler.install()
+        try:
+            import profiled_parent
+        finally:
+            profiler.uninstall()
+
+        self.assertEqual(profiled_parent.profiled_child.VALUE, 1)
+        self.assertNotIn(profiler, sys.meta_path)
+        self.assertNotIn('exec_module', vars(profiled_parent.__spec__.loader))
+        report = {name: (self_time, cumulative) for name, self_time, cumulative in profiler.get_report()}
+        self.assertEqual(set(report), {'profiled_parent', 'profiled_child'})
+        parent_self, parent_cumulative = report['profiled_parent']
+        self.assertGreaterEqual(parent_cumulative, report['profiled_child'][1] + parent_self - 1e-9)
+        self.assertIn('profiled_child', profiler.format_report())
+
+    def test_profile_import_requested(self):
+        self.assertTrue(profile_import_requested(['--chain', 'mockchain', '--profile-import']))
+        self.assertTrue(profile_import_requested(['--profile_import']))
+        self.assertFalse(profile_import_requested(['--chain', 'mockchain'], environ={}))
+        self.assertTrue(profile_import_requested(['--chain', 'mockchain'], environ={'PROFILE_IMPORT': 'true'}))
+        self.assertFalse(profile_import_requested(['--chain', 'mockchain'], environ={'PROFILE_IMPORT': 'false'}))
+
+
+class TestChainImports(unittest.TestCase):
+    def _loaded_chain_modules(self, blockchain_package):
+        output = subprocess.check_output([sys.executable, '-c', CHECK_LOADED_MODULES.format(blockchain_package)],
+                                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        return output.decode('utf-8').strip()
+
+    def test_chain_stacks_are_not_imported_upfront(self):
+        self.assertEqual(self._loaded_chain_modules('bitcoin'), '')
+        self.assertEqual(self._loaded_chain_modules('ethereum'), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
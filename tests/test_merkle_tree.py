@@ -0,0 +1,71 @@
+import hashlib
+import unittest
+
+from cert_issuer.merkle_tree import MerkleTree
+
+
+def _leaf(value):
+    return hashlib.sha256(str(value).encode('utf-8')).digest()
+
+
+def _root_from_proof(target_hash, path):
+    node = bytes.fromhex(target_hash)
+    for step in path:
+        if 'left' in step:
+            node = hashlib.sha256(bytes.fromhex(step['left']) + node).digest()
+        else:
+            node = hashlib.sha256(node + bytes.fromhex(step['right'])).digest()
+    return node.hex()
+
+
+class TestMerkleTree(unittest.TestCase):
+    def test_root(self):
+        tree = MerkleTree()
+        for value in range(1, 4):
+            tree.add_leaf(_leaf(value))
+        tree.make_tree()
+        self.assertEqual(tree.get_merkle_root(), '0932f1d2e98219f7d7452801e2b64ebd9e5c005539db12d9b1ddabe7834d9044')
+
+    def test_single_leaf(self):
+        tree = MerkleTree()
+        tree.add_leaf(_leaf(1))
+        tree.make_tree()
+        self.assertEqual(tree.get_merkle_root(), _leaf(1).hex())
+        self.assertEqual(list(tree.get_proofs()), [(_leaf(1).hex(), [])])
+
+    def test_empty_tree(self):
+        tree = MerkleTree()
+        tree.make_tree()
+        self.assertIsNone(tree.get_merkle_root())
+        self.assertEqual(list(tree.get_proofs()), [])
+
+    def test_proofs_resolve_to_root(self):
+        for leaf_count in range(1, 40):
+            tree = MerkleTree()
+            for value in range(leaf_count):
+                tree.add_leaf(_leaf(value))
+            tree.make_tree()
+            root = tree.get_merkle_root()
+            proofs = list(tree.get_proofs())
+            self.assertEqual(len(proofs), leaf_count)
+            for index, (target_hash, path) in enumerate(proofs):
+                self.assertEqual(target_hash, _leaf(index).hex())
+                self.assertEqual(_root_from_proof(target_hash, path), root)
+
+    def test_add_leaf_after_make_tree(self):
+        tree = MerkleTree()
+        tree.add_leaf(_leaf(1))
+        tree.add_leaf(_leaf(2))
+        tree.make_tree()
+        tree.add_leaf(_leaf(3))
+        tree.make_tree()
+        self.assertEqual(tree.get_merkle_root(), '0932f1d2e98219f7d7452801e2b64ebd9e5c005539db12d9b1ddabe7834d9044')
+
+    def test_rejects_invalid_leaf(self):
+        tree = MerkleTree()
+        with self.assertRaises(ValueError):
+            tree.add_leaf(b'not a digest')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,12 @@
+import json
+import logging
 import unittest
 
 from cert_core import Chain
 from pycoin.encoding.hexbytes import b2h
 
 from cert_issuer.merkle_tree_generator import MerkleTreeGenerator
+from cert_issuer.proof_suites.merkle_proof_2019 import MerkleProof2019BatchEncoder
 from cert_issuer import helpers
 from lds_merkle_proof_2019.merkle_proof_2019 import MerkleProof2019
 
@@ -36,6 +39,35 @@ class TestMerkleTreeGenerator(unittest.TestCase):
     def test_proofs_mock(self):
         self.do_test_signature(Chain.mockchain, 'mockchain', 'Mock')
 
+    def test_batch_encoder_matches_merkle_proof_2019(self):
+        merkle_tree_generator = MerkleTreeGenerator()
+        merkle_tree_generator.populate(str(num).encode('utf-8') for num in range(37))
+        _ = merkle_tree_generator.get_blockchain_data()
+        root = merkle_tree_generator.tree.get_merkle_root()
+        for chain in [Chain.bitcoin_mainnet, Chain.ethereum_sepolia, Chain.mockchain]:
+            anchors = [helpers.tx_to_blink(chain, '8087c03e7b7bc9ca7b355de9d9d8165cc5c76307f337f0deb8a204d002c8e582')]
+            encoder = MerkleProof2019BatchEncoder(root, anchors)
+            for target_hash, path in merkle_tree_generator.tree.get_proofs():
+                expected = MerkleProof2019().encode({
+                    'path': path,
+                    'merkleRoot': root,
+                    'targetHash': target_hash,
+                    'anchors': anchors
+                })
+                self.assertEqual(encoder.encode(path, target_hash), expected)
+
+    def test_proofs_debug_sink(self):
+        merkle_tree_generator = MerkleTreeGenerator()
+        merkle_tree_generator.populate(get_test_data_generator())
+        _ = merkle_tree_generator.get_blockchain_data()
+        proof_logger = logging.getLogger('cert_issuer.proofs')
+        with self.assertLogs(proof_logger, level=logging.DEBUG) as logs:
+            list(merkle_tree_generator.get_proof_generator(
+                '8087c03e7b7bc9ca7b355de9d9d8165cc5c76307f337f0deb8a204d002c8e582', Chain.mockchain))
+        self.assertEqual(len(logs.records), 3)
+        self.assertEqual(json.loads(logs.records[0].getMessage())['targetHash'],
+                         '6b86b273ff34fce19d6b804eff5a3f5747ada4eaa22f1d49c01e52ddb7875b4b')
+
     def do_test_signature(self, chain, display_chain, type):
         merkle_tree_generator = MerkleTreeGenerator()
         merkle_tree_generator.populate(get_test_data_generator())
@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+
+from cert_issuer.normalization_cache import NormalizationCache
+
+
+class TestNormalizationCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp_dir.name, 'normalization_cache')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_key_depends_on_content_and_contexts(self):
+        key = NormalizationCache.key_for({'a': 1, 'b': 2}, 'fingerprint')
+        self.assertEqual(key, NormalizationCache.key_for({'b': 2, 'a': 1}, 'fingerprint'))
+        self.assertNotEqual(key, NormalizationCache.key_for({'a': 1, 'b': 3}, 'fingerprint'))
+        self.assertNotEqual(key, NormalizationCache.key_for({'a': 1, 'b': 2}, 'other fingerprint'))
+
+    def test_get_set(self):
+        cache = NormalizationCache(self.cache_dir, 1024)
+        key = NormalizationCache.key_for({'a': 1}, 'fingerprint')
+        self.assertIsNone(cache.get(key))
+        cache.set(key, b'normalized')
+        self.assertEqual(cache.get(key), b'normalized')
+        self.assertEqual(NormalizationCache(self.cache_dir, 1024).get(key), b'normalized')
+
+    def test_evicts_least_recently_used(self):
+        cache = NormalizationCache(self.cache_dir, 25)
+        keys = [NormalizationCache.key_for({'index': index}, 'fingerprint') for index in range(3)]
+        cache.set(keys[0], b'0123456789')
+        cache.set(keys[1], b'0123456789')
+        os.utime(cache._path_for(keys[0]), ns=(1, 1))
+        os.utime(cache._path_for(keys[1]), ns=(2, 2))
+        cache.set(keys[2], b'0123456789')
+        self.assertIsNone(cache.get(keys[0]))
+        self.assertEqual(cache.get(keys[1]), b'0123456789')
+        self.assertEqual(cache.get(keys[2]), b'0123456789')
+        self.assertEqual(cache.size, 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
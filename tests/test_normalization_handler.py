@@ -0,0 +1,106 @@
+import copy
+import json
+import os
+import tempfile
+import unittest
+
+from mock import patch
+
+from cert_issuer.normalization_cache import NormalizationCache
+from cert_issuer.normalization_handler import JSONLDHandler, ContextRegistry
+
+
+def _certificate_helper(name):
+    return {
+        '@context': [
+            'https://www.w3.org/2018/credentials/v1',
+            'https://w3id.org/blockcerts/v3'
+        ],
+        'id': 'urn:uuid:bbba8553-8ec1-445f-82c9-a57251dd731c',
+        'type': [
+            'VerifiableCredential',
+            'BlockcertsCredential'
+        ],
+        'issuer': 'https://www.blockcerts.org/samples/3.0/issuer-blockcerts.json',
+        'issuanceDate': '2022-08-18T14:04:24Z',
+        'credentialSubject': {
+            'id': 'did:example:ebfeb1f712ebc6f1c276e12ec21',
+            'name': name
+        }
+    }
+
+
+@patch('cert_issuer.normalization_handler.get_config', return_value=None)
+class TestJSONLDHandler(unittest.TestCase):
+    def test_normalize_batch_serial(self, mock_config):
+        certificates = [_certificate_helper(name) for name in ['Alice', 'Bob']]
+        result = list(JSONLDHandler.normalize_batch_to_utf8(certificates))
+        self.assertEqual(result, [JSONLDHandler.normalize_to_utf8(c) for c in certificates])
+
+    def test_normalize_batch_parallel_preserves_order(self, mock_config):
+        certificates = [_certificate_helper('Name {}'.format(i)) for i in range(10)]
+        expected = [JSONLDHandler.normalize_to_utf8(copy.deepcopy(c)) for c in certificates]
+        result = list(JSONLDHandler.normalize_batch_to_utf8(certificates, workers=2))
+        self.assertEqual(result, expected)
+
+    def test_normalize_batch_parallel_empty(self, mock_config):
+        self.assertEqual(list(JSONLDHandler.normalize_batch_to_utf8([], workers=2)), [])
+
+    def test_normalize_batch_parallel_with_cache(self, mock_config):
+        certificates = [_certificate_helper('Name {}'.format(i)) for i in range(4)]
+        expected = [JSONLDHandler.normalize_to_utf8(copy.deepcopy(c)) for c in certificates]
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = NormalizationCache(cache_dir, 1024 * 1024)
+            JSONLDHandler.normalize_to_utf8(certificates[1], cache)
+            result = list(JSONLDHandler.normalize_batch_to_utf8(certificates, workers=2, cache=cache))
+            self.assertEqual(result, expected)
+            with patch('cert_issuer.normalization_handler.normalize_jsonld') as mock_normalize:
+                result = list(JSONLDHandler.normalize_batch_to_utf8(certificates, workers=2, cache=cache))
+            self.assertEqual(result, expected)
+            mock_normalize.assert_not_called()
+
+
+class TestContextRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.context_path = os.path.join(self.tmp_dir.name, 'context.json')
+        self._write_context({'@context': {'name': 'https://schema.org/name'}})
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _write_context(self, context, mtime_ns=None):
+        with open(self.context_path, 'w') as context_file:
+            json.dump(context, context_file)
+        if mtime_ns is not None:
+            os.utime(self.context_path, ns=(mtime_ns, mtime_ns))
+
+    @patch('cert_issuer.normalization_handler.extend_preloaded_context')
+    def test_load_registers_context_once(self, mock_extend):
+        registry = ContextRegistry()
+        registry.load(['https://example.com/context'], [self.context_path])
+        registry.load(['https://example.com/context'], [self.context_path])
+        mock_extend.assert_called_once_with('https://example.com/context',
+                                            {'@context': {'name': 'https://schema.org/name'}})
+
+    @patch('cert_issuer.normalization_handler.extend_preloaded_context')
+    def test_load_reloads_changed_context(self, mock_extend):
+        registry = ContextRegistry()
+        registry.load(['https://example.com/context'], [self.context_path])
+        fingerprint = registry.fingerprint()
+        self._write_context({'@context': {'email': 'https://schema.org/email'}}, mtime_ns=1)
+        registry.load(['https://example.com/context'], [self.context_path])
+        self.assertEqual(mock_extend.call_count, 2)
+        self.assertNotEqual(registry.fingerprint(), fingerprint)
+
+    @patch('cert_issuer.normalization_handler.extend_preloaded_context')
+    def test_load_skips_touched_unchanged_context(self, mock_extend):
+        registry = ContextRegistry()
+        registry.load(['https://example.com/context'], [self.context_path])
+        self._write_context({'@context': {'name': 'https://schema.org/name'}}, mtime_ns=1)
+        registry.load(['https://example.com/context'], [self.context_path])
+        mock_extend.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import threading
+import unittest
+
+from cert_issuer.pipeline import run_in_background
+
+
+class TestPipeline(unittest.TestCase):
+    def test_preserves_order(self):
+        stage = run_in_background(range(1000), queue_size=4)
+        stage = run_in_background((item * 2 for item in stage), queue_size=4)
+        self.assertEqual(list(stage), [item * 2 for item in range(1000)])
+
+    def test_propagates_error_after_produced_items(self):
+        def failing():
+            yield 1
+            yield 2
+            raise ValueError('invalid certificate')
+
+        consumed = []
+        with self.assertRaises(ValueError):
+            for item in run_in_background(run_in_background(failing())):
+                consumed.append(item)
+        self.assertEqual(consumed, [1, 2])
+
+    def test_stops_producer_when_consumer_stops(self):
+        produced = []
+
+        def producer():
+            for item in range(10000):
+                produced.append(item)
+                yield item
+
+        thread_count = threading.active_count()
+        stage = run_in_background(producer(), queue_size=2)
+        self.assertEqual(next(stage), 0)
+        stage.close()
+        self.assertLess(len(produced), 10)
+        self.assertEqual(threading.active_count(), thread_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+
+from cert_issuer.blockchain_handlers.provider_registry import ProviderRegistry, CLOSED, OPEN, HALF_OPEN
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeProvider(object):
+    def __init__(self, base_url, clock, latency=0.0, error=None):
+        self.base_url = base_url
+        self.clock = clock
+        self.latency = latency
+        self.error = error
+        self.calls = 0
+
+    def get_balance(self, address):
+        self.calls += 1
+        self.clock.now += self.latency
+        if self.error is not None:
+            raise self.error
+        return self.base_url
+
+
+class TestProviderRegistry(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.registry = ProviderRegistry(window_size=10, failure_threshold=2, cooldown=60, clock=self.clock)
+
+    def test_falls_back_to_next_provider(self):
+        providers = [FakeProvider('dead', self.clock, error=IOError('timeout')), FakeProvider('alive', self.clock)]
+        self.assertEqual(self.registry.call(providers, 'get_balance', 'address'), 'alive')
+        stats = self.registry.get_stats()
+        self.assertEqual(stats['FakeProvider(dead)']['error_rate'], 1.0)
+        self.assertEqual(stats['FakeProvider(alive)']['error_rate'], 0.0)
+
+    def test_orders_providers_by_health(self):
+        providers = [FakeProvider('slow', self.clock, latency=2.0), FakeProvider('fast', self.clock, latency=0.1)]
+        self.registry.record(providers[0], True, 2.0)
+        self.registry.record(providers[1], True, 0.1)
+        self.assertEqual(self.registry.call(providers, 'get_balance', 'address'), 'fast')
+        self.assertEqual(providers[0].calls, 0)
+
+    def test_circuit_breaks_failing_provider_for_cooldown(self):
+        dead = FakeProvider('dead', self.clock, error=IOError('timeout'))
+        alive = FakeProvider('alive', self.clock)
+        for _ in range(2):
+            with self.assertRaises(IOError):
+                self.registry.call([dead], 'get_balance', 'address')
+        self.assertEqual(self.registry.get_stats()['FakeProvider(dead)']['state'], OPEN)
+        for _ in range(5):
+            self.assertEqual(self.registry.call([dead, alive], 'get_balance', 'address'), 'alive')
+        self.assertEqual(dead.calls, 2)
+
+        self.clock.now += 60
+        self.assertEqual(self.registry.get_stats()['FakeProvider(dead)']['state'], HALF_OPEN)
+        dead.error = None
+        self.assertEqual(self.registry.call([dead], 'get_balance', 'address'), 'dead')
+        self.assertEqual(self.registry.get_stats()['FakeProvider(dead)']['state'], CLOSED)
+
+    def test_half_open_provider_reopens_on_failure(self):
+        dead = FakeProvider('dead', self.clock, error=IOError('timeout'))
+        for _ in range(2):
+            with self.assertRaises(IOError):
+                self.registry.call([dead], 'get_balance', 'address')
+        self.clock.now += 60
+        with self.assertRaises(IOError):
+            self.registry.call([dead], 'get_balance', 'address')
+        self.assertEqual(self.registry.get_stats()['FakeProvider(dead)']['state'], OPEN)
+
+    def test_tries_every_provider_when_all_circuits_are_open(self):
+        dead = FakeProvider('dead', self.clock, error=IOError('timeout'))
+        for _ in range(2):
+            with self.assertRaises(IOError):
+                self.registry.call([dead], 'get_balance', 'address')
+        dead.error = None
+        self.assertEqual(self.registry.call([dead], 'get_balance', 'address'), 'dead')
+
+    def test_providers_without_endpoint_have_their_own_circuit(self):
+        dead = FakeProvider(None, self.clock, error=IOError('timeout'))
+        alive = FakeProvider(None, self.clock)
+        for _ in range(2):
+            with self.assertRaises(IOError):
+                self.registry.call([dead], 'get_balance', 'address')
+        self.assertEqual(self.registry.call([dead, alive], 'get_balance', 'address'), None)
+        self.assertEqual((dead.calls, alive.calls), (2, 1))
+        states = sorted(stats['state'] for stats in self.registry.get_stats().values())
+        self.assertEqual(states, [CLOSED, OPEN])
+
+    def test_skips_providers_without_method(self):
+        with self.assertRaises(LookupError):
+            self.registry.call([object()], 'get_balance', 'address')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import http.client
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+import web3
+from cert_core import Chain
+
+from cert_issuer.blockchain_handlers.ethereum.signer import EthereumSigner
+from cert_issuer import remote_signer
+from cert_issuer.errors import RemoteSignerError
+from cert_issuer.remote_signer import RemoteSecretManager, SigningServer, decode_value, encode_value
+from cert_issuer.signer import FileSecretManager, FinalizableSigner
+
+PRIVATE_KEY = '0x' + '11' * 32
+
+
+def ethereum_transaction(nonce):
+    return {'nonce': nonce, 'to': web3.Web3.to_checksum_address('0x' + 'de' * 20), 'value': 0, 'gas': 25000,
+            'gasPrice': 20000000000, 'data': b'\x01\x02'}
+
+
+class TestRemoteSigner(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.key_path = os.path.join(self.directory, 'pk_issuer.txt')
+        with open(self.key_path, 'w') as f:
+            f.write(PRIVATE_KEY)
+        self.server_secret_manager = FileSecretManager(EthereumSigner(Chain.ethereum_sepolia), self.key_path,
+                                                       safe_mode=False)
+        self.server = SigningServer(self.server_secret_manager, port=0, token='secret')
+        self.server.start()
+        self.secret_manager = RemoteSecretManager(self.server.url, token='secret')
+
+    def tearDown(self):
+        self.secret_manager.session.close()
+        self.server.close()
+        shutil.rmtree(self.directory)
+
+    def test_signs_like_the_local_signer(self):
+        local_signer = EthereumSigner(Chain.ethereum_sepolia)
+        with FinalizableSigner(self.secret_manager) as signer:
+            signed = signer.sign_transaction(ethereum_transaction(0))
+        self.assertEqual(signed, local_signer.sign_transaction(PRIVATE_KEY, ethereum_transaction(0)))
+        self.assertIsNone(self.secret_manager.wif)
+
+    def test_batches_requests_in_one_round_trip(self):
+        with mock.patch.object(self.server, 'sign', wraps=self.server.sign) as sign, \
+                mock.patch.object(self.secret_manager.session, 'post',
+                                  wraps=self.secret_manager.session.post) as post:
+            signed = self.secret_manager.sign_transactions([ethereum_transaction(nonce) for nonce in range(3)])
+        self.assertEqual(len(set(signed)), 3)
+        self.assertEqual(sign.call_count, 3)
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(len(self.server_secret_manager.signer.keys), 1)
+
+    def test_reports_signing_errors(self):
+        with self.assertRaises(RemoteSignerError):
+            self.secret_manager.sign_transaction('not a transaction')
+
+    def test_rejects_requests_without_the_token(self):
+        unauthorized = RemoteSecretManager(self.server.url, token='wrong')
+        with self.assertRaises(RemoteSignerError):
+            unauthorized.start()
+        unauthorized.session.close()
+
+    def test_rejects_unauthorized_requests_before_reading_them(self):
+        host, port = self.server.httpd.server_address[:2]
+        connection = http.client.HTTPConnection(host, port, timeout=5)
+        connection.putrequest('POST', '/sign')
+        connection.putheader('Authorization', 'Bearer wrong')
+        connection.putheader('Content-Length', str(10 ** 9))
+        connection.endheaders()
+        response = connection.getresponse()
+        self.assertEqual(response.status, 401)
+        self.assertEqual(response.getheader('Connection'), 'close')
+        connection.close()
+
+    def test_refuses_large_requests(self):
+        with mock.patch.object(remote_signer, 'MAX_REQUEST_SIZE', 100), \
+                self.assertRaisesRegex(RemoteSignerError, '413'):
+            self.secret_manager.sign_transactions([ethereum_transaction(nonce) for nonce in range(3)])
+        self.assertEqual(len(self.secret_manager.sign_transactions([ethereum_transaction(0)])), 1)
+
+    def test_checks_the_signer_once_per_outermost_session(self):
+        with mock.patch.object(self.secret_manager.session, 'post', wraps=self.secret_manager.session.post) as post:
+            with FinalizableSigner(self.secret_manager):
+                with FinalizableSigner(self.secret_manager) as signer:
+                    signer.sign_transaction(ethereum_transaction(0))
+                with FinalizableSigner(self.secret_manager) as signer:
+                    signer.sign_transaction(ethereum_transaction(1))
+            self.assertEqual([call[0][0] for call in post.call_args_list],
+                             [self.server.url + '/status', self.server.url + '/sign', self.server.url + '/sign'])
+            with FinalizableSigner(self.secret_manager):
+                pass
+            self.assertEqual(post.call_count, 4)
+        self.assertEqual(self.secret_manager.sessions, 0)
+
+    def test_requires_a_token_to_listen_beyond_loopback(self):
+        with self.assertRaises(ValueError):
+            SigningServer(self.server_secret_manager, host='0.0.0.0', port=0)
+        server = SigningServer(self.server_secret_manager, host='localhost', port=0)
+        server.httpd.server_close()
+
+    def test_locks_the_key_when_closed(self):
+        self.assertEqual(self.server_secret_manager.wif, PRIVATE_KEY)
+        self.server.close()
+        self.assertIsNone(self.server_secret_manager.wif)
+        with self.assertRaises(RemoteSignerError):
+            self.secret_manager.start()
+
+
+class TestRemoteSignerEncoding(unittest.TestCase):
+    def test_bitcoin_transactions_keep_their_unspents(self):
+        from pycoin.coins.bitcoin.Tx import Tx, TxIn, TxOut
+        transaction = Tx(1, [TxIn(b'\x01' * 32, 0)], [TxOut(1000, b'\x6a\x01\x00')])
+        transaction.set_unspents([TxOut(5000, b'\x76\xa9')])
+
+        decoded = decode_value(encode_value(transaction))
+        self.assertEqual(decoded.as_hex(include_unspents=True), transaction.as_hex(include_unspents=True))
+        self.assertEqual(decoded.unspents[0].coin_value, 5000)
+
+    def test_bytes_are_sent_as_hex(self):
+        self.assertEqual(encode_value({'data': b'\xab', 'nonce': 1}),
+                         {'format': 'json', 'payload': {'data': '0xab', 'nonce': 1}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.error import HTTPError, URLError
+
+from jsonschema.exceptions import ValidationError
+
+from cert_issuer.schema_resolver import SchemaResolver
+
+SCHEMA = {
+    '$schema': 'http://json-schema.org/draft-07/schema#',
+    'type': 'object',
+    'required': ['name'],
+    'properties': {
+        'name': {'type': 'string'}
+    }
+}
+
+
+class StubSchemaServer(object):
+    """
+    Local http server serving SCHEMA, counting requests and answering conditional requests
+    """
+    def __init__(self, cache_control='max-age=600'):
+        self.requests = []
+        self.cache_control = cache_control
+        self.error_status = None
+        self.released = threading.Event()
+        self.released.set()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append(self.headers.get('If-None-Match'))
+                server.released.wait(5)
+                if server.error_status is not None:
+                    self.send_response(server.error_status)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if self.headers.get('If-None-Match') == '"v1"':
+                    self.send_response(304)
+                    self.send_header('Cache-Control', server.cache_control)
+                    self.end_headers()
+                    return
+                body = json.dumps(SCHEMA).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/schema+json')
+                self.send_header('ETag', '"v1"')
+                self.send_header('Cache-Control', server.cache_control)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = HTTPServer(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:{}/schema.json'.format(self.httpd.server_address[1])
+        self.thread = threading.Thread(target=self.httpd.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class TestSchemaResolver(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp_dir.name, 'schema_cache')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_fetches_and_compiles_once(self):
+        server = StubSchemaServer()
+        try:
+            resolver = SchemaResolver()
+            validator = resolver.get_validator(server.url)
+            for _ in range(100):
+                self.assertIs(resolver.get_validator(server.url), validator)
+            self.assertEqual(len(server.requests), 1)
+            validator.validate({'name': 'John Smith'})
+            with self.assertRaises(ValidationError):
+                validator.validate({'name': 1})
+        finally:
+            server.stop()
+
+    def test_reuses_disk_cache_across_resolvers(self):
+        server = StubSchemaServer()
+        try:
+            SchemaResolver(self.cache_dir).get_validator(server.url)
+            SchemaResolver(self.cache_dir).get_validator(server.url)
+            self.assertEqual(len(server.requests), 1)
+        finally:
+            server.stop()
+
+    def test_revalidates_expired_entries_with_etag(self):
+        server = StubSchemaServer(cache_control='max-age=0')
+        try:
+            resolver = SchemaResolver(self.cache_dir)
+            validator = resolver.get_validator(server.url)
+            self.assertIs(resolver.get_validator(server.url), validator)
+            self.assertEqual(server.requests, [None, '"v1"'])
+        finally:
+            server.stop()
+
+    def test_uses_stale_entry_when_offline(self):
+        server = StubSchemaServer(cache_control='max-age=0')
+        url = server.url
+        try:
+            SchemaResolver(self.cache_dir).get_validator(url)
+        finally:
+            server.stop()
+        resolver = SchemaResolver(self.cache_dir)
+        self.assertEqual(resolver.get_entry(url).schema, SCHEMA)
+        with self.assertRaises(URLError):
+            SchemaResolver().get_validator(url)
+
+    def test_uses_stale_entry_on_server_errors(self):
+        server = StubSchemaServer(cache_control='max-age=0')
+        try:
+            SchemaResolver(self.cache_dir).get_validator(server.url)
+            server.error_status = 503
+            self.assertEqual(SchemaResolver(self.cache_dir).get_entry(server.url).schema, SCHEMA)
+            with self.assertRaises(HTTPError):
+                SchemaResolver().get_entry(server.url)
+            server.error_status = 404
+            with self.assertRaises(HTTPError):
+                SchemaResolver(self.cache_dir).get_entry(server.url)
+        finally:
+            server.stop()
+
+    def test_slow_schema_host_does_not_block_other_lookups(self):
+        schema_path = os.path.join(self.tmp_dir.name, 'schema.json')
+        with open(schema_path, 'w') as schema_file:
+            json.dump(SCHEMA, schema_file)
+        resolver = SchemaResolver()
+        resolver.configure(None, ['https://example.org/schema.json'], [schema_path])
+        resolver.get_entry('file://' + schema_path)
+
+        server = StubSchemaServer()
+        server.released.clear()
+        try:
+            slow_lookup = threading.Thread(target=resolver.get_entry, args=(server.url,))
+            slow_lookup.start()
+            while not server.requests:
+                slow_lookup.join(0.01)
+            self.assertEqual(resolver.get_entry('https://example.org/schema.json').schema, SCHEMA)
+            self.assertEqual(resolver.get_entry('file://' + schema_path).schema, SCHEMA)
+            self.assertTrue(slow_lookup.is_alive())
+            server.released.set()
+            slow_lookup.join(5)
+            self.assertEqual(resolver.get_entry(server.url).schema, SCHEMA)
+            self.assertEqual(len(server.requests), 1)
+        finally:
+            server.released.set()
+            server.stop()
+
+    def test_preloads_schemas_from_local_files(self):
+        schema_path = os.path.join(self.tmp_dir.name, 'schema.json')
+        with open(schema_path, 'w') as schema_file:
+            json.dump(SCHEMA, schema_file)
+        resolver = SchemaResolver()
+        resolver.configure(None, ['https://example.org/schema.json'], [schema_path])
+        validator = resolver.get_validator('https://example.org/schema.json')
+        validator.validate({'name': 'John Smith'})
+        resolver.configure(None, ['https://example.org/schema.json'], [schema_path])
+        self.assertIs(resolver.get_validator('https://example.org/schema.json'), validator)
+
+    def test_evicts_least_recently_used(self):
+        resolver = SchemaResolver(max_entries=2)
+        for index in range(3):
+            schema_path = os.path.join(self.tmp_dir.name, 'schema-{}.json'.format(index))
+            with open(schema_path, 'w') as schema_file:
+                json.dump(SCHEMA, schema_file)
+            resolver.get_entry('file://' + schema_path)
+        self.assertEqual(len(resolver.entries), 2)
+        self.assertNotIn('file://' + os.path.join(self.tmp_dir.name, 'schema-0.json'), resolver.entries)
+
+
+if __name__ == '__main__':
+    unittest.main()
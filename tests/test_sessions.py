@@ -0,0 +1,104 @@
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import mock
+
+from cert_issuer.blockchain_handlers import sessions
+from cert_issuer.blockchain_handlers.bitcoin.connectors import BlockstreamBroadcaster
+from cert_issuer.blockchain_handlers.ethereum.connectors import EtherscanBroadcaster
+from cert_issuer.blockchain_handlers.sessions import create_session, create_session_from_config
+
+
+class StubApiServer(object):
+    """
+    Local keep-alive http server answering with the queued (status, body) responses, then with 200 responses
+    """
+    def __init__(self):
+        self.requests = []
+        self.client_ports = set()
+        self.responses = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def handle_request(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(length).decode('utf-8') if length else None
+                server.requests.append((self.command, self.path, body))
+                server.client_ports.add(self.client_address[1])
+                status, response_body = server.responses.pop(0) if server.responses else (200, '{"result": "0x1"}')
+                response_body = response_body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(response_body)))
+                self.end_headers()
+                self.wfile.write(response_body)
+
+            do_GET = handle_request
+            do_POST = handle_request
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:{}'.format(self.httpd.server_address[1])
+        self.thread = threading.Thread(target=self.httpd.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class TestSessions(unittest.TestCase):
+    def setUp(self):
+        self.server = StubApiServer()
+        self.session = create_session(retries=2, backoff_factor=0)
+
+    def tearDown(self):
+        self.session.close()
+        self.server.stop()
+
+    def test_reuses_connections(self):
+        for _ in range(5):
+            self.assertEqual(self.session.get(self.server.url + '/balance').status_code, 200)
+        self.assertEqual(len(self.server.requests), 5)
+        self.assertEqual(len(self.server.client_ports), 1)
+
+    def test_retries_idempotent_requests(self):
+        self.server.responses = [(503, 'unavailable'), (503, 'unavailable')]
+        response = self.session.get(self.server.url + '/balance')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_does_not_retry_broadcasts(self):
+        self.server.responses = [(503, 'unavailable')]
+        response = self.session.post(self.server.url + '/tx', data='hex')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_applies_default_timeout(self):
+        self.assertEqual(create_session(connect_timeout=1, read_timeout=2).timeout, (1, 2))
+        app_config = mock.Mock(http_connect_timeout=3, http_read_timeout=4, http_pool_maxsize=2, http_retries=0)
+        session = create_session_from_config(app_config)
+        self.assertEqual(session.timeout, (3, 4))
+        self.assertEqual(session.get_adapter('https://example.org').max_retries.total, 0)
+        self.assertEqual(create_session_from_config(None).timeout,
+                         (sessions.DEFAULT_CONNECT_TIMEOUT, sessions.DEFAULT_READ_TIMEOUT))
+
+    def test_connectors_share_the_session(self):
+        with mock.patch.object(sessions, '_session', self.session):
+            self.server.responses = [(200, 'txid')]
+            self.assertEqual(BlockstreamBroadcaster(self.server.url).broadcast_tx(mock.Mock(stream=lambda s: None)),
+                             'txid')
+            etherscan = EtherscanBroadcaster(self.server.url + '/api?chainid=1', None)
+            self.server.responses = [(200, json.dumps({'result': '0x5'}))]
+            self.assertEqual(etherscan.get_address_nonce('0xabc'), 5)
+        self.assertEqual(self.server.requests[0][:2], ('POST', '/tx'))
+        self.assertEqual(len(self.server.client_ports), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
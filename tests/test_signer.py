@@ -1,7 +1,19 @@
+import os
+import shutil
+import tempfile
 import unittest
 import mock
 
-from cert_issuer.signer import FinalizableSigner
+from cert_core import Chain
+from eth_utils import to_hex
+
+from cert_issuer.blockchain_handlers.bitcoin import signer as bitcoin_signer
+from cert_issuer.blockchain_handlers.bitcoin.signer import BitcoinSigner
+from cert_issuer.blockchain_handlers.ethereum import signer as ethereum_signer
+from cert_issuer.blockchain_handlers.ethereum.signer import EthereumSigner
+from cert_issuer.errors import BroadcastError
+from cert_issuer.issuer import Issuer
+from cert_issuer.signer import BatchSigningSession, FileSecretManager, FinalizableSigner
 
 
 class TestSigner(unittest.TestCase):
@@ -14,5 +26,110 @@ class TestSigner(unittest.TestCase):
         mock_sm.stop.assert_called()
 
 
+class TestBatchSigningSession(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.key_path = os.path.join(self.directory, 'pk_issuer.txt')
+        with open(self.key_path, 'w') as f:
+            f.write('key')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_unlocks_once_for_the_batch(self):
+        secret_manager = FileSecretManager(None, self.key_path, safe_mode=False)
+        signed_with = []
+        transaction_handler = mock.Mock()
+
+        def issue_transaction(blockchain_bytes):
+            with FinalizableSigner(secret_manager) as signer:
+                signed_with.append(signer.wif)
+            if len(signed_with) < 3:
+                raise BroadcastError('down')
+            return 'txid'
+        transaction_handler.issue_transaction.side_effect = issue_transaction
+
+        with mock.patch('cert_issuer.signer.import_key', return_value='key') as import_key:
+            issuer = Issuer(mock.Mock(), transaction_handler, max_retry=5, secret_manager=secret_manager)
+            self.assertEqual(issuer.issue(mock.Mock()), 'txid')
+
+        import_key.assert_called_once_with(self.key_path)
+        self.assertEqual(signed_with, ['key', 'key', 'key'])
+        self.assertIsNone(secret_manager.wif)
+        self.assertEqual(secret_manager.sessions, 0)
+
+    def test_locks_the_key_when_the_batch_fails(self):
+        secret_manager = FileSecretManager(None, self.key_path, safe_mode=False)
+        batch_handler = mock.Mock()
+        batch_handler.prepare_batch.side_effect = ValueError('invalid batch')
+        with self.assertRaises(ValueError):
+            Issuer(batch_handler, mock.Mock(), secret_manager=secret_manager).issue(mock.Mock())
+        self.assertIsNone(secret_manager.wif)
+        self.assertEqual(secret_manager.sessions, 0)
+
+    def test_safe_mode_unlocks_for_each_signing_phase(self):
+        gate = mock.Mock()
+        secret_manager = FileSecretManager(None, self.key_path, safe_mode=True, connectivity_gate=gate)
+        with BatchSigningSession(secret_manager):
+            self.assertIsNone(secret_manager.wif)
+            for _ in range(2):
+                with FinalizableSigner(secret_manager) as signer:
+                    self.assertEqual(signer.wif, 'key')
+                self.assertIsNone(secret_manager.wif)
+        self.assertEqual(gate.wait_until_offline.call_count, 2)
+        self.assertEqual(gate.wait_until_online.call_count, 2)
+
+    def test_ignores_mock_secret_managers(self):
+        secret_manager = mock.Mock()
+        with BatchSigningSession(secret_manager):
+            pass
+        secret_manager.start.assert_not_called()
+
+
+class TestSignerKeyCache(unittest.TestCase):
+    def test_bitcoin_signer_parses_the_key_once_per_session(self):
+        from pycoin.networks.registry import network_for_netcode
+        wif = network_for_netcode('XTN').keys.private(secret_exponent=1).wif()
+        signer = BitcoinSigner(Chain.bitcoin_testnet)
+        transaction = mock.Mock()
+        transaction.sign.return_value.txs_in = [mock.Mock(script=b'signed')]
+
+        with mock.patch.object(bitcoin_signer, 'build_hash160_lookup',
+                               wraps=bitcoin_signer.build_hash160_lookup) as build_lookup:
+            for _ in range(3):
+                signer.sign_transaction(wif, transaction)
+            self.assertEqual(build_lookup.call_count, 1)
+            self.assertEqual(build_lookup.call_args[0][0], [1])
+            self.assertEqual(len({id(call[0][0]) for call in transaction.sign.call_args_list}), 1)
+
+            signer.clear_keys()
+            signer.sign_transaction(wif, transaction)
+            self.assertEqual(build_lookup.call_count, 2)
+
+    def test_ethereum_signer_decodes_the_key_once_per_session(self):
+        import web3
+        key = '0x' + '11' * 32
+        transaction = {'nonce': 0, 'to': web3.Web3.to_checksum_address('0x' + 'de' * 20), 'value': 0, 'gas': 25000,
+                       'gasPrice': 20000000000, 'data': '0x00'}
+        signer = EthereumSigner(Chain.ethereum_sepolia)
+        with mock.patch.object(ethereum_signer, 'parse_private_key',
+                               wraps=ethereum_signer.parse_private_key) as parse_private_key:
+            first = signer.sign_transaction(key, dict(transaction))
+            second = signer.sign_transaction(key, dict(transaction))
+        self.assertTrue(first.startswith('0x'))
+        self.assertEqual(first, second)
+        self.assertEqual(first, to_hex(web3.Account.sign_transaction(dict(transaction, chainId=signer.netcode),
+                                                                      key).raw_transaction))
+        self.assertEqual(parse_private_key.call_count, 1)
+
+    def test_secret_manager_clears_the_keys_on_stop(self):
+        signer = mock.Mock()
+        secret_manager = FileSecretManager(signer, '/unused', safe_mode=False)
+        with mock.patch('cert_issuer.signer.import_key', return_value='key'):
+            with FinalizableSigner(secret_manager):
+                signer.clear_keys.assert_not_called()
+        signer.clear_keys.assert_called_once_with()
+
+
 if __name__ == '__main__':
     unittest.main()
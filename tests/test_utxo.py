@@ -0,0 +1,130 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+from bitcoin import SelectParams
+from bitcoin.wallet import CBitcoinAddress
+from pycoin.coins.bitcoin.Spendable import Spendable
+
+from cert_issuer.blockchain_handlers.bitcoin import BitcoinTransactionCostConstants
+from cert_issuer.blockchain_handlers.bitcoin.transaction_handlers import BitcoinTransactionHandler
+from cert_issuer.blockchain_handlers.bitcoin.utxo import select_inputs
+from cert_issuer.daemon import DONE_DIR, FAILED_DIR, IssuanceDaemon
+from cert_issuer.errors import BroadcastError, InsufficientFundsError
+
+ISSUING_ADDRESS = 'mgAqW5ZCnEp7fjvpj8RUL3WxsBy8rcDcCi'
+
+
+def spendable(coin_value, index=0, script=b''):
+    return Spendable(coin_value, script, bytes([index]) * 32, index)
+
+
+class TestSelectInputs(unittest.TestCase):
+    def test_uses_the_smallest_output_covering_the_cost(self):
+        spendables = [spendable(value, index) for index, value in enumerate([500, 3000, 1200, 1100, 90000])]
+        selected = select_inputs(spendables, lambda num_inputs: 1000)
+        self.assertEqual([s.coin_value for s in selected], [1100])
+
+    def test_uses_as_few_inputs_as_possible(self):
+        spendables = [spendable(value, index) for index, value in enumerate([400, 700, 600, 300, 650])]
+        selected = select_inputs(spendables, lambda num_inputs: 1000 + 100 * num_inputs)
+        self.assertEqual([s.coin_value for s in selected], [700, 600])
+
+    def test_uses_an_output_matching_the_cost(self):
+        spendables = [spendable(value, index) for index, value in enumerate([999, 1000, 1001])]
+        selected = select_inputs(spendables, lambda num_inputs: 1000)
+        self.assertEqual([s.coin_value for s in selected], [1000])
+
+    def test_is_deterministic(self):
+        spendables = [spendable(1000, index) for index in range(5)]
+        first = select_inputs(spendables, lambda num_inputs: 500)
+        second = select_inputs(list(reversed(spendables)), lambda num_inputs: 500)
+        self.assertEqual([s.tx_out_index for s in first], [s.tx_out_index for s in second])
+
+    def test_returns_none_when_funds_are_insufficient(self):
+        self.assertIsNone(select_inputs([spendable(400), spendable(300, 1)], lambda num_inputs: 1000))
+        self.assertIsNone(select_inputs([], lambda num_inputs: 1000))
+
+
+class TestBitcoinTransactionHandlerUtxos(unittest.TestCase):
+    def setUp(self):
+        SelectParams('testnet')
+        self.script = bytes(CBitcoinAddress(ISSUING_ADDRESS).to_scriptPubKey())
+        self.connector = mock.Mock()
+        self.connector.get_unspent_outputs.return_value = [spendable(1000000, 1, self.script),
+                                                           spendable(20000000, 2, self.script)]
+        self.connector.broadcast_tx.return_value = 'txid'
+        self.handler = BitcoinTransactionHandler(self.connector, BitcoinTransactionCostConstants(),
+                                                 secret_manager=mock.Mock(), issuing_address=ISSUING_ADDRESS)
+        self.handler.sign_transaction = lambda prepared_tx: prepared_tx
+
+    def test_fetches_the_unspent_outputs_once_and_spends_the_change(self):
+        self.handler.ensure_balance()
+        self.handler.issue_transaction(b'\x01' * 32)
+        first_tx = self.connector.broadcast_tx.call_args[0][0]
+        self.assertEqual([tx_in.previous_index for tx_in in first_tx.txs_in], [1])
+
+        self.handler.issue_transaction(b'\x02' * 32)
+        second_tx = self.connector.broadcast_tx.call_args[0][0]
+        self.assertEqual(self.connector.broadcast_tx.call_count, 2)
+        self.assertEqual(self.connector.get_unspent_outputs.call_count, 1)
+        self.assertEqual([(tx_in.previous_hash, tx_in.previous_index) for tx_in in second_tx.txs_in],
+                         [(first_tx.hash(), 0)])
+        fee = BitcoinTransactionCostConstants().get_recommended_fee_coin()
+        self.assertEqual(self.handler.utxo_cache.get_balance(), 21000000 - 2 * fee)
+
+    def test_fetches_the_unspent_outputs_again_after_a_failed_broadcast(self):
+        self.connector.broadcast_tx.side_effect = [BroadcastError('down'), 'txid']
+        with self.assertRaises(BroadcastError):
+            self.handler.issue_transaction(b'\x01' * 32)
+        self.handler.issue_transaction(b'\x01' * 32)
+        self.assertEqual(self.connector.get_unspent_outputs.call_count, 2)
+
+    def test_leaves_no_dust_change(self):
+        cost_constants = BitcoinTransactionCostConstants()
+        fee = cost_constants.get_recommended_fee_coin()
+        self.connector.get_unspent_outputs.return_value = [spendable(fee + 5, 1, self.script),
+                                                           spendable(fee + 10000, 2, self.script)]
+        self.handler.issue_transaction(b'\x01' * 32)
+        transaction = self.connector.broadcast_tx.call_args[0][0]
+        self.assertEqual([tx_in.previous_index for tx_in in transaction.txs_in], [2])
+        change = [tx_out.coin_value for tx_out in transaction.txs_out if tx_out.coin_value > 0]
+        self.assertEqual(change, [10000])
+        self.assertGreaterEqual(change[0], cost_constants.get_minimum_output_coin())
+
+    def test_raises_when_funds_are_insufficient(self):
+        self.connector.get_unspent_outputs.return_value = [spendable(10, 1)]
+        with self.assertRaises(InsufficientFundsError):
+            self.handler.create_transaction(b'\x01' * 32)
+
+    def test_fetches_the_unspent_outputs_again_after_insufficient_funds(self):
+        self.connector.get_unspent_outputs.return_value = [spendable(10, 1, self.script)]
+        with self.assertRaises(InsufficientFundsError):
+            self.handler.ensure_balance()
+        self.connector.get_unspent_outputs.return_value = [spendable(20000000, 2, self.script)]
+        self.handler.ensure_balance()
+        self.assertEqual(self.connector.get_unspent_outputs.call_count, 2)
+
+    def test_daemon_issues_again_once_the_address_is_topped_up(self):
+        spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spool_dir)
+        batch_handler = mock.Mock()
+        batch_handler.prepare_batch.return_value = b'\x01' * 32
+        issuance_daemon = IssuanceDaemon(mock.Mock(max_retry=1), batch_handler, self.handler, spool_dir)
+        self.connector.get_unspent_outputs.return_value = [spendable(10, 1, self.script)]
+        os.makedirs(os.path.join(spool_dir, 'first'))
+        self.assertEqual(issuance_daemon.process_pending(), 1)
+
+        self.connector.get_unspent_outputs.return_value = [spendable(20000000, 2, self.script)]
+        os.makedirs(os.path.join(spool_dir, 'second'))
+        self.assertEqual(issuance_daemon.process_pending(), 1)
+
+        self.assertEqual(self.connector.get_unspent_outputs.call_count, 2)
+        self.assertEqual(os.listdir(os.path.join(spool_dir, FAILED_DIR)), ['first'])
+        self.assertEqual(os.listdir(os.path.join(spool_dir, DONE_DIR)), ['second'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -81,6 +81,7 @@ class TestIssuanceBatchValidation (unittest.TestCase):
 
 class MockCertificateV3Handler(CertificateV3Handler):
     def __init__(self, test_certificate):
+        super().__init__(None)
         self.test_certificate = test_certificate
         print(self.test_certificate)
     def _get_certificate_to_issue(self, data):